@@ -0,0 +1,158 @@
+# catalog_index.py - in-memory index over catalog.json for the summary / paginated catalog API
+import threading
+
+from .sync_core import AllowMatcher
+
+PAGE_SIZE_DEFAULT = 200
+PAGE_SIZE_MAX = 1000
+
+CATEGORY_KINDS = ("livetv", "movies")
+
+
+def item_name(it: dict) -> str:
+    """Name the GUI shows and the allow-list stores (allow.*.titles)."""
+    return it.get("tvg_name") or it.get("title") or ""
+
+
+def _page(items, page: int, page_size: int, q: str = "") -> dict:
+    if q:
+        q = q.casefold()
+        items = [it for it in items if q in item_name(it).casefold()]
+    start = (page - 1) * page_size
+    return {
+        "total": len(items),
+        "page": page,
+        "page_size": page_size,
+        "items": items[start:start + page_size],
+    }
+
+
+class CatalogIndex:
+    """
+    Catalog (build_catalog shape) with items pre-sorted by name, episodes by number,
+    so pages can be sliced per request without touching the other categories.
+    """
+
+    def __init__(self, cat: dict, version=None):
+        self.version = version
+        self.totals = {k: (cat.get(k) or {}).get("total", 0) for k in ("livetv", "movies", "series")}
+        self.categories = {}
+        for kind in CATEGORY_KINDS:
+            cats = (cat.get(kind) or {}).get("categories") or {}
+            self.categories[kind] = {
+                name: sorted(items, key=lambda it: item_name(it).casefold()) for name, items in cats.items()
+            }
+        self.shows = {}
+        for show, obj in ((cat.get("series") or {}).get("shows") or {}).items():
+            seasons = obj.get("seasons") or {}
+            self.shows[show] = {
+                sk: sorted(eps, key=lambda ep: ep.get("episode") or 0) for sk, eps in sorted(seasons.items())
+            }
+
+    def summary(self, allow: dict = None) -> dict:
+        """
+        Counts only: categories/shows -> total (+ seasons per show) and how many of their
+        items the allow-list lets through ("selected", same rules as run_sync), without any item.
+        """
+        allow = AllowMatcher(allow)
+        out = {}
+        for kind in CATEGORY_KINDS:
+            match_kind = "movie" if kind == "movies" else kind
+            out[kind] = {
+                "total": self.totals[kind],
+                "categories": {
+                    name: {
+                        "total": len(items),
+                        "selected": sum(1 for it in items if allow.allows(match_kind, name, item_name(it), None)),
+                    }
+                    for name, items in self.categories[kind].items()
+                },
+            }
+        shows = {}
+        for show, seasons in self.shows.items():
+            total = selected = 0
+            for eps in seasons.values():
+                total += len(eps)
+                selected += sum(1 for ep in eps if allow.allows("series", ep.get("group"), item_name(ep), show))
+            shows[show] = {"total": total, "seasons": len(seasons), "selected": selected}
+        out["series"] = {"total": self.totals["series"], "shows": shows}
+        return out
+
+    def items(self, kind: str, category: str, page: int = 1, page_size: int = PAGE_SIZE_DEFAULT, q: str = ""):
+        """One page of a LiveTV/Movies category (None: unknown kind/category)."""
+        items = self.categories.get(kind, {}).get(category)
+        if items is None:
+            return None
+        return _page(items, page, page_size, q)
+
+    def seasons(self, show: str):
+        """[{"season": "01", "total": n}, ...] of a show (None: unknown show)."""
+        seasons = self.shows.get(show)
+        if seasons is None:
+            return None
+        return [{"season": sk, "total": len(eps)} for sk, eps in seasons.items()]
+
+    def episodes(self, show: str, season: str, page: int = 1, page_size: int = PAGE_SIZE_DEFAULT, q: str = ""):
+        """One page of a season (None: unknown show/season)."""
+        eps = self.shows.get(show, {}).get(season)
+        if eps is None:
+            return None
+        return _page(eps, page, page_size, q)
+
+    def names(self, kind: str, key: str = None):
+        """
+        All names of a category (kind livetv/movies) or show (kind series), for selection state;
+        key None: of every category/show of the kind.
+        """
+        if key is None:
+            if kind == "series":
+                return [n for show in self.shows for n in self.names(kind, show)]
+            if kind not in self.categories:
+                return None
+            return [n for cat in self.categories[kind] for n in self.names(kind, cat)]
+        if kind == "series":
+            seasons = self.shows.get(key)
+            if seasons is None:
+                return None
+            return [n for eps in seasons.values() for n in map(item_name, eps) if n]
+        items = self.categories.get(kind, {}).get(key)
+        if items is None:
+            return None
+        return [n for n in map(item_name, items) if n]
+
+
+class CatalogCache:
+    """
+    One CatalogIndex per process, rebuilt when catalog.json changed on disk
+    (mtime, so writes of other workers are picked up).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._index = None
+
+    def _mtime(self):
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def set(self, cat: dict):
+        """After writing catalog.json: index the dict in hand instead of re-reading it."""
+        with self._lock:
+            self._index = CatalogIndex(cat, self._mtime())
+
+    def get(self, load):
+        """Current index or None (no catalog); load() reads catalog.json as dict."""
+        mtime = self._mtime()
+        if mtime is None:
+            return None
+        with self._lock:
+            if self._index is not None and self._index.version == mtime:
+                return self._index
+            cat = load()
+            if not cat:
+                return None
+            self._index = CatalogIndex(cat, mtime)
+            return self._index
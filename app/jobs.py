@@ -0,0 +1,181 @@
+# jobs.py - background jobs (sync run / playlist refresh) with progress for Server-Sent Events
+import json
+import time
+import asyncio
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+JOBS_KEEP = 20  # finished jobs kept in memory for /api/jobs
+SSE_POLL_SECS = 0.5
+SSE_HEARTBEAT_SECS = 15
+
+
+class Job:
+    """
+    One submitted run. Progress is the innermost RunTimer phase
+    (phase, done, total) plus rate (items/s) and ETA (seconds) derived from it.
+    """
+
+    def __init__(self, kind: str, params: dict = None, key=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params or {}
+        self.key = key
+        self.attached = 0  # triggers coalesced into this job
+        self.status = "queued"  # queued | running | done | error
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.version = 0
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+    def _changed(self):
+        self.version += 1
+
+    def on_progress(self, event: dict):
+        """RunTimer listener."""
+        done = event.get("done") or 0
+        total = event.get("total")
+        elapsed = event.get("elapsed") or 0
+        rate = done / elapsed if done and elapsed > 0 else None
+        eta = None
+        if rate and total is not None and total >= done:
+            eta = round((total - done) / rate, 1)
+        with self._lock:
+            self.progress = {
+                "phase": event.get("phase"),
+                "done": done,
+                "total": total,
+                "rate": round(rate, 1) if rate else None,
+                "eta": eta,
+            }
+            self._changed()
+
+    def set_status(self, status: str, result=None, error: str = None):
+        with self._lock:
+            self.status = status
+            if status == "running":
+                self.started_at = time.time()
+            if status in ("done", "error"):
+                self.finished_at = time.time()
+                self.result = result
+                self.error = error
+            self._changed()
+        if status in ("done", "error"):
+            self._finished.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Blocks until the job is finished (False on timeout)."""
+        return self._finished.wait(timeout)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error")
+
+    def snapshot(self, with_result: bool = True) -> dict:
+        with self._lock:
+            d = {
+                "id": self.id,
+                "kind": self.kind,
+                "params": self.params,
+                "status": self.status,
+                "created_at": int(self.created_at),
+                "started_at": int(self.started_at) if self.started_at else None,
+                "finished_at": int(self.finished_at) if self.finished_at else None,
+                "progress": dict(self.progress),
+                "error": self.error,
+                "attached": self.attached,
+                "version": self.version,
+            }
+            if with_result:
+                d["result"] = self.result
+            return d
+
+
+class JobRunner:
+    """
+    Runs jobs one after another on a background thread (queued jobs wait their turn).
+    Request coalescing: a submit with the same key as a queued/running job attaches
+    to that job instead of queueing a second one.
+    """
+
+    def __init__(self):
+        self._ex = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self.jobs = {}  # id -> Job, insertion order
+
+    def submit(self, kind: str, fn, params: dict = None, key=None):
+        """
+        fn(job) runs in the background; its return value becomes job.result.
+        Returns (job, attached): attached=True when an unfinished job with the same key existed.
+        """
+        with self._lock:
+            if key is not None:
+                for j in self.jobs.values():
+                    if j.key == key and not j.finished:
+                        with j._lock:
+                            j.attached += 1
+                            j._changed()
+                        return j, True
+            job = Job(kind, params, key)
+            self.jobs[job.id] = job
+            self._prune()
+
+        def run():
+            job.set_status("running")
+            try:
+                res = fn(job)
+            except Exception as e:
+                job.set_status("error", error=str(e) or e.__class__.__name__)
+            else:
+                job.set_status("done", result=res)
+
+        self._ex.submit(run)
+        return job, False
+
+    def _prune(self):
+        finished = [j for j in self.jobs.values() if j.finished]
+        for j in finished[: max(0, len(finished) - JOBS_KEEP)]:
+            del self.jobs[j.id]
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    def active(self):
+        """Running/queued jobs, oldest first."""
+        return [j for j in self.list() if not j.finished]
+
+
+async def sse_events(job: Job, poll: float = SSE_POLL_SECS, heartbeat: float = SSE_HEARTBEAT_SECS):
+    """
+    Server-Sent Events for one job (async generator for StreamingResponse, holds no thread):
+    "progress" on every change, "done" with the final state (incl. result) at the end,
+    a comment line as heartbeat so proxies keep the connection open.
+    """
+    version = -1
+    idle = 0.0
+    while True:
+        if job.version == version:
+            await asyncio.sleep(poll)
+            idle += poll
+            if idle >= heartbeat:
+                idle = 0.0
+                yield ": ping\n\n"
+            continue
+        idle = 0.0
+        snap = job.snapshot()
+        version = snap["version"]
+        event = "done" if snap["status"] in ("done", "error") else "progress"
+        yield f"event: {event}\nid: {version}\ndata: {json.dumps(snap, ensure_ascii=False)}\n\n"
+        if event == "done":
+            return
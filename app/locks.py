@@ -0,0 +1,122 @@
+# locks.py - cross-process coordination via flock() files in DATA_DIR (run lock, scheduler leader)
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # e.g. Windows: coordination within this process only
+    fcntl = None
+
+
+class RunLock:
+    """
+    Exclusive lock for sync runs / playlist refreshes shared by all processes using
+    the same DATA_DIR (uvicorn workers, CLI). The holder writes pid/kind/since into the
+    file, so a waiting process can tell what it is waiting for.
+    The file is never deleted (an unlinked lock file would split the lock).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        # flock() is per open file, this only covers platforms without fcntl
+        self._local = threading.Lock()
+
+    def holder(self) -> dict:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8") or "{}")
+        except Exception:
+            return {}
+
+    @contextmanager
+    def hold(self, owner: dict, on_wait=None):
+        """
+        Blocks until the lock is free; yields True when it had to wait for another
+        holder (whose result may already cover this request), else False.
+        on_wait(holder) is called once before blocking.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, "a+", encoding="utf-8")
+        waited = False
+        try:
+            if fcntl is None:
+                if not self._local.acquire(blocking=False):
+                    waited = True
+                    if on_wait is not None:
+                        on_wait(self.holder())
+                    self._local.acquire()
+            else:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    waited = True
+                    if on_wait is not None:
+                        on_wait(self.holder())
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+            try:
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({**owner, "pid": os.getpid(), "since": int(time.time())}))
+                f.flush()
+            except Exception:
+                pass
+
+            try:
+                yield waited
+            finally:
+                try:
+                    f.seek(0)
+                    f.truncate()
+                    f.flush()
+                except Exception:
+                    pass
+                if fcntl is None:
+                    self._local.release()
+                else:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            f.close()
+
+
+class LeaderLock:
+    """
+    Non-blocking, process-lifetime lock: the process holding it is the leader
+    (runs the scheduler). Others retry with try_acquire(); the lock is released by
+    the OS when the leader process exits.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._f = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._f is not None
+
+    def try_acquire(self) -> bool:
+        if self._f is not None:
+            return True
+        if fcntl is None:
+            # no cross-process locking available -> every process leads
+            self._f = True
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, "a+", encoding="utf-8")
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        try:
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps({"pid": os.getpid(), "since": int(time.time())}))
+            f.flush()
+        except Exception:
+            pass
+        self._f = f
+        return True
@@ -1,4 +1,11 @@
+import os
+import io
 import re
+import sys
+import hashlib
+import mmap
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from urllib.parse import urlparse
 
 EXTINF_RE = re.compile(r"#EXTINF:(?P<dur>-?\d+)\s*(?P<attrs>[^,]*),(?P<title>.*)$")
@@ -14,36 +21,111 @@ def parse_attrs(attr_str: str) -> dict:
 
 
 def parse_m3u(m3u_text: str):
-    lines = [ln.strip() for ln in m3u_text.splitlines() if ln.strip()]
-    i = 0
-    while i < len(lines):
-        ln = lines[i]
+    return parse_m3u_lines(m3u_text.splitlines())
+
+
+def parse_m3u_lines(lines):
+    """
+    Core EXTINF/URL pairing over an iterable of lines (str).
+    The URL is the first following line that is not a '#' line; comment lines
+    (and further #EXTINF lines) in between are skipped.
+    """
+    pending = None
+    for ln in lines:
+        ln = ln.strip()
+        if not ln:
+            continue
+        if pending is not None:
+            if ln.startswith("#"):
+                continue
+            attrs, title = pending
+            pending = None
+            yield {"title": title, "attrs": attrs, "url": ln}
+            continue
         if ln.startswith("#EXTINF"):
             m = EXTINF_RE.match(ln)
             if not m:
-                i += 1
                 continue
-            attrs = parse_attrs(m.group("attrs") or "")
-            title = (m.group("title") or "").strip()
-
-            j = i + 1
-            url = None
-            while j < len(lines):
-                if not lines[j].startswith("#"):
-                    url = lines[j].strip()
-                    break
-                j += 1
+            pending = (parse_attrs(m.group("attrs") or ""), (m.group("title") or "").strip())
+
+
+# single-byte line breaks of str.splitlines() besides \n and \r; ASCII, so never
+# part of a multi-byte UTF-8 sequence
+_BYTE_BREAKS = (b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e")
+
 
-            if url:
-                yield {"title": title, "attrs": attrs, "url": url}
-            i = j + 1 if j > i else i + 1
+def iter_byte_lines(fp, chunk_size: int = 1 << 20):
+    r"""
+    Yields decoded lines from a binary file object (or mmap) reading `chunk_size`
+    bytes at a time. Only the current chunk + one partial line are kept in memory.
+    Lines are split like str.splitlines() (also \r, \x0b, \x0c, \x1c-\x1e, \x85,
+    \u2028, \u2029), so parse_m3u_file gives the same entries as parse_m3u: every
+    chunk is cut after its last b"\n", which always ends a line. Without one (CR-only
+    line endings) it is cut after the last other ASCII break, so the partial line
+    does not grow into the whole file.
+    """
+    tail = b""
+    while True:
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            break
+        if tail:
+            chunk = tail + chunk
+        cut = chunk.rfind(b"\n") + 1
+        if not cut:
+            # a \r as the last byte may still be the first half of \r\n
+            cut = max(chunk.rfind(b"\r", 0, len(chunk) - 1), *map(chunk.rfind, _BYTE_BREAKS)) + 1
+        tail = chunk[cut:]
+        if cut:
+            yield from chunk[:cut].decode("utf-8", errors="replace").splitlines()
+    if tail:
+        yield from tail.decode("utf-8", errors="replace").splitlines()
+
+
+def parse_m3u_stream(fp, chunk_size: int = 1 << 20):
+    """Streaming variant of parse_m3u for binary file objects / mmaps."""
+    return parse_m3u_lines(iter_byte_lines(fp, chunk_size))
+
+
+def parse_m3u_file(path, chunk_size: int = 1 << 20, use_mmap: bool = False):
+    """
+    Streaming parse of playlist.m3u on disk (bounded memory).
+    use_mmap=True reads through a read-only memory map instead of buffered file reads.
+    """
+    with open(path, "rb") as f:
+        if use_mmap:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty file cannot be mapped
+                return
+            with mm:
+                yield from parse_m3u_stream(mm, chunk_size)
         else:
-            i += 1
+            yield from parse_m3u_stream(f, chunk_size)
+
+
+# -------------------------
+# Classification (compiled once)
+# -------------------------
+# episode marker, searched in the lower-cased name: "s01e02" / "s 1 e 2" / "1x02"
+EPISODE_RE = re.compile(r"s\s*\d{1,2}\s*e\s*\d{1,2}|\d{1,2}\s*x\s*\d{1,2}")
+
+# "Show - S01 E06 - Title" / "Show S01E06 Title"
+SXXEXX_RE = re.compile(
+    r"^(?P<show>.*?)[\s\-_:|.]*S\s*(?P<s>\d{1,2})\s*E\s*(?P<e>\d{1,2})[\s\-_:|.]*?(?P<ep>.*)$",
+    re.IGNORECASE,
+)
+# "Show 1x06 Title"
+NXM_RE = re.compile(
+    r"^(?P<show>.*?)[\s\-_:|.]*?(?P<s>\d{1,2})\s*x\s*(?P<e>\d{1,2})[\s\-_:|.]*?(?P<ep>.*)$",
+    re.IGNORECASE,
+)
+WS_RE = re.compile(r"\s+")
 
 
 def has_episode_pattern(s: str) -> bool:
-    t = (s or "").lower()
-    return bool(re.search(r"(s\s*\d{1,2}\s*e\s*\d{1,2}|s\d{1,2}e\d{1,2}|\d{1,2}\s*x\s*\d{1,2})", t))
+    return EPISODE_RE.search((s or "").lower()) is not None
 
 
 def url_ext(url: str) -> str:
@@ -63,46 +145,16 @@ def is_series_group(group: str) -> bool:
 
 def clean_lang_tags(s: str) -> str:
     s = (s or "").strip()
-    s = re.sub(LANG_TAG_RE, "", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = LANG_TAG_RE.sub("", s)
+    s = WS_RE.sub(" ", s).strip()
     return s
 
 
 def extract_show_season_episode(raw_title: str):
     title = (raw_title or "").strip()
 
-    # S01 E06
-    m = re.search(
-        r"^(?P<show>.*?)[\s\-_:|.]*S\s*(?P<s>\d{1,2})\s*E\s*(?P<e>\d{1,2})[\s\-_:|.]*?(?P<ep>.*)$",
-        title,
-        flags=re.IGNORECASE,
-    )
-    if m:
-        show = clean_lang_tags(m.group("show").strip(" -_:|."))
-        season = int(m.group("s"))
-        epn = int(m.group("e"))
-        ep_title = m.group("ep").strip(" -_:|.") or None
-        return show, season, epn, ep_title
-
-    # S01E06
-    m = re.search(
-        r"^(?P<show>.*?)[\s\-_:|.]*S(?P<s>\d{1,2})E(?P<e>\d{1,2})[\s\-_:|.]*?(?P<ep>.*)$",
-        title,
-        flags=re.IGNORECASE,
-    )
-    if m:
-        show = clean_lang_tags(m.group("show").strip(" -_:|."))
-        season = int(m.group("s"))
-        epn = int(m.group("e"))
-        ep_title = m.group("ep").strip(" -_:|.") or None
-        return show, season, epn, ep_title
-
-    # 1x06
-    m = re.search(
-        r"^(?P<show>.*?)[\s\-_:|.]*?(?P<s>\d{1,2})\s*x\s*(?P<e>\d{1,2})[\s\-_:|.]*?(?P<ep>.*)$",
-        title,
-        flags=re.IGNORECASE,
-    )
+    # S01 E06 / S01E06, then 1x06
+    m = SXXEXX_RE.search(title) or NXM_RE.search(title)
     if m:
         show = clean_lang_tags(m.group("show").strip(" -_:|."))
         season = int(m.group("s"))
@@ -120,7 +172,11 @@ def classify_item(url: str, group: str, tvg_name: str, title: str) -> str:
     - movie only if URL ends with .mkv or .mp4 (and not series)
     - else live tv
     """
-    if is_series_group(group) or has_episode_pattern(tvg_name) or has_episode_pattern(title):
+    if (
+        is_series_group(group)
+        or has_episode_pattern(tvg_name)
+        or (title != tvg_name and has_episode_pattern(title))
+    ):
         return "series"
 
     ext = url_ext(url)
@@ -130,51 +186,256 @@ def classify_item(url: str, group: str, tvg_name: str, title: str) -> str:
     return "livetv"
 
 
-def build_catalog(m3u_text: str):
-    cat = {
-        "livetv": {"categories": {}, "total": 0},
-        "movies": {"categories": {}, "total": 0},
-        "series": {"shows": {}, "total": 0},
-    }
+def classify_fields(url: str, group: str, tvg_name: str, title: str):
+    """
+    One pass per entry: (kind, show, season, episode, ep_title) with the same results as
+    classify_item + extract_show_season_episode (+ the show-less series fallback of
+    classify_entries). The episode marker of a name is searched at most once.
+    """
+    if not (
+        is_series_group(group)
+        or has_episode_pattern(tvg_name)
+        or (title != tvg_name and has_episode_pattern(title))
+    ):
+        ext = url_ext(url)
+        return ("movie" if ext in ("mkv", "mp4") else "livetv"), None, None, None, None
 
-    for it in parse_m3u(m3u_text):
+    show, season, epn, ep_title = extract_show_season_episode(tvg_name)
+    if not show:
+        return "series", clean_lang_tags(tvg_name), 0, 0, ep_title
+    return "series", show, season, epn, ep_title
+
+
+def parse_playlist(m3u_text: str):
+    """
+    Parse + classify the whole playlist ONCE.
+    Returns one PlaylistEntry per entry (playlist order) that catalog, snapshot and sync all share:
+      key, url, title, group, tvg_name, logo, kind (livetv|movie|series),
+      show, season, episode, ep_title (series only)
+    """
+    return classify_entries(parse_m3u(m3u_text))
+
+
+def parse_playlist_file(path, use_mmap: bool = False, workers: int = 1):
+    """
+    Same as parse_playlist, but streams playlist.m3u from disk instead of a decoded str.
+    workers > 1 parses + classifies shards of large files in a process pool (parse_playlist_sharded).
+    """
+    if workers and workers > 1:
+        try:
+            if os.path.getsize(path) >= SHARD_MIN_BYTES:
+                return parse_playlist_sharded(path, workers)
+        except OSError:
+            pass
+    return classify_entries(parse_m3u_file(path, use_mmap=use_mmap))
+
+
+# -------------------------
+# Sharded parsing (process pool)
+# -------------------------
+# below this size the process start-up costs more than the parsing itself
+SHARD_MIN_BYTES = 8 << 20
+
+
+def _safe_shard_start(mm, nl: int) -> bool:
+    """
+    True if a shard may start right after the newline at `nl`: the parser must not have a
+    pending #EXTINF there, i.e. the previous non-blank line is not a '#' line.
+    """
+    end = nl
+    while end > 0:
+        start = mm.rfind(b"\n", 0, end) + 1
+        # the b"\n" line may hold several lines in str.splitlines() terms -> its last one counts
+        for line in reversed(mm[start:end].decode("utf-8", errors="replace").splitlines()):
+            line = line.strip()
+            if line:
+                return not line.startswith("#")
+        end = start - 1
+    return True
+
+
+def shard_ranges(path, shards: int):
+    """
+    Splits playlist.m3u into at most `shards` byte ranges [start, end). Every range but the
+    first starts at an "#EXTINF" line, so each shard parses exactly like the same lines
+    inside the whole file.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    shards = max(1, int(shards or 1))
+    bounds = [0]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for i in range(1, shards):
+            pos = max(size * i // shards, bounds[-1])
+            while True:
+                nl = mm.find(b"\n#EXTINF", pos)
+                if nl < 0:
+                    pos = size
+                    break
+                if _safe_shard_start(mm, nl):
+                    pos = nl + 1
+                    break
+                pos = nl + 1
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _parse_shard(args):
+    path, start, end = args
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return classify_entries(parse_m3u_stream(io.BytesIO(data)))
+
+
+def parse_playlist_sharded(path, workers: int, shards: int = None):
+    """
+    parse_playlist_file over `shards` (default: 4 per worker) byte ranges in `workers`
+    processes. Results are concatenated in shard order = original playlist order, so
+    first-wins dedupe and channel numbering stay deterministic.
+    """
+    path = str(path)
+    ranges = shard_ranges(path, shards or workers * 4)
+    if len(ranges) <= 1:
+        return classify_entries(parse_m3u_file(path))
+    entries = []
+    # spawn: the app process runs scheduler/server threads, forking those is not safe
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=ctx) as ex:
+        for part in ex.map(_parse_shard, [(path, a, b) for a, b in ranges]):
+            entries.extend(part)
+    return entries
+
+
+# -------------------------
+# Entry records
+# -------------------------
+ENTRY_FIELDS = ("key", "url", "title", "group", "tvg_name", "logo", "kind", "show", "season", "episode", "ep_title")
+
+
+class PlaylistEntry:
+    """
+    One parsed + classified playlist entry (see parse_playlist).
+    Slotted instead of a dict, with the strings that repeat across entries (group, show)
+    interned and title/tvg_name shared when equal. Read as attributes (e.kind);
+    e["kind"] keeps working for dict-style callers.
+    """
+
+    __slots__ = ENTRY_FIELDS
+
+    def __init__(self, key, url, title, group, tvg_name, logo, kind, show, season, episode, ep_title):
+        self.key = key
+        self.url = url
+        self.title = title
+        self.group = group
+        self.tvg_name = tvg_name
+        self.logo = logo
+        self.kind = kind
+        self.show = show
+        self.season = season
+        self.episode = episode
+        self.ep_title = ep_title
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __eq__(self, other):
+        if not isinstance(other, PlaylistEntry):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in ENTRY_FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"PlaylistEntry({self.kind}, {self.group!r}, {self.tvg_name!r})"
+
+    def __reduce__(self):
+        # compact pickling (sharded parsing returns entries from worker processes)
+        return (PlaylistEntry, tuple(getattr(self, f) for f in ENTRY_FIELDS))
+
+    def as_dict(self) -> dict:
+        return {f: getattr(self, f) for f in ENTRY_FIELDS}
+
+
+def classify_entries(raw_items):
+    entries = []
+    intern = sys.intern
+    for it in raw_items:
         attrs = it["attrs"]
         url = it["url"]
         title = it["title"]
-        group = attrs.get("group-title") or "Ungrouped"
+        group = intern(attrs.get("group-title") or "Ungrouped")
         tvg_name = attrs.get("tvg-name") or title
-        logo = attrs.get("tvg-logo") or ""
+        if tvg_name == title:
+            tvg_name = title
+
+        kind, show, season, epn, ep_title = classify_fields(url, group, tvg_name, title)
+        if show is not None:
+            show = intern(show)
+
+        entries.append(
+            PlaylistEntry(
+                hashlib.sha256(url.encode("utf-8")).hexdigest(),
+                url,
+                title,
+                group,
+                tvg_name,
+                attrs.get("tvg-logo") or "",
+                kind,
+                show,
+                season,
+                epn,
+                ep_title,
+            )
+        )
+    return entries
 
-        kind = classify_item(url, group, tvg_name, title)
 
-        item = {
-            "group": group,
-            "tvg_name": tvg_name,
-            "title": title,
-            "url": url,
-            "logo": logo,
-        }
+def build_catalog(m3u_text: str = None, entries=None):
+    if entries is None:
+        entries = parse_playlist(m3u_text or "")
+
+    cat = {
+        "livetv": {"categories": {}, "total": 0},
+        "movies": {"categories": {}, "total": 0},
+        "series": {"shows": {}, "total": 0},
+    }
+
+    for e in entries:
+        group = e.group
+        kind = e.kind
 
         if kind in ("livetv", "movie"):
             store_kind = "movies" if kind == "movie" else "livetv"
-            cat[store_kind]["categories"].setdefault(group, []).append(item)
+            cat[store_kind]["categories"].setdefault(group, []).append(
+                {"group": group, "tvg_name": e.tvg_name, "title": e.title, "url": e.url, "logo": e.logo}
+            )
             cat[store_kind]["total"] += 1
         else:
-            show, season, epn, ep_title = extract_show_season_episode(tvg_name)
-            if not show:
-                show = clean_lang_tags(tvg_name)
-                season = 0
-                epn = 0
+            show = e.show
+            season = e.season
 
             show_obj = cat["series"]["shows"].setdefault(show, {"seasons": {}, "total": 0})
-            season_key = f"{int(season):02d}"
+            season_key = f"{season:02d}"
             show_obj["seasons"].setdefault(season_key, []).append(
                 {
-                    **item,
+                    "group": group,
+                    "tvg_name": e.tvg_name,
+                    "title": e.title,
+                    "url": e.url,
+                    "logo": e.logo,
                     "show": show,
-                    "season": int(season),
-                    "episode": int(epn),
-                    "ep_title": ep_title,
+                    "season": season,
+                    "episode": e.episode,
+                    "ep_title": e.ep_title,
                 }
             )
             show_obj["total"] += 1
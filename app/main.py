@@ -3,22 +3,32 @@ import json
 import shutil
 import hashlib
 import re
+import zlib
+import time
 from pathlib import Path
 from datetime import datetime, timezone
 
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from fastapi.concurrency import run_in_threadpool
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from urllib.request import urlopen, Request as UrlReq
+from urllib.error import HTTPError
 from urllib.parse import quote
 
-from .m3u_core import build_catalog, parse_m3u, classify_item, extract_show_season_episode, clean_lang_tags
-from .sync_core import run_sync
+from .m3u_core import build_catalog, parse_playlist, parse_playlist_file, classify_item, extract_show_season_episode, clean_lang_tags
+from .sync_core import run_sync, plan_sync, scan_picon_dir
+from .state_store import StateStore, state_db_exists
+from .metrics import NO_FILE_STATS, FileStats, RunTimer, render_prometheus
+from .profiling import PROFILE_KEEP, PROFILE_TOP_N, run_profiled, profile_names, profile_path
+from .jobs import JobRunner, sse_events
+from .locks import RunLock, LeaderLock
+from .catalog_index import CatalogCache, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
 
 
 DATA_DIR = Path(os.getenv("DATA_DIR", "/data")).resolve()
@@ -32,8 +42,22 @@ CONFIG_PATH = DATA_DIR / "config.json"
 PLAYLIST_PATH = DATA_DIR / "playlist.m3u"
 CATALOG_PATH = DATA_DIR / "catalog.json"
 LASTRUN_PATH = DATA_DIR / "last_run.json"
+# catalog.json indexed in memory for /api/catalog/* (summary + pages instead of the whole file)
+CATALOG_CACHE = CatalogCache(CATALOG_PATH)
+LAST_SCHEDULED_PATH = DATA_DIR / "last_scheduled_run.json"
+# ETag / Last-Modified / content hash of the cached playlist.m3u
+PLAYLIST_META_PATH = DATA_DIR / "playlist_meta.json"
+# cProfile output of profiled sync runs (PROFILE_SYNC=1 or sync.profile)
+PROFILES_DIR = DATA_DIR / "profiles"
+# single-flight: one sync/refresh at a time across all processes on this DATA_DIR,
+# and one process (the leader) runs the scheduler
+RUN_LOCK = RunLock(DATA_DIR / ".run.lock")
+LEADER = LeaderLock(DATA_DIR / ".scheduler.lock")
+LEADER_RETRY_SECS = 30
 
 # NEW: playlist snapshot (to detect new playlist items)
+# stored in STATE_DIR/state.db; the JSON file is only read once for migration
+STATE_DIR = DATA_DIR / ".xtream_state"
 PLAYLIST_SNAPSHOT_PATH = DATA_DIR / "playlist_snapshot.json"
 
 DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -77,6 +101,24 @@ def load_config():
                 #   - "strm": create LiveTV/*.strm + poster.png/backdrop.png (current behavior)
                 #   - "m3u":  write a LiveTV.m3u playlist (no per-channel folders/files)
                 "livetv_export": "strm",
+                # trust the .xtream_state manifest for unchanged .strm files (no per-file read),
+                # with a full read-compare "verify" run every verify_interval_hours
+                "trust_manifest": False,
+                "verify_interval_hours": 168,
+                # LiveTV poster/backdrop: "copy" | "hardlink" | "reflink" | "auto"
+                "artwork_mode": "copy",
+                # parallel .strm/artwork writer threads (1 = sequential)
+                "write_workers": 1,
+                # delta sync: only new/changed playlist entries are processed, unchanged ones
+                # are carried over from the manifest (full rebuild: /api/run?full=1)
+                "incremental": False,
+                # process LiveTV / Movies / Series as concurrent pipelines
+                "parallel_pipelines": True,
+                # >1: parse/classify very large playlists in shards on that many processes
+                "parse_workers": 1,
+                # cProfile every sync run into DATA_DIR/profiles (also: env PROFILE_SYNC=1)
+                "profile": False,
+                "profile_keep": PROFILE_KEEP,
             },
             "schedule": {"enabled": False, "daily_time": "03:30"},
             "allow": {
@@ -109,23 +151,157 @@ def build_player_api_url(cfg):
     return f"{base}/player_api.php?username={quote(x['username'])}&password={quote(x['password'])}"
 
 
-def download_playlist(cfg):
+DOWNLOAD_CHUNK = 1 << 20
+
+
+def _gunzip(chunks):
+    """
+    Decodes a gzip body chunk by chunk, every member in order (like gzip.decompress).
+    A truncated or corrupt body raises (ValueError / zlib.error) instead of ending early,
+    so download_playlist never renames a partial playlist over the cached one.
+    """
+    gz, fed = zlib.decompressobj(16 + zlib.MAX_WBITS), False
+    for chunk in chunks:
+        while chunk:
+            fed = True
+            out = gz.decompress(chunk)
+            if out:
+                yield out
+            if not gz.eof:
+                break
+            # member complete: the rest of the chunk starts the next one
+            chunk = gz.unused_data
+            gz, fed = zlib.decompressobj(16 + zlib.MAX_WBITS), False
+    if fed:
+        out = gz.flush()
+        if out:
+            yield out
+        if not gz.eof:
+            raise ValueError("truncated gzip body")
+
+
+def download_playlist(cfg, conditional: bool = False, file_stats: FileStats = NO_FILE_STATS):
+    """
+    Streams the provider playlist to PLAYLIST_PATH (gzip-decoded on the fly).
+    Chunks go to a temp file in DATA_DIR which is atomically renamed over playlist.m3u,
+    so a failed download never leaves a truncated playlist behind.
+
+    conditional=True sends If-None-Match / If-Modified-Since from the last download
+    (same URL only); a 304 keeps the cached playlist.m3u.
+    Returns {"sha256": <hex of the decoded content>, "size": <bytes>, "not_modified": bool}.
+    """
     url = build_m3u_url(cfg)
-    req = UrlReq(url, headers={"User-Agent": "Mozilla/5.0"})
-    with urlopen(req, timeout=90) as r:
-        data = r.read()
-    PLAYLIST_PATH.write_bytes(data)
-    return data.decode("utf-8", errors="replace")
+    source = _sha256(url)
+    headers = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": "gzip"}
+
+    meta = read_playlist_meta()
+    if conditional and meta.get("source") == source and meta.get("sha256") and _playlist_matches_meta(meta):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    req = UrlReq(url, headers=headers)
+    h = hashlib.sha256()
+    size = 0
+    tmp_path = PLAYLIST_PATH.with_name(PLAYLIST_PATH.name + ".part")
+    try:
+        with urlopen(req, timeout=90) as r, tmp_path.open("wb") as f:
+            chunks = iter(lambda: r.read(DOWNLOAD_CHUNK), b"")
+            if (r.headers.get("Content-Encoding") or "").strip().lower() == "gzip":
+                chunks = _gunzip(chunks)
+            for chunk in chunks:
+                f.write(chunk)
+                h.update(chunk)
+                size += len(chunk)
+            etag = r.headers.get("ETag")
+            last_modified = r.headers.get("Last-Modified")
+        os.replace(tmp_path, PLAYLIST_PATH)
+        file_stats.add(written=1)
+    except HTTPError as e:
+        if e.code == 304 and ("If-None-Match" in headers or "If-Modified-Since" in headers):
+            return {"sha256": meta["sha256"], "size": meta.get("size"), "not_modified": True}
+        raise
+    finally:
+        if tmp_path.exists():
+            try:
+                tmp_path.unlink()
+            except Exception:
+                pass
+
+    digest = h.hexdigest()
+    write_playlist_meta(
+        {
+            "source": source,
+            "sha256": digest,
+            "size": size,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": _utc_iso(),
+        }
+    )
+    return {"sha256": digest, "size": size, "not_modified": False}
 
 
-def read_playlist_text():
+def read_playlist_meta() -> dict:
+    if not PLAYLIST_META_PATH.exists():
+        return {}
+    try:
+        meta = json.loads(PLAYLIST_META_PATH.read_text(encoding="utf-8"))
+        return meta if isinstance(meta, dict) else {}
+    except Exception:
+        return {}
+
+
+def write_playlist_meta(meta: dict):
+    PLAYLIST_META_PATH.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _playlist_matches_meta(meta: dict) -> bool:
+    try:
+        return PLAYLIST_PATH.stat().st_size == meta.get("size")
+    except OSError:
+        return False
+
+
+def playlist_sha256() -> str:
+    """Content hash of the cached playlist.m3u (from playlist_meta.json, hashed from disk if unknown)."""
+    meta = read_playlist_meta()
+    if meta.get("sha256") and _playlist_matches_meta(meta):
+        return meta["sha256"]
     if not PLAYLIST_PATH.exists():
         return None
-    return PLAYLIST_PATH.read_text(encoding="utf-8", errors="replace")
+    h = hashlib.sha256()
+    with PLAYLIST_PATH.open("rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_playlist_entries(cfg: dict = None, file_stats: FileStats = NO_FILE_STATS):
+    """
+    Parsed + classified entries of the cached playlist, streamed from disk.
+    sync.parse_workers > 1 parses large playlists in shards on a process pool.
+    """
+    if not PLAYLIST_PATH.exists():
+        return None
+    if cfg is None:
+        cfg = load_config()
+    try:
+        workers = int(cfg.get("sync", {}).get("parse_workers", 1) or 1)
+    except (TypeError, ValueError):
+        workers = 1
+    file_stats.add(read=1)
+    return parse_playlist_file(PLAYLIST_PATH, use_mmap=True, workers=workers)
 
 
-def write_catalog(cat: dict):
+def write_catalog(cat: dict, file_stats: FileStats = NO_FILE_STATS):
     CATALOG_PATH.write_text(json.dumps(cat, ensure_ascii=False, indent=2), encoding="utf-8")
+    file_stats.add(written=1)
+    try:
+        CATALOG_CACHE.set(cat)
+    except Exception:
+        pass
 
 
 def read_catalog():
@@ -150,6 +326,15 @@ def read_last_run():
         return None
 
 
+def read_last_scheduled_run():
+    if not LAST_SCHEDULED_PATH.exists():
+        return None
+    try:
+        return json.loads(LAST_SCHEDULED_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+
 def parse_exp_date(user_info: dict):
     exp = user_info.get("exp_date")
     if not exp or str(exp).strip() in ("0", "-1"):
@@ -188,22 +373,28 @@ def _utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _build_playlist_snapshot(m3u_text: str) -> dict:
+def _build_playlist_snapshot(m3u_text: str = None, entries=None) -> dict:
     """
     Snapshot of ALL playlist items (independent of selection).
     We key by sha256(url) because url is usually unique in Xtream lists.
     """
-    items = {}
-    for it in parse_m3u(m3u_text):
-        attrs = it["attrs"]
-        url = (it.get("url") or "").strip()
-        title = it.get("title") or ""
+    if entries is None:
+        entries = parse_playlist(m3u_text or "")
+    return {"generated_at": _utc_iso(), "items": dict(_snapshot_rows(entries))}
+
+
+def _snapshot_rows(entries):
+    """(key, snapshot item) for every playlist entry."""
+    for e in entries:
+        url = e.url
         if not url:
             continue
 
-        group = _clean_group(attrs.get("group-title") or "Ungrouped")
-        tvg_name = attrs.get("tvg-name") or title
-        kind0 = classify_item(url, group, tvg_name, title)
+        group = _clean_group(e.group)
+        kind0 = e.kind
+        if group != e.group:
+            # classification is group-sensitive -> keep using the cleaned group here
+            kind0 = classify_item(url, group, e.tvg_name, e.title)
 
         # normalize kind to GUI buckets
         if kind0 == "movie":
@@ -217,41 +408,27 @@ def _build_playlist_snapshot(m3u_text: str) -> dict:
         season = None
         episode = None
         if kind == "series":
-            s, se, epn, _ = extract_show_season_episode(tvg_name)
-            show = s or clean_lang_tags(tvg_name)
-            try:
-                season = int(se or 0)
-            except Exception:
-                season = 0
-            try:
-                episode = int(epn or 0)
-            except Exception:
-                episode = 0
+            if e.kind == "series":
+                show, season, episode = e.show, e.season, e.episode
+            else:
+                show, season, episode = _series_fields(e.tvg_name)
 
-        key = _sha256(url)
-        items[key] = {
+        yield e.key, {
             "kind": kind,
             "group": group if kind != "series" else None,
             "show": show if kind == "series" else None,
             "season": season if kind == "series" else None,
             "episode": episode if kind == "series" else None,
-            "title": tvg_name,
+            "title": e.tvg_name,
             "url": url,
         }
-    return {"generated_at": _utc_iso(), "items": items}
 
 
-def _read_snapshot():
-    if not PLAYLIST_SNAPSHOT_PATH.exists():
-        return None
-    try:
-        return json.loads(PLAYLIST_SNAPSHOT_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        return None
-
-
-def _write_snapshot(snap: dict):
-    PLAYLIST_SNAPSHOT_PATH.write_text(json.dumps(snap, ensure_ascii=False, indent=2), encoding="utf-8")
+def _series_fields(tvg_name: str):
+    s, se, epn, _ = extract_show_season_episode(tvg_name)
+    if not s:
+        return clean_lang_tags(tvg_name), 0, 0
+    return s, int(se), int(epn)
 
 
 def _write_changes_files(out_dir: Path, added_items: list, counts: dict):
@@ -308,27 +485,23 @@ def _write_changes_files(out_dir: Path, added_items: list, counts: dict):
         f.write(json.dumps(payload, ensure_ascii=False) + "\n")
 
 
-def track_playlist_changes(m3u_text: str, out_dir: Path):
+def track_playlist_changes(m3u_text: str, out_dir: Path, entries=None):
     """
     Compare current playlist snapshot with previous snapshot.
     Only track ADDED items (not deletes/updates) as requested.
     """
-    old = _read_snapshot()
-    new = _build_playlist_snapshot(m3u_text)
-
-    old_items = (old or {}).get("items") or {}
-    new_items = (new or {}).get("items") or {}
+    if entries is None:
+        entries = parse_playlist(m3u_text or "")
 
-    old_keys = set(old_items.keys())
-    new_keys = set(new_items.keys())
-
-    added_keys = sorted(list(new_keys - old_keys))
+    # set difference happens in SQLite; only the added items come back
+    with StateStore.open(STATE_DIR) as store:
+        store.import_snapshot_json(PLAYLIST_SNAPSHOT_PATH)
+        added = store.replace_snapshot(_snapshot_rows(entries), generated_at=_utc_iso())
 
     added_items = []
     counts = {"livetv": 0, "movies": 0, "series": 0, "total": 0}
 
-    for k in added_keys:
-        it = new_items.get(k) or {}
+    for it in added:
         kind = it.get("kind") or "livetv"
         added_items.append(
             {
@@ -353,74 +526,364 @@ def track_playlist_changes(m3u_text: str, out_dir: Path):
         )
     )
 
-    _write_snapshot(new)
     _write_changes_files(out_dir, added_items, counts)
 
     return {"counts": counts, "added_preview": added_items[:20]}
 
 
 scheduler = BackgroundScheduler()
+jobs = JobRunner()
+
+
+_schedule_state = {"config_mtime": None}
+
+
+def _config_mtime():
+    try:
+        return CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
 
 
 def schedule_job():
-    scheduler.remove_all_jobs()
+    """(Re)creates the daily_sync job from config.json - in the leader process only."""
+    try:
+        scheduler.remove_job("daily_sync")
+    except Exception:
+        pass
+    if not LEADER.is_leader:
+        return
+    _schedule_state["config_mtime"] = _config_mtime()
     cfg = load_config()
     sch = cfg.get("schedule", {})
     if not sch.get("enabled"):
         return
     hh, mm = sch.get("daily_time", "03:30").split(":")
     trigger = CronTrigger(hour=int(hh), minute=int(mm))
-    scheduler.add_job(lambda: do_sync_run("scheduled"), trigger, id="daily_sync", replace_existing=True)
+    scheduler.add_job(scheduled_sync_run, trigger, id="daily_sync", replace_existing=True)
+
+
+def leader_tick():
+    """
+    Runs in every process: takes over the scheduler when no other process holds the
+    leader lock (e.g. the old leader exited); the leader picks up schedule changes
+    saved through another worker.
+    """
+    if not LEADER.is_leader:
+        if LEADER.try_acquire():
+            schedule_job()
+        return
+    if _config_mtime() != _schedule_state["config_mtime"]:
+        schedule_job()
+
 
+def scheduled_sync_run():
+    """
+    Scheduler entry: submitted like a manual run (attaches to a running one),
+    records duration and outcome (also failures) for /api/metrics.
+    """
+    t0 = time.time()
+    rec = {"time": datetime.now().isoformat(timespec="seconds"), "ok": False}
+    try:
+        job, attached = submit_run("scheduled")
+        job.wait()
+        rec["job"] = job.id
+        rec["attached"] = attached
+        if job.status == "done":
+            payload = job.result or {}
+            rec.update(ok=True, result=payload.get("result"), phases=payload.get("phases"))
+        else:
+            rec["error"] = job.error
+    finally:
+        rec["finished_at"] = int(time.time())
+        rec["duration_seconds"] = round(time.time() - t0, 3)
+        try:
+            LAST_SCHEDULED_PATH.write_text(json.dumps(rec, ensure_ascii=False, indent=2), encoding="utf-8")
+        except Exception:
+            pass
 
-def do_sync_run(reason: str):
+
+def submit_run(reason: str, force: bool = False, verify: bool = False, full: bool = False):
+    """
+    Queues a sync run as background job -> (job, attached). A run with the same options
+    and the same allow/sync config that is already queued or running is joined instead.
+    """
     cfg = load_config()
+    out_dir = Path(cfg["paths"].get("out_dir") or str(OUTPUT_DIR)).resolve()
+    params = {"force": force, "verify": verify, "full": full}
+    key = ("run", force, verify, full, _sync_config_sha256(cfg, out_dir))
+    return jobs.submit(
+        "run",
+        lambda job: do_sync_run(reason, progress=job.on_progress, **params),
+        {"reason": reason, **params},
+        key=key,
+    )
+
+
+def submit_refresh():
+    """Queues a playlist refresh as background job -> (job, attached)."""
+
+    def job_fn(job):
+        cat, phases = do_refresh(job.on_progress)
+        # the catalog itself stays on disk (/api/catalog_cached)
+        return {
+            "totals": {k: (cat.get(k) or {}).get("total", 0) for k in ("livetv", "movies", "series")},
+            "phases": phases,
+        }
+
+    return jobs.submit("refresh", job_fn, key=("refresh",))
+
+
+def _lock_waiter(progress):
+    """on_wait callback for RUN_LOCK: shows the job as waiting for another process."""
+
+    def on_wait(holder):
+        if progress is not None:
+            progress({"phase": "wait", "done": 0, "total": None, "elapsed": 0})
+
+    return on_wait
+
+
+# sync options that change what a run writes; the others (workers, trust/verify, profiling, ...)
+# only change how it gets there and must not defeat the unchanged-input short-circuit
+OUTPUT_SYNC_KEYS = ("sync_delete", "prune_sidecars", "livetv_export", "artwork_mode")
 
+
+def _sync_config_sha256(cfg: dict, out_dir: Path) -> str:
+    """
+    Hash of everything besides the playlist that decides the sync output: allow-list,
+    output-affecting sync options and the picon set (names, sizes, mtimes of out_dir/picons).
+    """
     sync_cfg = cfg.get("sync", {})
-    auto_refresh = bool(sync_cfg.get("auto_refresh_playlist", True))
+    _, picons = scan_picon_dir(out_dir / "picons")
+    return _sha256(
+        json.dumps(
+            {
+                "allow": cfg.get("allow", {}),
+                "sync": {k: sync_cfg.get(k) for k in OUTPUT_SYNC_KEYS},
+                "out_dir": str(out_dir),
+                "picons": picons,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+    )
 
-    if auto_refresh:
-        m3u_text = download_playlist(cfg)
-    else:
-        m3u_text = read_playlist_text() or download_playlist(cfg)
 
-    # keep catalog cached so GUI can work without re-download
+def _invalidate_last_run_input():
+    """Forget the input fingerprint of the last run, so the next run cannot short-circuit."""
+    last = read_last_run()
+    if last and last.get("input"):
+        last.pop("input", None)
+        write_last_run(last)
+
+
+def _output_settled(out_dir: Path) -> bool:
+    """
+    state.db exists and its write-ahead journal is empty, i.e. the last run into out_dir
+    committed. A killed run leaves its journal (and no last_run.json) behind: the next run
+    must finish that work instead of short-circuiting on the previous run's input.
+    """
+    store = StateStore.open_readonly(out_dir / ".xtream_state")
+    if store is None:
+        return False
     try:
-        cat = build_catalog(m3u_text)
-        write_catalog(cat)
+        return store.journal_count() == 0
     except Exception:
-        pass
+        return False
+    finally:
+        store.close()
+
+
+def _reset_manifest_trust(out_dir: Path):
+    """
+    Output files were removed behind the manifest's back: verified_at 0 makes the next run
+    a verify run that compares every file again instead of trusting the manifest, and
+    without a delta fingerprint nothing is carried over (full rebuild).
+    """
+    state_dir = out_dir / ".xtream_state"
+    if not state_db_exists(state_dir):
+        return
+    with StateStore.open(state_dir) as store:
+        store.set_meta("verified_at", 0)
+        store.set_meta("delta_fingerprint", None)
 
-    out_dir = Path(cfg["paths"].get("out_dir") or str(OUTPUT_DIR)).resolve()
-    out_dir.mkdir(parents=True, exist_ok=True)
 
-    # NEW: track playlist changes globally (independent of selection)
+def _finish_payload(payload: dict, timer: RunTimer, t0: float) -> dict:
+    """Adds the phase timings / total duration and stores the run as last_run.json."""
+    payload["phases"] = timer.phases
+    payload["finished_at"] = int(time.time())
+    payload["duration_seconds"] = round(time.time() - t0, 3)
+    write_last_run(payload)
+    return payload
+
+
+def _record_failed_run(reason: str, timer: RunTimer, t0: float, exc: Exception):
+    """
+    Stores a failed run as last_run.json (ok False, error, phases so far), so /api/metrics
+    and the status do not keep showing the previous success. Without "input" it can never
+    short-circuit or be coalesced into the next run.
+    """
+    payload = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "reason": reason,
+        "ok": False,
+        "error": f"{type(exc).__name__}: {exc}",
+    }
     try:
-        track_playlist_changes(m3u_text, out_dir)
+        _finish_payload(payload, timer, t0)
     except Exception:
         pass
 
-    # STRM sync still runs (selection-based), but changes UI is now playlist-based
-    res = run_sync(
-        m3u_text=m3u_text,
-        out_dir=out_dir,
-        allow_cfg=cfg.get("allow", {}),
-        sync_delete=bool(sync_cfg.get("sync_delete", True)),
-        prune_sidecars=bool(sync_cfg.get("prune_sidecars", False)),
-        # NEW: LiveTV export mode (sync_core.py will implement behavior)
-        livetv_export=str(sync_cfg.get("livetv_export", "strm")),
-    )
 
-    payload = {"time": datetime.now().isoformat(timespec="seconds"), "reason": reason, "result": res}
+def profiling_enabled(cfg: dict) -> bool:
+    if (os.getenv("PROFILE_SYNC") or "").strip().lower() in ("1", "true", "yes"):
+        return True
+    return bool(cfg.get("sync", {}).get("profile", False))
+
+
+def do_sync_run(reason: str, force: bool = False, verify: bool = False, full: bool = False, progress=None):
+    """
+    One sync run under RUN_LOCK. If it had to wait for a run of another process and that
+    run finished after this call arrived with the same allow/sync config, its payload is
+    returned instead of running again (not for force/verify/full).
+    progress: optional RunTimer listener (phase progress events, e.g. Job.on_progress).
+    """
+    arrived = time.time()
+    with RUN_LOCK.hold({"kind": "run", "reason": reason}, on_wait=_lock_waiter(progress)) as waited:
+        if waited and not (force or verify or full):
+            last = read_last_run()
+            cfg = load_config()
+            out_dir = Path(cfg["paths"].get("out_dir") or str(OUTPUT_DIR)).resolve()
+            if (
+                last
+                and (last.get("finished_at") or 0) >= arrived
+                and (last.get("input") or {}).get("config_sha256") == _sync_config_sha256(cfg, out_dir)
+            ):
+                return {**last, "coalesced": True}
+        return _sync_run_maybe_profiled(reason, force=force, verify=verify, full=full, progress=progress)
+
+
+def _sync_run_maybe_profiled(reason: str, force: bool = False, verify: bool = False, full: bool = False, progress=None):
+    cfg = load_config()
+    if not profiling_enabled(cfg):
+        return _sync_run(reason, force=force, verify=verify, full=full, progress=progress)
+
+    try:
+        keep = int(cfg.get("sync", {}).get("profile_keep", PROFILE_KEEP))
+    except (TypeError, ValueError):
+        keep = PROFILE_KEEP
+    payload, name = run_profiled(
+        lambda: _sync_run(reason, force=force, verify=verify, full=full, progress=progress),
+        PROFILES_DIR,
+        label=reason,
+        keep=keep,
+        top_n=PROFILE_TOP_N,
+    )
+    payload["profile"] = name
     write_last_run(payload)
     return payload
 
 
+def _sync_run(reason: str, force: bool = False, verify: bool = False, full: bool = False, progress=None):
+    t0 = time.time()
+    timer = RunTimer(progress)
+    try:
+        cfg = load_config()
+        # a verify run re-reads every .strm, a full run rebuilds everything -> never short-circuit
+        force = force or verify or full
+
+        sync_cfg = cfg.get("sync", {})
+        auto_refresh = bool(sync_cfg.get("auto_refresh_playlist", True))
+
+        out_dir = Path(cfg["paths"].get("out_dir") or str(OUTPUT_DIR)).resolve()
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        if auto_refresh or not PLAYLIST_PATH.exists() or PLAYLIST_PATH.stat().st_size == 0:
+            with timer.phase("download") as ph:
+                dl = download_playlist(cfg, conditional=not force, file_stats=timer.files)
+                ph["bytes"] = dl.get("size")
+                ph["not_modified"] = dl.get("not_modified")
+
+        # unchanged playlist + unchanged allow/sync config -> nothing to do
+        with timer.phase("check"):
+            run_input = {"playlist_sha256": playlist_sha256(), "config_sha256": _sync_config_sha256(cfg, out_dir)}
+        last = read_last_run()
+        if (
+            not force
+            and last
+            and last.get("input") == run_input
+            and _output_settled(out_dir)
+        ):
+            prev = last.get("result") or {}
+            res = {
+                "unchanged": True,
+                "created": 0,
+                "updated": 0,
+                "skipped_not_allowed": prev.get("skipped_not_allowed", 0),
+                "deleted": 0,
+                "sidecars_deleted": 0,
+                "livetv_export": prev.get("livetv_export", str(sync_cfg.get("livetv_export", "strm"))),
+            }
+            payload = {"time": datetime.now().isoformat(timespec="seconds"), "reason": reason, "result": res, "input": run_input}
+            return _finish_payload(payload, timer, t0)
+
+        # parse + classify once (streamed from disk); catalog, snapshot and sync share the result
+        with timer.phase("parse") as ph:
+            entries = read_playlist_entries(cfg, timer.files) or []
+            ph["items"] = len(entries)
+
+        # keep catalog cached so GUI can work without re-download
+        with timer.phase("catalog", len(entries)):
+            try:
+                cat = build_catalog(entries=entries)
+                write_catalog(cat, timer.files)
+            except Exception:
+                pass
+
+        # NEW: track playlist changes globally (independent of selection)
+        with timer.phase("changes", len(entries)):
+            try:
+                track_playlist_changes(None, out_dir, entries=entries)
+            except Exception:
+                pass
+
+        # STRM sync still runs (selection-based), but changes UI is now playlist-based
+        ph = timer.begin("sync", len(entries))
+        res = run_sync(
+            m3u_text=None,
+            out_dir=out_dir,
+            allow_cfg=cfg.get("allow", {}),
+            sync_delete=bool(sync_cfg.get("sync_delete", True)),
+            prune_sidecars=bool(sync_cfg.get("prune_sidecars", False)),
+            # NEW: LiveTV export mode (sync_core.py will implement behavior)
+            livetv_export=str(sync_cfg.get("livetv_export", "strm")),
+            entries=entries,
+            trust_manifest=bool(sync_cfg.get("trust_manifest", False)),
+            verify=verify,
+            verify_interval_hours=float(sync_cfg.get("verify_interval_hours", 168) or 0),
+            artwork_mode=str(sync_cfg.get("artwork_mode", "copy")),
+            write_workers=int(sync_cfg.get("write_workers", 1) or 1),
+            incremental=bool(sync_cfg.get("incremental", False)) and not full,
+            parallel=bool(sync_cfg.get("parallel_pipelines", True)),
+            timer=timer,
+        )
+        timer.end(ph)
+
+        payload = {"time": datetime.now().isoformat(timespec="seconds"), "reason": reason, "result": res, "input": run_input}
+        return _finish_payload(payload, timer, t0)
+    except Exception as e:
+        _record_failed_run(reason, timer, t0, e)
+        raise
+
+
 @app.on_event("startup")
 def on_startup():
     if not scheduler.running:
         scheduler.start()
+    LEADER.try_acquire()
     schedule_job()
+    scheduler.add_job(leader_tick, "interval", seconds=LEADER_RETRY_SECS, id="leader_tick", replace_existing=True)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -444,42 +907,165 @@ async def api_set_config(request: Request):
     return JSONResponse({"ok": True})
 
 
-@app.post("/api/refresh")
-def api_refresh(request: Request):
-    require_auth(request)
+def _flag(request: Request, name: str) -> bool:
+    return (request.query_params.get(name) or "").lower() in ("1", "true", "yes")
+
+
+def do_refresh(progress=None):
+    """
+    Playlist download + catalog + change tracking (no sync) under RUN_LOCK.
+    Returns (catalog, phases); after waiting for another process whose run/refresh
+    rewrote the catalog in the meantime, that catalog is returned as it is.
+    """
+    arrived = time.time()
+    with RUN_LOCK.hold({"kind": "refresh"}, on_wait=_lock_waiter(progress)) as waited:
+        if waited:
+            try:
+                fresh = CATALOG_PATH.stat().st_mtime >= arrived
+            except OSError:
+                fresh = False
+            cat = read_catalog() if fresh else None
+            if cat:
+                return cat, []
+        return _refresh(progress)
+
+
+def _refresh(progress=None):
+    timer = RunTimer(progress)
     cfg = load_config()
-    text = download_playlist(cfg)
-    cat = build_catalog(text)
-    write_catalog(cat)
+    with timer.phase("download"):
+        download_playlist(cfg, conditional=True, file_stats=timer.files)
+    with timer.phase("parse") as ph:
+        entries = read_playlist_entries(cfg, timer.files) or []
+        ph["items"] = len(entries)
+    with timer.phase("catalog", len(entries)):
+        cat = build_catalog(entries=entries)
+        write_catalog(cat, timer.files)
 
     # NEW: track playlist changes also on refresh
     out_dir = Path(cfg["paths"].get("out_dir") or str(OUTPUT_DIR)).resolve()
     out_dir.mkdir(parents=True, exist_ok=True)
-    try:
-        track_playlist_changes(text, out_dir)
-    except Exception:
-        pass
+    with timer.phase("changes", len(entries)):
+        try:
+            track_playlist_changes(None, out_dir, entries=entries)
+        except Exception:
+            pass
+
+    return cat, timer.phases
+
+
+@app.post("/api/refresh")
+def api_refresh(request: Request):
+    """Background job (202 + job); ?wait=1 refreshes inside the request and returns the catalog summary."""
+    require_auth(request)
+    job, attached = submit_refresh()
+    if _flag(request, "wait"):
+        job.wait()
+        if job.status != "done":
+            return JSONResponse({"ok": False, "error": job.error}, status_code=500)
+        return api_catalog_cached(request)
+    return JSONResponse({"ok": True, "job": job.snapshot(), "attached": attached}, status_code=202)
+
 
-    return JSONResponse({"ok": True, "catalog": cat})
+def _catalog_index():
+    return CATALOG_CACHE.get(read_catalog)
+
+
+def _no_catalog():
+    return JSONResponse({"ok": False, "error": "No cached catalog yet. Click 'Playlist laden' once."}, status_code=400)
+
+
+def _page_params(request: Request):
+    try:
+        page = max(1, int(request.query_params.get("page") or 1))
+        page_size = min(PAGE_SIZE_MAX, max(1, int(request.query_params.get("page_size") or PAGE_SIZE_DEFAULT)))
+    except (TypeError, ValueError):
+        page, page_size = 1, PAGE_SIZE_DEFAULT
+    return page, page_size, (request.query_params.get("q") or "").strip()
 
 
 @app.get("/api/catalog")
 def api_catalog(request: Request):
+    """Rebuilds the catalog from the cached playlist; returns the summary (?full=1: whole catalog)."""
     require_auth(request)
-    text = read_playlist_text()
-    if not text:
+    entries = read_playlist_entries(load_config())
+    if not entries:
         return JSONResponse({"ok": False, "error": "No playlist cached. Click 'Playlist laden' first."}, status_code=400)
-    cat = build_catalog(text)
-    return JSONResponse({"ok": True, "catalog": cat})
+    cat = build_catalog(entries=entries)
+    write_catalog(cat)
+    if _flag(request, "full"):
+        return JSONResponse({"ok": True, "catalog": cat})
+    return api_catalog_cached(request)
 
 
 @app.get("/api/catalog_cached")
 def api_catalog_cached(request: Request):
+    """
+    Catalog summary: categories / shows with item counts (shows also season counts)
+    and the number of names selected in the saved allow-list. ?full=1: whole catalog.json.
+    """
+    require_auth(request)
+    if _flag(request, "full"):
+        cat = read_catalog()
+        if not cat:
+            return _no_catalog()
+        return JSONResponse({"ok": True, "catalog": cat})
+    index = _catalog_index()
+    if index is None:
+        return _no_catalog()
+    return JSONResponse({"ok": True, "catalog": index.summary(load_config().get("allow"))})
+
+
+@app.get("/api/catalog/items")
+def api_catalog_items(request: Request):
+    """
+    One page of items: ?kind=livetv|movies&category=<name> or ?kind=series&show=<name>&season=01,
+    optional page, page_size (max PAGE_SIZE_MAX), q (name contains, case-insensitive).
+    """
     require_auth(request)
-    cat = read_catalog()
-    if not cat:
-        return JSONResponse({"ok": False, "error": "No cached catalog yet. Click 'Playlist laden' once."}, status_code=400)
-    return JSONResponse({"ok": True, "catalog": cat})
+    index = _catalog_index()
+    if index is None:
+        return _no_catalog()
+    qp = request.query_params
+    page, page_size, q = _page_params(request)
+    if qp.get("kind") == "series":
+        res = index.episodes(qp.get("show") or "", qp.get("season") or "", page, page_size, q)
+    else:
+        res = index.items(qp.get("kind") or "", qp.get("category") or "", page, page_size, q)
+    if res is None:
+        return JSONResponse({"ok": False, "error": "unknown category/show/season"}, status_code=404)
+    return JSONResponse({"ok": True, **res})
+
+
+@app.get("/api/catalog/seasons")
+def api_catalog_seasons(request: Request):
+    """Seasons of ?show=<name> with episode counts."""
+    require_auth(request)
+    index = _catalog_index()
+    if index is None:
+        return _no_catalog()
+    seasons = index.seasons(request.query_params.get("show") or "")
+    if seasons is None:
+        return JSONResponse({"ok": False, "error": "unknown show"}, status_code=404)
+    return JSONResponse({"ok": True, "seasons": seasons})
+
+
+@app.get("/api/catalog/names")
+def api_catalog_names(request: Request):
+    """
+    All item names of ?kind=livetv|movies&category=<name> or ?kind=series&show=<name> (selection state);
+    without category/show: of the whole kind.
+    """
+    require_auth(request)
+    index = _catalog_index()
+    if index is None:
+        return _no_catalog()
+    qp = request.query_params
+    kind = qp.get("kind") or ""
+    names = index.names(kind, qp.get("show") if kind == "series" else qp.get("category"))
+    if names is None:
+        return JSONResponse({"ok": False, "error": "unknown category/show"}, status_code=404)
+    return JSONResponse({"ok": True, "names": names})
 
 
 @app.get("/api/changes_latest")
@@ -499,9 +1085,113 @@ def api_changes_latest(request: Request):
 
 @app.post("/api/run")
 def api_run(request: Request):
+    """
+    Starts the sync as background job (202 + job, progress: /api/jobs/<id>/events).
+    ?force=1 ignores the unchanged-playlist short-circuit, ?verify=1 also re-reads every .strm,
+    ?full=1 skips the delta sync and rebuilds from the whole playlist,
+    ?wait=1 runs inside the request and returns the run payload (scripts).
+    """
+    require_auth(request)
+    job, attached = submit_run("manual", force=_flag(request, "force"), verify=_flag(request, "verify"), full=_flag(request, "full"))
+    if _flag(request, "wait"):
+        job.wait()
+        if job.status != "done":
+            return JSONResponse({"ok": False, "error": job.error}, status_code=500)
+        return JSONResponse({"ok": True, "run": job.result})
+    return JSONResponse({"ok": True, "job": job.snapshot(), "attached": attached}, status_code=202)
+
+
+@app.get("/api/jobs")
+def api_jobs(request: Request):
+    """Known jobs, newest first (?active=1: only queued/running)."""
     require_auth(request)
-    payload = do_sync_run("manual")
-    return JSONResponse({"ok": True, "run": payload})
+    lst = jobs.active() if _flag(request, "active") else jobs.list()
+    return JSONResponse({"ok": True, "jobs": [j.snapshot(with_result=False) for j in reversed(lst)]})
+
+
+@app.get("/api/jobs/{job_id}")
+def api_job(request: Request, job_id: str):
+    require_auth(request)
+    job = jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"ok": False, "error": "unknown job"}, status_code=404)
+    return JSONResponse({"ok": True, "job": job.snapshot()})
+
+
+@app.get("/api/jobs/{job_id}/events")
+def api_job_events(request: Request, job_id: str):
+    """Server-Sent Events: "progress" (phase, done, total, rate, eta) until "done"."""
+    require_auth(request)
+    job = jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"ok": False, "error": "unknown job"}, status_code=404)
+    return StreamingResponse(
+        sse_events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+PLAN_PAGE_SIZE_MAX = 1000
+
+
+def do_plan(cfg: dict, allow_cfg: dict = None, livetv_export: str = None):
+    """Dry run of the sync on the cached playlist: writes nothing, reads no output files."""
+    sync_cfg = cfg.get("sync", {})
+    out_dir = Path(cfg["paths"].get("out_dir") or str(OUTPUT_DIR)).resolve()
+    entries = read_playlist_entries(cfg) or []
+    return plan_sync(
+        out_dir=out_dir,
+        allow_cfg=cfg.get("allow", {}) if allow_cfg is None else allow_cfg,
+        entries=entries,
+        sync_delete=bool(sync_cfg.get("sync_delete", True)),
+        livetv_export=livetv_export or str(sync_cfg.get("livetv_export", "strm")),
+    )
+
+
+@app.post("/api/plan")
+async def api_plan(request: Request):
+    """
+    Body (all optional): {"allow": {...}, "livetv_export": "strm"|"m3u",
+    "op": "create"|"update"|"delete", "page": 1, "page_size": 100}.
+    Without "allow" the saved allow-list is planned, so unsaved GUI selections can be previewed.
+    Counts are per target file (see plan_sync), not per write like the run's result.
+    """
+    require_auth(request)
+    cfg = load_config()
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+
+    if not PLAYLIST_PATH.exists():
+        return JSONResponse({"ok": False, "error": "No playlist cached. Click 'Playlist laden' first."}, status_code=409)
+
+    allow_cfg = body.get("allow") if isinstance(body.get("allow"), dict) else None
+    plan = await run_in_threadpool(do_plan, cfg, allow_cfg, body.get("livetv_export"))
+
+    ops = plan["ops"]
+    if body.get("op"):
+        ops = [o for o in ops if o["op"] == body["op"]]
+    try:
+        page = max(1, int(body.get("page") or 1))
+        page_size = min(PLAN_PAGE_SIZE_MAX, max(1, int(body.get("page_size") or 100)))
+    except (TypeError, ValueError):
+        page, page_size = 1, 100
+    start = (page - 1) * page_size
+
+    return JSONResponse(
+        {
+            "ok": True,
+            "counts": plan["counts"],
+            "total": len(ops),
+            "page": page,
+            "page_size": page_size,
+            "ops": ops[start:start + page_size],
+        }
+    )
 
 
 @app.get("/api/status")
@@ -534,10 +1224,54 @@ def api_status(request: Request):
             "has_changes_latest": has_changes,
             "changes_latest_path": str(changes_path),
             "changes_latest": changes,
+            "scheduler_leader": LEADER.is_leader,
+            "run_lock": RUN_LOCK.holder() or None,
         }
     )
 
 
+@app.get("/api/metrics")
+def api_metrics(request: Request):
+    """Prometheus text format: last run + its phases, last scheduled run."""
+    require_auth(request)
+    return PlainTextResponse(
+        render_prometheus(read_last_run(), read_last_scheduled_run()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@app.get("/api/profiles")
+def api_profiles(request: Request):
+    require_auth(request)
+    profiles = []
+    for name in profile_names(PROFILES_DIR):
+        p = profile_path(PROFILES_DIR, name, ".prof")
+        profiles.append(
+            {
+                "name": name,
+                "size": p.stat().st_size if p else None,
+                "summary": f"/api/profiles/{name}/summary",
+                "download": f"/api/profiles/{name}/prof",
+            }
+        )
+    return JSONResponse({"ok": True, "enabled": profiling_enabled(load_config()), "profiles": profiles})
+
+
+@app.get("/api/profiles/{name}/{kind}")
+def api_profile_file(request: Request, name: str, kind: str):
+    """kind "summary" = top-N text, "prof" = raw pstats dump; name "latest" = newest profile."""
+    require_auth(request)
+    if name == "latest":
+        names = profile_names(PROFILES_DIR)
+        name = names[0] if names else ""
+    ext = {"summary": ".txt", "prof": ".prof"}.get(kind)
+    p = profile_path(PROFILES_DIR, name, ext) if ext else None
+    if p is None:
+        return JSONResponse({"ok": False, "error": "profile not found"}, status_code=404)
+    media_type = "text/plain; charset=utf-8" if ext == ".txt" else "application/octet-stream"
+    return FileResponse(str(p), media_type=media_type, filename=p.name)
+
+
 @app.post("/api/cleanup")
 async def api_cleanup(request: Request):
     require_auth(request)
@@ -570,6 +1304,12 @@ async def api_cleanup(request: Request):
             except Exception:
                 pass
 
+    # output was removed -> next run must not short-circuit on an unchanged playlist
+    # and must not trust the manifest, which still lists the removed files
+    if deleted:
+        _invalidate_last_run_input()
+        _reset_manifest_trust(out_dir)
+
     if include_state:
         state_dir = out_dir / ".xtream_state"
         if state_dir.exists():
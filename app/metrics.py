@@ -0,0 +1,265 @@
+# metrics.py - per-phase run timing (wall time, items/s, file I/O, peak RSS) + Prometheus text format
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+
+# -------------------------
+# File I/O counters
+# -------------------------
+class FileStats:
+    """
+    Counters of files stat'ed / read / written / deleted (thread-safe). Each RunTimer owns
+    one (timer.files), the I/O helpers count into the one they are handed.
+    """
+
+    FIELDS = ("stat", "read", "written", "deleted")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._c = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, stat: int = 0, read: int = 0, written: int = 0, deleted: int = 0):
+        with self._lock:
+            c = self._c
+            c["stat"] += stat
+            c["read"] += read
+            c["written"] += written
+            c["deleted"] += deleted
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._c)
+
+
+class _NoFileStats(FileStats):
+    def add(self, stat: int = 0, read: int = 0, written: int = 0, deleted: int = 0):
+        pass
+
+
+# default of the I/O helpers when called outside a timed run (counts nothing)
+NO_FILE_STATS = _NoFileStats()
+
+
+# -------------------------
+# Peak RSS
+# -------------------------
+def _proc_status_kb(field: str):
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for ln in f:
+                if ln.startswith(field + ":"):
+                    return int(ln.split()[1])
+    except Exception:
+        pass
+    return None
+
+
+def current_rss_bytes():
+    """Current resident set size (Linux), else None."""
+    kb = _proc_status_kb("VmRSS")
+    return kb * 1024 if kb is not None else None
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size since process start (VmHWM on Linux)."""
+    kb = _proc_status_kb("VmHWM")
+    if kb is not None:
+        return kb * 1024
+    try:
+        import resource
+
+        r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return r if sys.platform == "darwin" else r * 1024
+    except Exception:
+        return 0
+
+
+# -------------------------
+# Phase timer
+# -------------------------
+class RunTimer:
+    """
+    Records one entry per phase: wall time, items, items/s, file I/O deltas (of self.files)
+    and peak RSS. Phases nest ("sync" -> "sync.pipelines"); an outer phase reports the max
+    peak RSS of everything it contains. Phases are expected to run on one thread at a time
+    (work inside a phase may use any number of threads).
+
+    Peak RSS without touching the process-wide high-water mark: if VmHWM grew during a
+    phase, the new process peak was reached in it and is exact; otherwise the phase's peak
+    is the highest RSS sampled at phase start/end and on every advance().
+
+    listener(event) is called on every phase start/end and advance() with
+    {"phase", "done", "total", "elapsed"} of the innermost open phase.
+    """
+
+    def __init__(self, listener=None):
+        self.phases = []
+        self.listener = listener
+        self.files = FileStats()
+        self._stack = []  # [name, sampled peak, rec, items done, VmHWM at start]
+        self._open = {}  # id(rec) -> (frame, file stats, start)
+        self._lock = threading.Lock()
+
+    def _notify(self, frame, t0: float):
+        if self.listener is None:
+            return
+        try:
+            self.listener({
+                "phase": frame[2]["name"],
+                "done": frame[3],
+                "total": frame[2].get("items"),
+                "elapsed": time.perf_counter() - t0,
+            })
+        except Exception:
+            pass
+
+    def advance(self, n: int = 1):
+        """Progress inside the innermost open phase (callable from any thread)."""
+        with self._lock:
+            if not self._stack:
+                return
+            frame = self._stack[-1]
+            frame[3] += n
+            self._sample()
+            t0 = self._open[id(frame[2])][2]
+        self._notify(frame, t0)
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        if rss is None:
+            rss = peak_rss_bytes()
+        for frame in self._stack:
+            frame[1] = max(frame[1], rss)
+
+    def begin(self, name: str, items: int = None) -> dict:
+        """Starts a phase; returns its record (set rec["items"] before end())."""
+        with self._lock:
+            full = ".".join([f[0] for f in self._stack] + [name])
+            rec = {"name": full, "items": items}
+            frame = [name, 0, rec, 0, peak_rss_bytes()]
+            self._stack.append(frame)
+            self._sample()
+            # listed in start order (outer phases before the phases they contain)
+            self.phases.append(rec)
+            t0 = time.perf_counter()
+            self._open[id(rec)] = (frame, self.files.snapshot(), t0)
+        self._notify(frame, t0)
+        return rec
+
+    def end(self, rec: dict):
+        frame, io0, t0 = self._open[id(rec)]
+        dt = time.perf_counter() - t0
+        if rec.get("items") is not None:
+            frame[3] = rec["items"]
+        self._notify(frame, t0)
+        del self._open[id(rec)]
+        io1 = self.files.snapshot()
+        with self._lock:
+            self._sample()
+            hwm = peak_rss_bytes()
+            peak = hwm if hwm > frame[4] else frame[1]
+            self._stack.remove(frame)
+            # a nested phase that set the process peak raises the parent's peak to it
+            if self._stack:
+                self._stack[-1][1] = max(self._stack[-1][1], peak)
+        rec["seconds"] = round(dt, 4)
+        n = rec.get("items")
+        rec["items_per_s"] = round(n / dt, 1) if n and dt > 0 else None
+        for k in FileStats.FIELDS:
+            rec[f"files_{k}"] = io1[k] - io0[k]
+        rec["peak_rss_bytes"] = peak
+        return rec
+
+    @contextmanager
+    def phase(self, name: str, items: int = None):
+        """
+        with timer.phase("parse") as rec:
+            ...
+            rec["items"] = len(entries)
+        """
+        rec = self.begin(name, items)
+        try:
+            yield rec
+        finally:
+            self.end(rec)
+
+
+# -------------------------
+# Prometheus text format
+# -------------------------
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(v):
+    if v is None:
+        return None
+    if isinstance(v, bool):
+        return 1.0 if v else 0.0
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+class _Writer:
+    """Collects samples per metric family (the text format wants each family in one block)."""
+
+    def __init__(self):
+        self.families = {}  # name -> [help line, type line, samples...]
+
+    def metric(self, name: str, mtype: str, help_text: str, value, labels: dict = None):
+        v = _num(value)
+        if v is None:
+            return
+        fam = self.families.get(name)
+        if fam is None:
+            fam = self.families[name] = [f"# HELP {name} {help_text}", f"# TYPE {name} {mtype}"]
+        lbl = ""
+        if labels:
+            lbl = "{" + ",".join(f'{k}="{_esc(v2)}"' for k, v2 in labels.items()) + "}"
+        fam.append(f"{name}{lbl} {int(v) if v.is_integer() else v}")
+
+    def text(self) -> str:
+        return "".join(ln + "\n" for fam in self.families.values() for ln in fam)
+
+
+RESULT_COUNTS = ("created", "updated", "deleted", "skipped_not_allowed", "carried_over")
+
+
+def _run_metrics(w: _Writer, prefix: str, run: dict, what: str):
+    if not run:
+        return
+    w.metric(f"{prefix}_timestamp_seconds", "gauge", f"Unix time the {what} finished.", run.get("finished_at"))
+    w.metric(f"{prefix}_duration_seconds", "gauge", f"Wall time of the {what}.", run.get("duration_seconds"))
+    w.metric(f"{prefix}_success", "gauge", f"1 if the {what} succeeded.", run.get("ok", True))
+    w.metric(f"{prefix}_unchanged", "gauge", f"1 if the {what} was skipped (playlist and config unchanged).",
+             (run.get("result") or {}).get("unchanged", False))
+    res = run.get("result") or {}
+    for k in RESULT_COUNTS:
+        w.metric(f"{prefix}_items", "gauge", f"Items per result of the {what}.", res.get(k), {"result": k})
+
+
+def render_prometheus(last_run: dict, last_scheduled: dict) -> str:
+    """Text exposition format (version 0.0.4) of the last run, its phases and the last scheduled run."""
+    w = _Writer()
+    _run_metrics(w, "xtream_last_run", last_run, "last sync run")
+    if last_run:
+        reason = last_run.get("reason") or ""
+        w.metric("xtream_last_run_info", "gauge", "Reason of the last sync run.", 1, {"reason": reason})
+        for p in last_run.get("phases") or []:
+            lbl = {"phase": p.get("name")}
+            w.metric("xtream_phase_duration_seconds", "gauge", "Wall time per phase of the last run.", p.get("seconds"), lbl)
+            w.metric("xtream_phase_items", "gauge", "Items processed per phase of the last run.", p.get("items"), lbl)
+            w.metric("xtream_phase_items_per_second", "gauge", "Throughput per phase of the last run.", p.get("items_per_s"), lbl)
+            for k in FileStats.FIELDS:
+                w.metric("xtream_phase_files", "gauge", "Files stat'ed/read/written/deleted per phase of the last run.",
+                         p.get(f"files_{k}"), {**lbl, "op": k})
+            w.metric("xtream_phase_peak_rss_bytes", "gauge", "Peak resident memory per phase of the last run.", p.get("peak_rss_bytes"), lbl)
+    _run_metrics(w, "xtream_last_scheduled_run", last_scheduled, "last scheduled run")
+    rss = _proc_status_kb("VmRSS")
+    w.metric("xtream_process_resident_memory_bytes", "gauge", "Current resident memory of the process.",
+             rss * 1024 if rss is not None else None)
+    return w.text()
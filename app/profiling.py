@@ -0,0 +1,112 @@
+# profiling.py - opt-in cProfile of sync runs (DATA_DIR/profiles: <stamp>_<label>.prof + .txt summary)
+import io
+import re
+import time
+import pstats
+import cProfile
+import sys
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_KEEP = 10
+PROFILE_TOP_N = 40
+
+_NAME_RE = re.compile(r"^\d{8}-\d{6}_[A-Za-z0-9_-]+$")
+
+
+def profile_names(profile_dir: Path):
+    """Profile base names (without extension), newest first."""
+    if not profile_dir.exists():
+        return []
+    names = {p.stem for p in profile_dir.glob("*.prof") if _NAME_RE.match(p.stem)}
+    return sorted(names, reverse=True)
+
+
+def profile_path(profile_dir: Path, name: str, ext: str):
+    """Path of an existing profile file, None for unknown/invalid names (no path tricks)."""
+    if not _NAME_RE.match(name or "") or ext not in (".prof", ".txt"):
+        return None
+    p = profile_dir / (name + ext)
+    return p if p.is_file() else None
+
+
+def prune_profiles(profile_dir: Path, keep: int = PROFILE_KEEP):
+    for name in profile_names(profile_dir)[max(0, keep):]:
+        for ext in (".prof", ".txt"):
+            try:
+                (profile_dir / (name + ext)).unlink()
+            except FileNotFoundError:
+                pass
+            except Exception:
+                pass
+
+
+# Since 3.12 cProfile sits on sys.monitoring, which is process-wide: one profiler sees
+# every thread (sync pipelines, writer pool). Before that it only sees the thread it was
+# enabled on.
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+def _start_profiler():
+    """Enabled profiler, or None if another profiling tool is already active."""
+    prof = cProfile.Profile()
+    try:
+        prof.enable()
+    except ValueError:
+        return None
+    return prof
+
+
+def run_profiled(fn, profile_dir: Path, label: str = "run", keep: int = PROFILE_KEEP, top_n: int = PROFILE_TOP_N):
+    """
+    Runs fn() under cProfile and writes <stamp>_<label>.prof (pstats dump, e.g. for
+    snakeviz) and <stamp>_<label>.txt (top_n functions by cumulative and by own time).
+    Keeps the newest `keep` profiles. Python 3.12+: all threads of the process
+    (PROFILES_ALL_THREADS), before: only the calling thread.
+    Returns (fn result, profile name); name is None when no profiler could be started
+    (fn then runs unprofiled). Exceptions of fn are re-raised after writing.
+    """
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    name = datetime.now().strftime("%Y%m%d-%H%M%S") + "_" + (re.sub(r"[^A-Za-z0-9_-]", "_", label) or "run")
+    prof = _start_profiler()
+    if prof is None:
+        return fn(), None
+    t0 = time.time()
+    error = None
+    result = None
+    try:
+        result = fn()
+    except BaseException as e:
+        error = e
+    finally:
+        prof.disable()
+        wall = time.time() - t0
+
+    try:
+        stats = pstats.Stats(prof)
+    except TypeError:
+        # nothing recorded
+        stats = None
+
+    try:
+        if stats is not None:
+            stats.dump_stats(str(profile_dir / (name + ".prof")))
+            out = io.StringIO()
+            out.write(f"profile: {name}\n")
+            scope = "all threads" if PROFILES_ALL_THREADS else "calling thread only"
+            out.write(f"wall time: {wall:.3f}s, profiled: {scope}\n")
+            if error is not None:
+                out.write(f"run failed: {error!r}\n")
+            for sort, title in (("cumulative", "cumulative time"), ("tottime", "own time")):
+                out.write(f"\n==== top {top_n} by {title} ====\n")
+                stats.stream = out
+                stats.sort_stats(sort).print_stats(top_n)
+            (profile_dir / (name + ".txt")).write_text(out.getvalue(), encoding="utf-8")
+        prune_profiles(profile_dir, keep)
+    except Exception:
+        # profiling must never break a sync run
+        pass
+
+    if error is not None:
+        raise error
+    return result, name
@@ -0,0 +1,400 @@
+# app/state_store.py - SQLite state: sync manifest + playlist snapshot (replaces manifest.json / playlist_snapshot.json)
+import json
+import sqlite3
+from pathlib import Path
+
+STATE_DB_NAME = "state.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    k TEXT PRIMARY KEY,
+    v TEXT
+);
+CREATE TABLE IF NOT EXISTS manifest (
+    key      TEXT PRIMARY KEY,
+    kind     TEXT,
+    grp      TEXT,
+    tvg_name TEXT,
+    path     TEXT,
+    url      TEXT,
+    show     TEXT,
+    season   INTEGER,
+    episode  INTEGER,
+    owner    INTEGER NOT NULL DEFAULT 1  -- 1 = last writer of `path` (its url is the file content)
+);
+CREATE INDEX IF NOT EXISTS manifest_path ON manifest(path);
+-- write-ahead journal of the running sync: an intent row (url NULL) before every .strm
+-- write/compare or delete, a completion row (url) after the write; emptied by
+-- commit_manifest_run, so rows left over mean the previous run was interrupted
+CREATE TABLE IF NOT EXISTS journal (
+    seq  INTEGER PRIMARY KEY,
+    path TEXT,
+    url  TEXT
+);
+CREATE TABLE IF NOT EXISTS snapshot (
+    key     TEXT PRIMARY KEY,
+    kind    TEXT,
+    grp     TEXT,
+    show    TEXT,
+    season  INTEGER,
+    episode INTEGER,
+    title   TEXT,
+    url     TEXT
+);
+"""
+
+MANIFEST_FIELDS = ("kind", "group", "tvg_name", "path", "url", "show", "season", "episode")
+SNAPSHOT_FIELDS = ("kind", "group", "show", "season", "episode", "title", "url")
+
+_BATCH = 5000
+
+
+def state_db_exists(state_dir: Path) -> bool:
+    return (state_dir / STATE_DB_NAME).exists()
+
+
+class StateStore:
+    """
+    One SQLite file per state directory:
+      - out_dir/.xtream_state/state.db   -> manifest (what run_sync wrote)
+      - DATA_DIR/.xtream_state/state.db  -> playlist snapshot (change tracking)
+    Runs stage their rows in a TEMP table; set differences and the final merge
+    happen in SQL and only rows that actually changed are written.
+    """
+
+    def __init__(self, db_path: Path, readonly: bool = False):
+        self.path = Path(db_path)
+        if readonly:
+            # always mode=ro, never immutable=1: a run may start writing while this connection is
+            # open and immutable would skip locking and change detection (torn/stale reads)
+            self.conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # a connection may be handed over to another thread (sync pipelines), never shared concurrently
+            self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(_SCHEMA)
+        self._staged = []
+        self._kept = []
+        self._seq = 0
+
+    @classmethod
+    def open(cls, state_dir: Path):
+        return cls(Path(state_dir) / STATE_DB_NAME)
+
+    @classmethod
+    def open_readonly(cls, state_dir: Path):
+        """Read-only connection (no schema/WAL setup, nothing created); None if there is no state.db yet."""
+        if not state_db_exists(Path(state_dir)):
+            return None
+        try:
+            return cls(Path(state_dir) / STATE_DB_NAME, readonly=True)
+        except sqlite3.Error:
+            return None
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------
+    # meta
+    # -------------------------
+    def get_meta(self, k: str, default=None):
+        row = self.conn.execute("SELECT v FROM meta WHERE k = ?", (k,)).fetchone()
+        if row is None:
+            return default
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return default
+
+    def set_meta(self, k: str, v):
+        with self.conn:
+            self._put_meta(k, v)
+
+    def _put_meta(self, k: str, v):
+        """Upsert without its own transaction (for writes inside a larger one)."""
+        self.conn.execute(
+            "INSERT INTO meta(k, v) VALUES(?, ?) ON CONFLICT(k) DO UPDATE SET v = excluded.v",
+            (k, json.dumps(v, ensure_ascii=False)),
+        )
+
+    # -------------------------
+    # manifest
+    # -------------------------
+    def manifest_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM manifest").fetchone()[0]
+
+    def manifest_lookup(self, path: str):
+        """(in_manifest, url) for a target path as of the last committed run."""
+        row = self.conn.execute(
+            "SELECT url FROM manifest WHERE path = ? ORDER BY owner DESC LIMIT 1", (path,)
+        ).fetchone()
+        if row is None:
+            return False, None
+        return True, row[0]
+
+    def manifest_signatures(self) -> dict:
+        """
+        key -> ((kind, group, tvg_name, show, season, episode), path) for delta sync.
+        Only rows that own their path: the file content of the others is not theirs.
+        """
+        cur = self.conn.execute(
+            "SELECT key, kind, grp, tvg_name, show, season, episode, path FROM manifest WHERE owner = 1"
+        )
+        return {row[0]: (row[1:7], row[7]) for row in cur}
+
+    def manifest_paths(self) -> dict:
+        """path -> (kind, url) of the last run; for shared paths the url of the owning (last written) row."""
+        cur = self.conn.execute(
+            "SELECT path, kind, url FROM manifest WHERE path IS NOT NULL ORDER BY owner"
+        )
+        return {row[0]: (row[1], row[2]) for row in cur}
+
+    def iter_manifest(self):
+        cur = self.conn.execute(
+            "SELECT key, kind, grp, tvg_name, path, url, show, season, episode FROM manifest"
+        )
+        for row in cur:
+            yield row[0], dict(zip(MANIFEST_FIELDS, row[1:]))
+
+    def begin_manifest_run(self):
+        """Starts staging the manifest of a new run (nothing is visible until commit_manifest_run)."""
+        self.conn.executescript(
+            """
+            DROP TABLE IF EXISTS temp.run_items;
+            CREATE TEMP TABLE run_items (
+                seq INTEGER PRIMARY KEY,
+                key TEXT, kind TEXT, grp TEXT, tvg_name TEXT, path TEXT, url TEXT,
+                show TEXT, season INTEGER, episode INTEGER
+            );
+            CREATE INDEX temp.run_items_key ON run_items(key);
+            CREATE INDEX temp.run_items_path ON run_items(path);
+            DROP TABLE IF EXISTS temp.run_keep;
+            CREATE TEMP TABLE run_keep (key TEXT PRIMARY KEY);
+            """
+        )
+        self._staged = []
+        self._kept = []
+        self._seq = 0
+
+    def stage_manifest_item(self, key: str, item: dict):
+        """Adds one desired item of the current run; later items with the same key win (like a dict)."""
+        self._seq += 1
+        self._staged.append((self._seq, key) + tuple(item.get(f) for f in MANIFEST_FIELDS))
+        if len(self._staged) >= _BATCH:
+            self._flush_staged()
+
+    def keep_manifest_item(self, key: str):
+        """Carries the existing row of `key` over into the current run unchanged (delta sync)."""
+        self._kept.append((key,))
+        if len(self._kept) >= _BATCH:
+            self._flush_staged()
+
+    def _flush_staged(self):
+        if not self._staged and not self._kept:
+            return
+        with self.conn:
+            if self._staged:
+                self.conn.executemany(
+                    "INSERT INTO run_items(seq, key, kind, grp, tvg_name, path, url, show, season, episode) "
+                    "VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._staged,
+                )
+            if self._kept:
+                self.conn.executemany("INSERT OR IGNORE INTO run_keep(key) VALUES(?)", self._kept)
+        self._staged = []
+        self._kept = []
+
+    def removed_paths(self):
+        """
+        Paths of the last run (and of an interrupted run, see journal) that no item of the
+        current run wants anymore.
+        """
+        self._flush_staged()
+        cur = self.conn.execute(
+            "SELECT path FROM (SELECT path FROM manifest UNION SELECT path FROM journal) WHERE path IS NOT NULL "
+            "AND path NOT IN (SELECT path FROM run_items WHERE path IS NOT NULL) "
+            "AND path NOT IN (SELECT m.path FROM manifest m JOIN run_keep k ON k.key = m.key WHERE m.path IS NOT NULL)"
+        )
+        return [r[0] for r in cur]
+
+    def commit_manifest_run(self, meta: dict = None):
+        """Replaces the manifest with the staged run: upsert changed rows, drop vanished keys (kept keys stay)."""
+        self._flush_staged()
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO manifest(key, kind, grp, tvg_name, path, url, show, season, episode, owner)
+                SELECT r.key, r.kind, r.grp, r.tvg_name, r.path, r.url, r.show, r.season, r.episode,
+                       COALESCE(r.seq = (SELECT MAX(r2.seq) FROM run_items r2 WHERE r2.path = r.path), 1)
+                FROM run_items r
+                WHERE r.seq IN (SELECT MAX(seq) FROM run_items GROUP BY key)
+                ON CONFLICT(key) DO UPDATE SET
+                    kind = excluded.kind, grp = excluded.grp, tvg_name = excluded.tvg_name,
+                    path = excluded.path, url = excluded.url, show = excluded.show,
+                    season = excluded.season, episode = excluded.episode, owner = excluded.owner
+                WHERE (manifest.kind, manifest.grp, manifest.tvg_name, manifest.path, manifest.url,
+                       manifest.show, manifest.season, manifest.episode, manifest.owner)
+                   IS NOT (excluded.kind, excluded.grp, excluded.tvg_name, excluded.path, excluded.url,
+                           excluded.show, excluded.season, excluded.episode, excluded.owner)
+                """
+            )
+            # a carried-over row loses path ownership to an item of this run that was (re)written there
+            self.conn.execute(
+                "UPDATE manifest SET owner = 0 WHERE owner = 1 "
+                "AND key IN (SELECT key FROM run_keep) AND key NOT IN (SELECT key FROM run_items) "
+                "AND path IN (SELECT path FROM run_items WHERE path IS NOT NULL)"
+            )
+            self.conn.execute(
+                "DELETE FROM manifest WHERE key NOT IN (SELECT key FROM run_items) "
+                "AND key NOT IN (SELECT key FROM run_keep)"
+            )
+            # the manifest now describes the output tree -> the journal is obsolete
+            self.conn.execute("DELETE FROM journal")
+            for k, v in (meta or {}).items():
+                self._put_meta(k, v)
+        self.conn.execute("DROP TABLE IF EXISTS temp.run_items")
+        self.conn.execute("DROP TABLE IF EXISTS temp.run_keep")
+
+    # -------------------------
+    # journal (crash-safe / resumable sync)
+    # -------------------------
+    def journal_count(self) -> int:
+        """Rows left by an interrupted run; 0 = the manifest matches the output (unchanged check)."""
+        return self.conn.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+
+    def journal_entries(self) -> dict:
+        """
+        path -> url as left behind by an interrupted run. Writes of one path complete in order,
+        so its content is known only if every intent row (url NULL) has a completion row;
+        otherwise the url is None (file must be compared/deleted like an unknown one).
+        """
+        cur = self.conn.execute(
+            """
+            SELECT g.path, CASE WHEN g.intents = g.done THEN j.url END
+            FROM (
+                SELECT path, SUM(url IS NULL) AS intents, SUM(url IS NOT NULL) AS done,
+                       MAX(CASE WHEN url IS NOT NULL THEN seq END) AS last_done
+                FROM journal GROUP BY path
+            ) g
+            LEFT JOIN journal j ON j.seq = g.last_done
+            """
+        )
+        return {row[0]: row[1] for row in cur}
+
+    def append_journal(self, rows):
+        """Checkpoint: appends (path, url) rows in one transaction."""
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany("INSERT INTO journal(path, url) VALUES(?, ?)", rows)
+
+    def import_manifest_json(self, json_path: Path) -> bool:
+        """One-time migration of .xtream_state/manifest.json (renamed to manifest.json.migrated)."""
+        if not json_path.exists() or self.manifest_count() > 0:
+            return False
+        try:
+            data = json.loads(json_path.read_text(encoding="utf-8"))
+        except Exception:
+            data = {}
+        items = data.get("items", {}) if isinstance(data, dict) else {}
+        if not isinstance(items, dict):
+            items = {}
+
+        self.begin_manifest_run()
+        for key, v in items.items():
+            if isinstance(v, dict):
+                self.stage_manifest_item(key, v)
+        meta = {}
+        for k in ("generated_at", "verified_at"):
+            if isinstance(data, dict) and data.get(k) is not None:
+                meta[k] = data[k]
+        self.commit_manifest_run(meta)
+
+        json_path.replace(json_path.with_name(json_path.name + ".migrated"))
+        return True
+
+    # -------------------------
+    # playlist snapshot
+    # -------------------------
+    def snapshot_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM snapshot").fetchone()[0]
+
+    def replace_snapshot(self, rows, generated_at: str = None):
+        """
+        rows: iterable of (key, item) with SNAPSHOT_FIELDS.
+        Stores them as the new snapshot and returns the items whose key was not in the old one.
+        """
+        self.conn.executescript(
+            """
+            DROP TABLE IF EXISTS temp.snap_new;
+            CREATE TEMP TABLE snap_new (
+                key TEXT PRIMARY KEY, kind TEXT, grp TEXT, show TEXT,
+                season INTEGER, episode INTEGER, title TEXT, url TEXT
+            );
+            """
+        )
+        batch = []
+        sql = "INSERT OR REPLACE INTO snap_new(key, kind, grp, show, season, episode, title, url) VALUES(?, ?, ?, ?, ?, ?, ?, ?)"
+        with self.conn:
+            for key, item in rows:
+                batch.append((key,) + tuple(item.get(f) for f in SNAPSHOT_FIELDS))
+                if len(batch) >= _BATCH:
+                    self.conn.executemany(sql, batch)
+                    batch = []
+            if batch:
+                self.conn.executemany(sql, batch)
+
+        cur = self.conn.execute(
+            "SELECT kind, grp, show, season, episode, title, url FROM snap_new "
+            "WHERE key NOT IN (SELECT key FROM snapshot) ORDER BY key"
+        )
+        added = [dict(zip(SNAPSHOT_FIELDS, r)) for r in cur]
+
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO snapshot(key, kind, grp, show, season, episode, title, url)
+                SELECT key, kind, grp, show, season, episode, title, url FROM snap_new WHERE true
+                ON CONFLICT(key) DO UPDATE SET
+                    kind = excluded.kind, grp = excluded.grp, show = excluded.show, season = excluded.season,
+                    episode = excluded.episode, title = excluded.title, url = excluded.url
+                WHERE (snapshot.kind, snapshot.grp, snapshot.show, snapshot.season, snapshot.episode,
+                       snapshot.title, snapshot.url)
+                   IS NOT (excluded.kind, excluded.grp, excluded.show, excluded.season, excluded.episode,
+                           excluded.title, excluded.url)
+                """
+            )
+            self.conn.execute("DELETE FROM snapshot WHERE key NOT IN (SELECT key FROM snap_new)")
+            if generated_at is not None:
+                self._put_meta("snapshot_generated_at", generated_at)
+        self.conn.execute("DROP TABLE IF EXISTS temp.snap_new")
+        return added
+
+    def import_snapshot_json(self, json_path: Path) -> bool:
+        """One-time migration of playlist_snapshot.json (renamed to playlist_snapshot.json.migrated)."""
+        if not json_path.exists() or self.snapshot_count() > 0:
+            return False
+        try:
+            data = json.loads(json_path.read_text(encoding="utf-8"))
+        except Exception:
+            data = {}
+        items = data.get("items", {}) if isinstance(data, dict) else {}
+        if not isinstance(items, dict):
+            items = {}
+        self.replace_snapshot(
+            ((k, v) for k, v in items.items() if isinstance(v, dict)),
+            generated_at=data.get("generated_at") if isinstance(data, dict) else None,
+        )
+        json_path.replace(json_path.with_name(json_path.name + ".migrated"))
+        return True
@@ -3,7 +3,15 @@
 // ===============================
 
 let cfg = null;
-let catalog = null;
+let catalog = null; // summary only (/api/catalog_cached): counts per category / show
+
+// fetched lazily when a category / show is opened
+const CATALOG_PAGE_SIZE = 200;
+let catalogNames = {livetv:{}, movies:{}, series:{}}; // all names per category/show (selection state)
+let itemPages = {};       // pageKey -> {q, items, total, page, loading, error}
+let showSeasons = {};     // show -> [{season, total}]
+let seasonLoads = {};     // show -> pending fetch
+let openSeasons = new Set(); // "show|season" expanded in the episode list
 
 let currentTab = "livetv";
 let selectedLiveCat = null;
@@ -30,6 +38,13 @@ function snapshotSavedAllow(){
   }catch(e){
     savedAllowSnapshot = null;
   }
+  // categories/shows never opened: their summary count is "saved" now as well
+  ["livetv","movies","series"].forEach(kind=>{
+    catalogKeys(kind).forEach(k=>{
+      const m = catalogMeta(kind, k);
+      if(m) m.saved_selected = m.selected;
+    });
+  });
 }
 
 function ensureSnapshot(){
@@ -54,7 +69,11 @@ function pendingForCategory(kind, category){
   const savedFull = setHas(savedAllowSnapshot?.[kind]?.full_categories, category);
   if(nowFull !== savedFull) return true;
 
-  const items = getCategoryItems(kind, category);
+  const items = catalogNames[kind][category];
+  if(!items){
+    const m = catalogMeta(kind, category);
+    return !!m && m.selected !== m.saved_selected;
+  }
   for(const n of items){
     if(pendingForTitle(kind, n)) return true;
   }
@@ -71,7 +90,11 @@ function pendingForShow(show){
   const savedShow = setHas(savedAllowSnapshot?.series?.shows, show);
   if(nowShow !== savedShow) return true;
 
-  const eps = getShowEpisodeNames(show);
+  const eps = catalogNames.series[show];
+  if(!eps){
+    const m = catalogMeta("series", show);
+    return !!m && m.selected !== m.saved_selected;
+  }
   for(const n of eps){
     const now = setHas(cfg?.allow?.series?.titles, n);
     const saved = setHas(savedAllowSnapshot?.series?.titles, n);
@@ -94,23 +117,106 @@ function sortAlphaDE(arr){
   return (arr || []).sort((a,b)=> a.localeCompare(b, "de", {sensitivity:"base"}));
 }
 
-function getCategoryItems(kind, category){
-  const cats = (catalog?.[kind]?.categories) || {};
-  return (cats[category] || []).map(it => (it.tvg_name || it.title)).filter(Boolean);
+// ---------- Catalog (summary + lazily fetched names/pages) ----------
+function catalogKeys(kind){
+  if(kind === "series") return Object.keys(catalog?.series?.shows || {});
+  return Object.keys(catalog?.[kind]?.categories || {});
 }
 
-function getShowEpisodeNames(show){
-  const s = catalog?.series?.shows?.[show];
-  if(!s) return [];
-  const out = [];
-  const seasons = s.seasons || {};
-  Object.keys(seasons).forEach(sk=>{
-    (seasons[sk] || []).forEach(ep=>{
-      const n = ep.tvg_name || ep.title;
-      if(n) out.push(n);
+function catalogMeta(kind, key){
+  if(kind === "series") return catalog?.series?.shows?.[key];
+  return catalog?.[kind]?.categories?.[key];
+}
+
+function setCatalog(summary){
+  catalog = summary;
+  catalogNames = {livetv:{}, movies:{}, series:{}};
+  itemPages = {};
+  showSeasons = {};
+  seasonLoads = {};
+  openSeasons = new Set();
+  ["livetv","movies","series"].forEach(kind=>{
+    catalogKeys(kind).forEach(k=>{
+      const m = catalogMeta(kind, k);
+      m.saved_selected = m.selected;
     });
   });
-  return out;
+}
+
+function firstKey(kind, prev){
+  const keys = catalogKeys(kind);
+  if(prev && keys.includes(prev)) return prev;
+  return sortAlphaDE(keys)[0] || null;
+}
+
+async function loadNames(kind, key){
+  if(catalogNames[kind][key]) return catalogNames[kind][key];
+  const param = kind === "series" ? "show" : "category";
+  const res = await apiGet(`/api/catalog/names?kind=${kind}&${param}=${encodeURIComponent(key)}`);
+  catalogNames[kind][key] = res.names || [];
+  return catalogNames[kind][key];
+}
+
+function pageKey(kind, key, season){
+  return [kind, key, season || ""].join("|");
+}
+
+async function loadItemsPage(kind, key, season, q, more){
+  const pk = pageKey(kind, key, season);
+  let pg = itemPages[pk];
+  if(!more || !pg || pg.q !== q){
+    pg = itemPages[pk] = {q, items: [], total: null, page: 0, loading: false, error: null};
+  }
+  if(pg.loading) return;
+  pg.loading = true;
+  try{
+    const params = new URLSearchParams({kind, page: String(pg.page + 1), page_size: String(CATALOG_PAGE_SIZE)});
+    if(kind === "series"){ params.set("show", key); params.set("season", season); }
+    else params.set("category", key);
+    if(q) params.set("q", q);
+    const [res] = await Promise.all([apiGet("/api/catalog/items?" + params), loadNames(kind, key)]);
+    if(itemPages[pk] !== pg) return; // superseded (new search)
+    pg.items = pg.items.concat(res.items || []);
+    pg.total = res.total;
+    pg.page = res.page;
+  }catch(e){
+    pg.error = e.message;
+  }finally{
+    pg.loading = false;
+  }
+}
+
+function loadSeasons(show){
+  if(!seasonLoads[show]){
+    seasonLoads[show] = Promise.all([
+      apiGet(`/api/catalog/seasons?show=${encodeURIComponent(show)}`),
+      loadNames("series", show),
+    ]).then(([res])=>{
+      showSeasons[show] = res.seasons || [];
+      if(showSeasons[show].length) openSeasons.add(show + "|" + showSeasons[show][0].season);
+    }).catch(()=>{
+      showSeasons[show] = [];
+    });
+  }
+  return seasonLoads[show];
+}
+
+function appendMoreButton(box, pg, onClick){
+  if(pg.total === null || pg.items.length >= pg.total) return;
+  const b = document.createElement("button");
+  b.textContent = `Weitere laden (${pg.items.length.toLocaleString("de-DE")} / ${pg.total.toLocaleString("de-DE")})`;
+  b.style.margin = "6px 0";
+  b.disabled = pg.loading;
+  b.addEventListener("click", onClick);
+  box.appendChild(b);
+}
+
+function getCategoryItems(kind, category){
+  return catalogNames[kind][category] || [];
+}
+
+function getShowEpisodeNames(show){
+  return catalogNames.series[show] || [];
 }
 
 function categoryIsFullSticky(kind, category){
@@ -125,7 +231,13 @@ function showIsFullSticky(show){
 
 function categorySelectionState(kind, category){
   // returns: "none" | "partial" | "all"
-  const items = getCategoryItems(kind, category);
+  const items = catalogNames[kind][category];
+  if(!items){
+    // not opened yet: selected count of the summary
+    const m = catalogMeta(kind, category);
+    if(!m || !m.selected) return "none";
+    return m.selected >= m.total ? "all" : "partial";
+  }
   if(items.length === 0) return "none";
 
   const titles = new Set(cfg.allow[kind].titles || []);
@@ -140,7 +252,12 @@ function categorySelectionState(kind, category){
 
 function showSelectionState(show){
   // returns: "none" | "partial" | "all"
-  const eps = getShowEpisodeNames(show);
+  const eps = catalogNames.series[show];
+  if(!eps){
+    const m = catalogMeta("series", show);
+    if(!m || !m.selected) return "none";
+    return m.selected >= m.total ? "all" : "partial";
+  }
   if(eps.length === 0) return "none";
 
   const titles = new Set(cfg.allow.series.titles || []);
@@ -172,6 +289,91 @@ async function apiPost(path, body){
   return j;
 }
 
+// ---------- Background jobs (/api/run, /api/refresh) ----------
+const PHASE_LABELS = {
+  "wait": "Wartet auf laufenden Sync",
+  "download": "Playlist wird geladen",
+  "check": "Prüfe auf Änderungen",
+  "parse": "Playlist wird verarbeitet",
+  "catalog": "Katalog wird erstellt",
+  "changes": "Änderungen werden erfasst",
+  "sync": "Sync",
+  "sync.prepare": "Vorbereitung",
+  "sync.pipelines": "STRM Dateien werden geschrieben",
+  "sync.merge": "Manifest wird aktualisiert",
+  "sync.livetv_m3u": "LiveTV.m3u wird geschrieben",
+  "sync.delete": "Aufräumen & Löschen",
+  "sync.commit": "Abschlussarbeiten",
+};
+
+function fmtDuration(sec){
+  sec = Math.max(0, Math.round(sec));
+  const h = Math.floor(sec / 3600), m = Math.floor((sec % 3600) / 60), s = sec % 60;
+  const mm = String(m).padStart(2, "0"), ss = String(s).padStart(2, "0");
+  return h ? `${h}:${mm}:${ss}` : `${m}:${ss}`;
+}
+
+// "STRM Dateien werden geschrieben… 12.000 / 80.000 (1.234/s, noch ~0:55)"
+function formatJobProgress(job){
+  if(job.status === "queued") return "Wartet auf laufenden Job…";
+  const p = job.progress || {};
+  if(!p.phase) return "Startet…";
+  let msg = (PHASE_LABELS[p.phase] || p.phase) + "…";
+  if(p.total){
+    msg += ` ${(p.done||0).toLocaleString("de-DE")} / ${p.total.toLocaleString("de-DE")}`;
+  }else if(p.done){
+    msg += ` ${p.done.toLocaleString("de-DE")}`;
+  }
+  const extra = [];
+  if(p.rate) extra.push(`${Math.round(p.rate).toLocaleString("de-DE")}/s`);
+  if(p.eta != null && p.eta > 0) extra.push(`noch ~${fmtDuration(p.eta)}`);
+  if(extra.length) msg += ` (${extra.join(", ")})`;
+  return msg;
+}
+
+/**
+ * Follow a job until it is finished: Server-Sent Events, polling as fallback
+ * (e.g. proxy without streaming). Resolves with the final job, rejects on job error.
+ */
+function followJob(job, onProgress){
+  return new Promise((resolve, reject) => {
+    let finished = false;
+    const finish = (j) => {
+      if(finished) return;
+      finished = true;
+      if(j.status === "error") reject(new Error(j.error || "Job fehlgeschlagen"));
+      else resolve(j);
+    };
+
+    const poll = async () => {
+      while(!finished){
+        try{
+          const res = await apiGet(`/api/jobs/${job.id}`);
+          if(res.job.status === "done" || res.job.status === "error"){ finish(res.job); return; }
+          if(onProgress) onProgress(res.job);
+        }catch(e){
+          // server restarting etc. -> keep trying
+        }
+        await new Promise(r => setTimeout(r, 1500));
+      }
+    };
+
+    if(!window.EventSource){ poll(); return; }
+    const es = new EventSource(`/api/jobs/${job.id}/events`);
+    es.addEventListener("progress", ev => {
+      try{ if(onProgress) onProgress(JSON.parse(ev.data)); }catch(e){}
+    });
+    es.addEventListener("done", ev => {
+      es.close();
+      try{ finish(JSON.parse(ev.data)); }catch(e){ poll(); }
+    });
+    es.onerror = () => {
+      es.close();
+      if(!finished) poll();
+    };
+  });
+}
+
 function setStatus(msg){ el("status").textContent = msg; }
 function setStatusTop(msg){ el("statusTop").textContent = msg; }
 
@@ -364,12 +566,18 @@ function injectGlobalFilterAboveTabs(){
 }
 
 // ---------- Bulk helpers ----------
-function setAllCategories(kind, enabled){
-  const cats = catalog?.[kind]?.categories || {};
-  const keys = Object.keys(cats);
+async function loadAllNames(kind){
+  const res = await apiGet(`/api/catalog/names?kind=${kind}`);
+  return res.names || [];
+}
+
+async function setAllCategories(kind, enabled){
+  const keys = catalogKeys(kind);
+  // most categories were never opened: their names come in one request, glob:/re: rules stay
+  const allNames = enabled ? [] : await loadAllNames(kind);
 
   const fullSet = new Set(cfg.allow[kind].full_categories || []);
-  let titles = new Set(cfg.allow[kind].titles || []);
+  const titles = new Set(cfg.allow[kind].titles || []);
 
   if(enabled){
     keys.forEach(k=>{
@@ -379,8 +587,10 @@ function setAllCategories(kind, enabled){
   } else {
     keys.forEach(k=>{
       fullSet.delete(k);
-      getCategoryItems(kind, k).forEach(n => titles.delete(n));
+      const m = catalogMeta(kind, k);
+      if(m) m.selected = 0;
     });
+    allNames.forEach(n => titles.delete(n));
   }
 
   cfg.allow[kind].full_categories = Array.from(fullSet);
@@ -390,12 +600,12 @@ function setAllCategories(kind, enabled){
   renderItems(kind);
 }
 
-function setAllShows(enabled){
-  const shows = catalog?.series?.shows || {};
-  const keys = Object.keys(shows);
+async function setAllShows(enabled){
+  const keys = catalogKeys("series");
+  const allNames = enabled ? [] : await loadAllNames("series");
 
   let full = new Set(cfg.allow.series.full_shows || []);
-  let titles = new Set(cfg.allow.series.titles || []);
+  const titles = new Set(cfg.allow.series.titles || []);
   let allowedShows = new Set(cfg.allow.series.shows || []);
 
   if(enabled){
@@ -408,8 +618,10 @@ function setAllShows(enabled){
     keys.forEach(show=>{
       full.delete(show);
       allowedShows.delete(show);
-      getShowEpisodeNames(show).forEach(n => titles.delete(n));
+      const m = catalogMeta("series", show);
+      if(m) m.selected = 0;
     });
+    allNames.forEach(n => titles.delete(n));
   }
 
   cfg.allow.series.full_shows = Array.from(full);
@@ -420,9 +632,9 @@ function setAllShows(enabled){
   renderEpisodes();
 }
 
-function setAllEpisodesForSelectedShow(enabled){
+async function setAllEpisodesForSelectedShow(enabled){
   if(!selectedShow) return;
-  const eps = getShowEpisodeNames(selectedShow);
+  const eps = await loadNames("series", selectedShow);
 
   let titles = new Set(cfg.allow.series.titles || []);
   let full = new Set(cfg.allow.series.full_shows || []);
@@ -475,7 +687,7 @@ function renderCats(kind){
   keys.forEach(k=>{
     if(search && !k.toLowerCase().includes(search)) return;
 
-    const count = (cats[k] || []).length;
+    const count = cats[k]?.total ?? 0;
 
     const isFullSticky = categoryIsFullSticky(kind, k);
     const state = categorySelectionState(kind, k);
@@ -505,9 +717,9 @@ function renderCats(kind){
     cb.checked = checked;
     cb.indeterminate = indeterminate;
 
-    cb.addEventListener("change", ()=>{
+    cb.addEventListener("change", async ()=>{
+      const items = await loadNames(kind, k);
       const fullSet = new Set(cfg.allow[kind].full_categories || []);
-      const items = getCategoryItems(kind, k);
       let titles = new Set(cfg.allow[kind].titles || []);
 
       if(cb.checked){
@@ -551,6 +763,7 @@ function renderCats(kind){
 
 function renderItems(kind){
   const box = el(kind + "_items");
+  const scrollTop = box.scrollTop;
   box.innerHTML = "";
   const search = el("search_" + kind + "_items").value.trim().toLowerCase();
   const mode = getGlobalFilter(); // GLOBAL
@@ -559,26 +772,35 @@ function renderItems(kind){
   if(kind==="livetv") catKey = selectedLiveCat;
   if(kind==="movies") catKey = selectedMovieCat;
 
-  const cats = catalog?.[kind]?.categories || {};
-  const items = catKey ? (cats[catKey] || []) : [];
-
   if(!catKey){
     box.innerHTML = `<div class="small muted">Wähle links eine Kategorie.</div>`;
     return;
   }
 
-  const isFullSticky = categoryIsFullSticky(kind, catKey);
+  // one page at a time from /api/catalog/items (sorted + searched server-side)
+  const pg = itemPages[pageKey(kind, catKey)];
+  if(!pg || pg.q !== search){
+    box.innerHTML = `<div class="small muted">Lade…</div>`;
+    loadItemsPage(kind, catKey, null, search, false).then(()=>{ renderCats(kind); renderItems(kind); });
+    return;
+  }
+  if(pg.error){
+    const err = document.createElement("div");
+    err.className = "small muted";
+    err.textContent = "Fehler: " + pg.error;
+    box.appendChild(err);
+    return;
+  }
+  if(pg.loading && !pg.items.length){
+    box.innerHTML = `<div class="small muted">Lade…</div>`;
+    return;
+  }
 
-  items.sort((a,b)=>{
-    const an = (a.tvg_name||a.title||"");
-    const bn = (b.tvg_name||b.title||"");
-    return an.localeCompare(bn, "de", {sensitivity:"base"});
-  });
+  const isFullSticky = categoryIsFullSticky(kind, catKey);
 
-  items.forEach(it=>{
+  pg.items.forEach(it=>{
     const name = it.tvg_name || it.title;
     if(!name) return;
-    if(search && !name.toLowerCase().includes(search)) return;
 
     const checked = isFullSticky || (cfg.allow[kind].titles || []).includes(name);
     const isPending = pendingForTitle(kind, name);
@@ -631,6 +853,12 @@ function renderItems(kind){
     row.appendChild(label);
     box.appendChild(row);
   });
+
+  appendMoreButton(box, pg, ()=>{
+    loadItemsPage(kind, catKey, null, search, true).then(()=> renderItems(kind));
+    renderItems(kind);
+  });
+  box.scrollTop = scrollTop;
 }
 
 // ---- SERIES ----
@@ -677,13 +905,12 @@ function renderShows(){
     cb.checked = checked;
     cb.indeterminate = indeterminate;
 
-    cb.addEventListener("change", ()=>{
+    cb.addEventListener("change", async ()=>{
+      const eps = await loadNames("series", show);
       let full = new Set(cfg.allow.series.full_shows || []);
       let titles = new Set(cfg.allow.series.titles || []);
       let allowedShows = new Set(cfg.allow.series.shows || []);
 
-      const eps = getShowEpisodeNames(show);
-
       if(cb.checked){
         full.add(show);
         allowedShows.add(show);
@@ -708,6 +935,7 @@ function renderShows(){
     const pill = document.createElement("span");
     pill.className="pill";
     pill.textContent = total;
+    pill.title = `${shows[show]?.seasons ?? 0} Staffel(n)`;
 
     left.appendChild(cb);
     left.appendChild(name);
@@ -727,6 +955,7 @@ function renderShows(){
 
 function renderEpisodes(){
   const box = el("series_eps");
+  const scrollTop = box.scrollTop;
   box.innerHTML = "";
   const search = el("search_series_eps").value.trim().toLowerCase();
   const mode = getGlobalFilter(); // GLOBAL
@@ -736,30 +965,56 @@ function renderEpisodes(){
     return;
   }
 
-  const showObj = catalog?.series?.shows?.[selectedShow];
-  if(!showObj){
+  if(!catalog?.series?.shows?.[selectedShow]){
     box.innerHTML = `<div class="small muted">Show nicht gefunden.</div>`;
     return;
   }
 
-  const seasons = showObj.seasons || {};
-  const seasonKeys = Object.keys(seasons).sort();
+  const show = selectedShow;
+  const seasons = showSeasons[show];
+  if(!seasons){
+    box.innerHTML = `<div class="small muted">Lade…</div>`;
+    loadSeasons(show).then(()=>{ renderShows(); renderEpisodes(); });
+    return;
+  }
 
   const sticky = showIsFullSticky(selectedShow);
 
-  seasonKeys.forEach(sk=>{
+  seasons.forEach(({season: sk, total})=>{
+    const openKey = show + "|" + sk;
+    const isOpen = openSeasons.has(openKey);
+
     const h = document.createElement("div");
     h.style.margin="10px 0 6px";
-    h.innerHTML = `<strong>Season ${sk}</strong>`;
+    h.style.cursor="pointer";
+    h.innerHTML = `<strong>${isOpen ? "▾" : "▸"} Season ${sk}</strong> <span class="small muted">(${total})</span>`;
+    h.addEventListener("click", ()=>{
+      if(isOpen) openSeasons.delete(openKey); else openSeasons.add(openKey);
+      renderEpisodes();
+    });
     box.appendChild(h);
+    if(!isOpen) return;
+
+    const pg = itemPages[pageKey("series", show, sk)];
+    if(!pg || pg.q !== search){
+      const wait = document.createElement("div");
+      wait.className = "small muted";
+      wait.textContent = "Lade…";
+      box.appendChild(wait);
+      loadItemsPage("series", show, sk, search, false).then(()=>{ if(selectedShow === show) renderEpisodes(); });
+      return;
+    }
+    if(pg.error){
+      const err = document.createElement("div");
+      err.className = "small muted";
+      err.textContent = "Fehler: " + pg.error;
+      box.appendChild(err);
+      return;
+    }
 
-    const eps = seasons[sk] || [];
-    eps.sort((a,b)=> ((a.episode ?? 0) - (b.episode ?? 0)));
-
-    eps.forEach(ep=>{
+    pg.items.forEach(ep=>{
       const name = ep.tvg_name || ep.title;
       if(!name) return;
-      if(search && !name.toLowerCase().includes(search)) return;
 
       const checked = sticky || (cfg.allow.series.titles || []).includes(name);
       const isPending = pendingForEpisode(name);
@@ -820,7 +1075,13 @@ function renderEpisodes(){
       row.appendChild(label);
       box.appendChild(row);
     });
+
+    appendMoreButton(box, pg, ()=>{
+      loadItemsPage("series", show, sk, search, true).then(()=>{ if(selectedShow === show) renderEpisodes(); });
+      renderEpisodes();
+    });
   });
+  box.scrollTop = scrollTop;
 }
 
 function renderAll(){
@@ -978,11 +1239,11 @@ async function init(){
 
       const b1 = document.createElement("button");
       b1.textContent = "Alle Serien auswählen";
-      b1.addEventListener("click", ()=>{ if(!catalog) return; setAllShows(true); });
+      b1.addEventListener("click", ()=>{ if(!catalog) return; setAllShows(true).catch(e=>setStatus("Fehler: " + e.message)); });
 
       const b2 = document.createElement("button");
       b2.textContent = "Alle Serien abwählen";
-      b2.addEventListener("click", ()=>{ if(!catalog) return; setAllShows(false); });
+      b2.addEventListener("click", ()=>{ if(!catalog) return; setAllShows(false).catch(e=>setStatus("Fehler: " + e.message)); });
 
       wrap.appendChild(b1);
       wrap.appendChild(b2);
@@ -1042,12 +1303,19 @@ async function init(){
     await apiPost("/api/config", cfg);
     snapshotSavedAllow();
     setStatus("Lade Playlist...");
-    const res = await apiPost("/api/refresh", {});
-    catalog = res.catalog;
+    const started = await apiPost("/api/refresh", {});
+    try{
+      await followJob(started.job, j => setStatus(formatJobProgress(j)));
+    }catch(e){
+      setStatus("Fehler: " + e.message);
+      return;
+    }
+    const res = await apiGet("/api/catalog_cached");
+    setCatalog(res.catalog);
 
-    selectedLiveCat = sortAlphaDE(Object.keys(catalog.livetv.categories||{}))[0] || null;
-    selectedMovieCat = sortAlphaDE(Object.keys(catalog.movies.categories||{}))[0] || null;
-    selectedShow = sortAlphaDE(Object.keys(catalog.series.shows||{}))[0] || null;
+    selectedLiveCat = firstKey("livetv");
+    selectedMovieCat = firstKey("movies");
+    selectedShow = firstKey("series");
 
     renderAll();
     setStatus(`Playlist geladen. LiveTV: ${catalog.livetv.total}, Movies: ${catalog.movies.total}, Series: ${catalog.series.total}`);
@@ -1065,10 +1333,8 @@ async function init(){
       snapshotSavedAllow();
 
       setStatus("Sync läuft...");
-      const res = await apiPost("/api/run", {});
-      setStatus(
-        `Fertig: +${res.run.result.created} neu, ${res.run.result.updated} updated, ${res.run.result.deleted} gelöscht, ${res.run.result.skipped_not_allowed} nicht erlaubt.`
-      );
+      const started = await apiPost("/api/run", {});
+      await finishRunJob(started.job);
 
       // >>> Pending sofort korrekt + Liste neu rendern (OHNE Filter-Toggle)
       await refreshUiAfterRun();
@@ -1091,13 +1357,13 @@ async function init(){
 
   // Per-category bulk actions (LiveTV/Movies)
   const lsc = el("livetv_select_cat");
-  if(lsc) lsc.addEventListener("click", ()=>{
+  if(lsc) lsc.addEventListener("click", async ()=>{
     if(!selectedLiveCat) return;
+    const items = await loadNames("livetv", selectedLiveCat);
     const fullSet = new Set(cfg.allow.livetv.full_categories || []);
     fullSet.add(selectedLiveCat);
     cfg.allow.livetv.full_categories = Array.from(fullSet);
 
-    const items = getCategoryItems("livetv", selectedLiveCat);
     const tset = new Set(cfg.allow.livetv.titles||[]);
     items.forEach(n => tset.add(n));
     cfg.allow.livetv.titles = Array.from(tset);
@@ -1106,13 +1372,13 @@ async function init(){
   });
 
   const lcc = el("livetv_clear_cat");
-  if(lcc) lcc.addEventListener("click", ()=>{
+  if(lcc) lcc.addEventListener("click", async ()=>{
     if(!selectedLiveCat) return;
+    const items = await loadNames("livetv", selectedLiveCat);
     const fullSet = new Set(cfg.allow.livetv.full_categories || []);
     fullSet.delete(selectedLiveCat);
     cfg.allow.livetv.full_categories = Array.from(fullSet);
 
-    const items = getCategoryItems("livetv", selectedLiveCat);
     const tset = new Set(cfg.allow.livetv.titles||[]);
     items.forEach(n => tset.delete(n));
     cfg.allow.livetv.titles = Array.from(tset);
@@ -1121,13 +1387,13 @@ async function init(){
   });
 
   const msc = el("movies_select_cat");
-  if(msc) msc.addEventListener("click", ()=>{
+  if(msc) msc.addEventListener("click", async ()=>{
     if(!selectedMovieCat) return;
+    const items = await loadNames("movies", selectedMovieCat);
     const fullSet = new Set(cfg.allow.movies.full_categories || []);
     fullSet.add(selectedMovieCat);
     cfg.allow.movies.full_categories = Array.from(fullSet);
 
-    const items = getCategoryItems("movies", selectedMovieCat);
     const tset = new Set(cfg.allow.movies.titles||[]);
     items.forEach(n => tset.add(n));
     cfg.allow.movies.titles = Array.from(tset);
@@ -1136,13 +1402,13 @@ async function init(){
   });
 
   const mcc = el("movies_clear_cat");
-  if(mcc) mcc.addEventListener("click", ()=>{
+  if(mcc) mcc.addEventListener("click", async ()=>{
     if(!selectedMovieCat) return;
+    const items = await loadNames("movies", selectedMovieCat);
     const fullSet = new Set(cfg.allow.movies.full_categories || []);
     fullSet.delete(selectedMovieCat);
     cfg.allow.movies.full_categories = Array.from(fullSet);
 
-    const items = getCategoryItems("movies", selectedMovieCat);
     const tset = new Set(cfg.allow.movies.titles||[]);
     items.forEach(n => tset.delete(n));
     cfg.allow.movies.titles = Array.from(tset);
@@ -1166,11 +1432,11 @@ async function init(){
 
       const b1 = document.createElement("button");
       b1.textContent = "Alle auswählen";
-      b1.addEventListener("click", ()=>{ if(!catalog) return; setAllCategories(kind, true); });
+      b1.addEventListener("click", ()=>{ if(!catalog) return; setAllCategories(kind, true).catch(e=>setStatus("Fehler: " + e.message)); });
 
       const b2 = document.createElement("button");
       b2.textContent = "Alle abwählen";
-      b2.addEventListener("click", ()=>{ if(!catalog) return; setAllCategories(kind, false); });
+      b2.addEventListener("click", ()=>{ if(!catalog) return; setAllCategories(kind, false).catch(e=>setStatus("Fehler: " + e.message)); });
 
       wrap.appendChild(b1);
       wrap.appendChild(b2);
@@ -1273,17 +1539,33 @@ async function init(){
   // Try load cached catalog automatically
   try{
     const cached = await apiGet("/api/catalog_cached");
-    catalog = cached.catalog;
+    setCatalog(cached.catalog);
 
-    selectedLiveCat = sortAlphaDE(Object.keys(catalog.livetv.categories||{}))[0] || null;
-    selectedMovieCat = sortAlphaDE(Object.keys(catalog.movies.categories||{}))[0] || null;
-    selectedShow = sortAlphaDE(Object.keys(catalog.series.shows||{}))[0] || null;
+    selectedLiveCat = firstKey("livetv");
+    selectedMovieCat = firstKey("movies");
+    selectedShow = firstKey("series");
 
     renderAll();
   }catch(e){
     // no cached catalog yet
   }
 
+  // a sync started earlier (other tab, page reload) -> show its progress
+  try{
+    const act = await apiGet("/api/jobs?active=1");
+    const running = (act.jobs || []).find(j => j.kind === "run");
+    if(running){
+      await runWithOverlay(async () => {
+        await finishRunJob(running);
+        await refreshUiAfterRun();
+        await loadChangesBox();
+      }, "Sync läuft…");
+      return;
+    }
+  }catch(e){
+    // ignore
+  }
+
   const st = await apiGet("/api/status");
   if(st.last_run){
     setStatus(`...`);
@@ -1345,6 +1627,12 @@ function ensureRunOverlay() {
       0%   { transform: translateX(-120%); }
       100% { transform: translateX(320%); }
     }
+    .run-bar.determinate > div {
+      width: 0;
+      transform: none;
+      animation: none;
+      transition: width 0.4s ease;
+    }
     .run-hint { margin-top: 10px; font-size: 12px; opacity: 0.75; }
   `;
   document.head.appendChild(style);
@@ -1402,9 +1690,51 @@ function hideRunOverlay() {
   clearInterval(__runOverlayTimer);
   __runOverlayTimer = null;
   __runOverlay.style.display = "none";
+  const bar = __runOverlay.querySelector(".run-bar");
+  if (bar) {
+    bar.classList.remove("determinate");
+    bar.firstElementChild.style.width = "";
+  }
   setUiDisabled(false);
 }
 
+// real progress from the job -> no more rotating hints, bar shows done/total when known
+function setRunProgress(job) {
+  const ov = ensureRunOverlay();
+  clearInterval(__runOverlayTimer);
+  __runOverlayTimer = null;
+  const m = ov.querySelector("#run_overlay_msg");
+  if (m) m.textContent = formatJobProgress(job);
+  const bar = ov.querySelector(".run-bar");
+  const p = job.progress || {};
+  if (bar && p.total) {
+    bar.classList.add("determinate");
+    bar.firstElementChild.style.width = Math.min(100, Math.round(100 * (p.done || 0) / p.total)) + "%";
+  } else if (bar) {
+    bar.classList.remove("determinate");
+    bar.firstElementChild.style.width = "";
+  }
+}
+
+/**
+ * Follow a sync job in the overlay and show its result in the status line.
+ */
+async function finishRunJob(job) {
+  try {
+    const done = await followJob(job, setRunProgress);
+    const r = (done.result || {}).result || {};
+    if (r.unchanged) {
+      setStatus("Fertig: Playlist und Auswahl unverändert – nichts zu tun.");
+    } else {
+      setStatus(
+        `Fertig: +${r.created} neu, ${r.updated} updated, ${r.deleted} gelöscht, ${r.skipped_not_allowed} nicht erlaubt.`
+      );
+    }
+  } catch (e) {
+    setStatus("Sync Fehler: " + e.message);
+  }
+}
+
 /**
  * Wrap an async action so UI is locked + overlay shown until it finishes.
  */
@@ -1423,7 +1753,7 @@ init().catch(err=>{ setStatus("Fehler: " + err.message); });
  * Nach dem Run:
  * - cfg vom Server neu holen
  * - snapshotSavedAllow() neu setzen (damit Pending sofort weg ist)
- * - catalog_cached neu holen (optional aber sinnvoll)
+ * - Katalog-Übersicht neu holen (geöffnete Kategorien laden neu)
  * - renderAll() aufrufen (damit Listboxen ohne Filter-Toggle neu aufgebaut werden)
  */
 async function refreshUiAfterRun() {
@@ -1446,7 +1776,7 @@ async function refreshUiAfterRun() {
     try {
       const cached = await apiGet("/api/catalog_cached");
       if (cached && cached.catalog) {
-        catalog = cached.catalog;
+        setCatalog(cached.catalog);
       }
     } catch (e) {
       // ok
@@ -1454,13 +1784,9 @@ async function refreshUiAfterRun() {
 
     // 4) Selections wiederherstellen, falls möglich
     if (catalog) {
-      const liveKeys = Object.keys(catalog?.livetv?.categories || {});
-      const movieKeys = Object.keys(catalog?.movies?.categories || {});
-      const showKeys = Object.keys(catalog?.series?.shows || {});
-
-      selectedLiveCat = (prevLiveCat && liveKeys.includes(prevLiveCat)) ? prevLiveCat : (sortAlphaDE(liveKeys)[0] || null);
-      selectedMovieCat = (prevMovieCat && movieKeys.includes(prevMovieCat)) ? prevMovieCat : (sortAlphaDE(movieKeys)[0] || null);
-      selectedShow = (prevShow && showKeys.includes(prevShow)) ? prevShow : (sortAlphaDE(showKeys)[0] || null);
+      selectedLiveCat = firstKey("livetv", prevLiveCat);
+      selectedMovieCat = firstKey("movies", prevMovieCat);
+      selectedShow = firstKey("series", prevShow);
 
       renderAll();
     }
@@ -1,13 +1,21 @@
 # sync_core.py (FINAL) - LiveTV: M3U export option + cleaned names + tvg-chno starts at 1001 + absolute tvg-logo
+import os
 import json
 import time
 import hashlib
 import re
 import shutil
+import fnmatch
+import stat
+import threading
+import heapq
 from pathlib import Path
 from difflib import SequenceMatcher
+from concurrent.futures import ThreadPoolExecutor
 
-from .m3u_core import parse_m3u, classify_item, extract_show_season_episode, clean_lang_tags
+from .m3u_core import parse_playlist, clean_lang_tags
+from .state_store import StateStore
+from .metrics import NO_FILE_STATS, FileStats, RunTimer
 
 
 # -------------------------
@@ -30,40 +38,116 @@ def sha256(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 
-def write_strm(path: Path, url: str) -> bool:
+def write_strm(path: Path, url: str, file_stats: FileStats = NO_FILE_STATS) -> bool:
     path.parent.mkdir(parents=True, exist_ok=True)
     new_text = url.strip() + "\n"
     if path.exists():
         old = path.read_text(encoding="utf-8", errors="ignore")
+        file_stats.add(stat=1, read=1)
         if old == new_text:
             return False
+    else:
+        file_stats.add(stat=1)
     path.write_text(new_text, encoding="utf-8")
+    file_stats.add(written=1)
     return True
 
 
-def write_text_if_changed(path: Path, text: str) -> bool:
+def write_text_if_changed(path: Path, text: str, file_stats: FileStats = NO_FILE_STATS) -> bool:
     path.parent.mkdir(parents=True, exist_ok=True)
+    file_stats.add(stat=1)
     if path.exists():
         try:
             old = path.read_text(encoding="utf-8", errors="ignore")
+            file_stats.add(read=1)
             if old == text:
                 return False
         except Exception:
             pass
     path.write_text(text, encoding="utf-8")
+    file_stats.add(written=1)
     return True
 
 
-def write_binary_if_changed(dst: Path, src: Path) -> bool:
+def write_binary_if_changed(dst: Path, src: Path, file_stats: FileStats = NO_FILE_STATS) -> bool:
     dst.parent.mkdir(parents=True, exist_ok=True)
+    file_stats.add(stat=1)
     if dst.exists():
         try:
+            file_stats.add(stat=2)
             if dst.stat().st_size == src.stat().st_size:
+                file_stats.add(read=2)
                 if dst.read_bytes() == src.read_bytes():
                     return False
         except Exception:
             pass
     shutil.copyfile(src, dst)
+    file_stats.add(read=1, written=1)
+    return True
+
+
+# -------------------------
+# Artwork placement (LiveTV poster/backdrop)
+# -------------------------
+# "copy":     byte-compare + copy (classic behaviour)
+# "hardlink": hardlink the picon, unchanged = same inode
+# "reflink":  copy-on-write clone (btrfs/xfs/...), unchanged = same size+mtime
+# "auto":     reflink, then hardlink, then copy
+# All modes except "copy" never read file contents and fall back to a
+# metadata-preserving copy (e.g. across devices).
+ARTWORK_MODES = ("copy", "hardlink", "reflink", "auto")
+
+_FICLONE = 0x40049409
+
+
+def _reflink(src: Path, dst: Path):
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError("reflink not supported on this platform")
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+    shutil.copystat(src, dst)
+
+
+def _hardlink(src: Path, dst: Path):
+    os.link(src, dst)
+
+
+def place_artwork(dst: Path, src: Path, mode: str = "copy", file_stats: FileStats = NO_FILE_STATS) -> bool:
+    mode = (mode or "copy").lower()
+    if mode not in ARTWORK_MODES or mode == "copy":
+        return write_binary_if_changed(dst, src, file_stats)
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    s_st = src.stat()
+    file_stats.add(stat=2)
+    try:
+        d_st = dst.stat()
+        if (d_st.st_ino == s_st.st_ino and d_st.st_dev == s_st.st_dev) or (
+            d_st.st_size == s_st.st_size and d_st.st_mtime_ns == s_st.st_mtime_ns
+        ):
+            return False
+    except FileNotFoundError:
+        pass
+
+    tmp = dst.with_name("." + dst.name + ".xtream_tmp")
+    methods = {"hardlink": [_hardlink], "reflink": [_reflink], "auto": [_reflink, _hardlink]}[mode]
+    placed = False
+    for fn in methods:
+        try:
+            fn(src, tmp)
+            placed = True
+            break
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+    if not placed:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+    file_stats.add(written=1)
     return True
 
 
@@ -82,26 +166,76 @@ def remove_if_empty_dirs(start_dir: Path, stop_at: Path):
 # -------------------------
 # Allowlist
 # -------------------------
-def allow_item(kind: str, group: str, tvg_name: str, show: str, allow_cfg: dict) -> bool:
-    allow = allow_cfg or {}
+# Values in the allow lists are exact names by default. Two prefixes turn a
+# value into a rule (all rules of a list are compiled into ONE pattern):
+#   "glob:DE | *"     shell-style wildcard over the whole value (case-sensitive)
+#   "re:^(DE|AT) "    regular expression, re.search semantics
+def _compile_rules(values):
+    exact = set()
+    pats = []
+    for v in values or []:
+        if not isinstance(v, str):
+            continue
+        if v.startswith("glob:"):
+            p = "^" + fnmatch.translate(v[5:])
+            pats.append((p, p))
+        elif v.startswith("re:"):
+            try:
+                re.compile(v[3:])
+            except re.error:
+                continue
+            pats.append((f"(?:{v[3:]})", v[3:]))
+        else:
+            exact.add(v)
 
-    if kind == "livetv":
-        a = allow.get("livetv", {})
-        if group in set(a.get("full_categories", [])):
-            return True
-        return (group in set(a.get("categories", []))) or (tvg_name in set(a.get("titles", [])))
+    if not pats:
+        return exact, None
+    try:
+        return exact, [re.compile("|".join(p for p, _ in pats))]
+    except re.error:
+        # e.g. global inline flags in one of the regexes -> match them one by one
+        return exact, [re.compile(raw) for _, raw in pats]
+
+
+def _rule_hit(rule, value) -> bool:
+    exact, pats = rule
+    if value in exact:
+        return True
+    if pats is None or value is None:
+        return False
+    return any(p.search(value) for p in pats)
 
-    if kind == "movie":
-        a = allow.get("movies", {})
-        if group in set(a.get("full_categories", [])):
+
+class AllowMatcher:
+    """
+    The "allow" config section compiled once per run: exact names become sets,
+    glob:/re: rules one combined pattern per kind and field.
+    """
+
+    def __init__(self, allow_cfg: dict):
+        allow = allow_cfg or {}
+        self.rules = {}
+        for kind, sect in (("livetv", "livetv"), ("movie", "movies")):
+            a = allow.get(sect, {}) or {}
+            self.rules[kind] = (
+                _compile_rules(list(a.get("full_categories", []) or []) + list(a.get("categories", []) or [])),
+                _compile_rules(a.get("titles", [])),
+            )
+        a = allow.get("series", {}) or {}
+        self.rules["series"] = (_compile_rules(a.get("shows", [])), _compile_rules(a.get("titles", [])))
+
+    def allows(self, kind: str, group: str, tvg_name: str, show: str) -> bool:
+        rules = self.rules.get(kind)
+        if rules is None:
+            return False
+        first, titles = rules
+        if _rule_hit(first, show if kind == "series" else group):
             return True
-        return (group in set(a.get("categories", []))) or (tvg_name in set(a.get("titles", [])))
+        return _rule_hit(titles, tvg_name)
 
-    if kind == "series":
-        a = allow.get("series", {})
-        return (show in set(a.get("shows", []))) or (tvg_name in set(a.get("titles", [])))
 
-    return False
+def allow_item(kind: str, group: str, tvg_name: str, show: str, allow_cfg: dict) -> bool:
+    return AllowMatcher(allow_cfg).allows(kind, group, tvg_name, show)
 
 
 # -------------------------
@@ -176,6 +310,8 @@ IGNORE_TOKENS = {
     "de", "at", "ch", "ger", "eu",
 }
 
+PICON_MIN_SCORE = 2.2
+
 def _split_alnum_boundaries(s: str) -> str:
     s = re.sub(r"([a-zA-Z])([0-9])", r"\1 \2", s)
     s = re.sub(r"([0-9])([a-zA-Z])", r"\1 \2", s)
@@ -210,12 +346,35 @@ def _score_tokens(name_toks, file_toks) -> float:
     sim = SequenceMatcher(None, ns, fs).ratio()
     return overlap * 2.0 + sim
 
-def build_picon_index(picon_dir: Path):
-    if not picon_dir.exists():
-        return []
-    files = [p for p in picon_dir.rglob("*.png") if p.is_file()]
+def build_picon_index(picon_dir: Path, files=None):
+    if files is None:
+        if not picon_dir.exists():
+            return []
+        files = [p for p in picon_dir.rglob("*.png") if p.is_file()]
     return [(p, _tokens_from(p.stem)) for p in files]
 
+def scan_picon_dir(picon_dir: Path, file_stats: FileStats = NO_FILE_STATS):
+    """
+    Lists picon files (rglob order) and a fingerprint over their relative names,
+    sizes and mtimes. Returns (files, fingerprint).
+    """
+    if not picon_dir.exists():
+        return [], None
+    files = []
+    sig = []
+    for p in picon_dir.rglob("*.png"):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        file_stats.add(stat=1)
+        if not stat.S_ISREG(st.st_mode):
+            continue
+        files.append(p)
+        sig.append(f"{p.relative_to(picon_dir).as_posix()}\t{st.st_size}\t{st.st_mtime_ns}")
+    sig.sort()
+    return files, sha256("\n".join(sig))
+
 def find_best_picon(picon_index, channel_name: str):
     nt = _tokens_from(channel_name)
     if not nt:
@@ -231,66 +390,194 @@ def find_best_picon(picon_index, channel_name: str):
 
     if best_path is None:
         return None
-    if best_score < 2.2:
+    if best_score < PICON_MIN_SCORE:
         return None
     return best_path
 
 
+class PiconMatcher:
+    """
+    Same result as find_best_picon(), but backed by a token inverted index:
+    a channel is only scored against picons that share at least one token with it.
+
+    Why this is exact: score = overlap * 2 + sim with sim <= 1.0, so a picon without
+    a shared token scores <= 1.0 and can never reach PICON_MIN_SCORE. Candidates are
+    visited by descending overlap and skipped once their best possible score cannot
+    beat the current best; ties go to the lowest index, like the linear scan.
+    """
+
+    def __init__(self, picon_index):
+        self.picon_index = picon_index
+        self.tokens = {}
+        self._file_strs = []
+        self._matchers = {}
+        for i, (_, ft) in enumerate(picon_index):
+            self._file_strs.append(" ".join(ft))
+            for t in set(ft):
+                self.tokens.setdefault(t, []).append(i)
+
+    def __bool__(self):
+        return bool(self.picon_index)
+
+    def _matcher(self, i: int) -> SequenceMatcher:
+        # seq2 (the picon side) is cached -> only set_seq1() per channel
+        sm = self._matchers.get(i)
+        if sm is None:
+            sm = SequenceMatcher(None, "", self._file_strs[i])
+            self._matchers[i] = sm
+        return sm
+
+    def find(self, channel_name: str):
+        nt = _tokens_from(channel_name)
+        if not nt:
+            return None
+
+        overlap = {}
+        for t in set(nt):
+            for i in self.tokens.get(t, ()):
+                overlap[i] = overlap.get(i, 0) + 1
+        if not overlap:
+            return None
+
+        ns = " ".join(nt)
+        best_score = 0.0
+        best_i = None
+        for i in sorted(overlap, key=lambda i: (-overlap[i], i)):
+            base = overlap[i] * 2.0
+            if best_i is not None and base + 1.0 < best_score:
+                break
+            sm = self._matcher(i)
+            sm.set_seq1(ns)
+            if best_i is not None and (base + sm.real_quick_ratio() < best_score or base + sm.quick_ratio() < best_score):
+                continue
+            sc = overlap[i] * 2.0 + sm.ratio()
+            if best_i is None or sc > best_score or (sc == best_score and i < best_i):
+                best_score = sc
+                best_i = i
+
+        if best_i is None or best_score < PICON_MIN_SCORE:
+            return None
+        return self.picon_index[best_i][0]
+
+
+class PiconCache:
+    """
+    Persistent tvg_name -> picon match cache (.xtream_state/picon_cache.json).
+    Valid as long as the picon set fingerprint (names, sizes, mtimes) is unchanged;
+    the token index is only built when a channel is not in the cache yet.
+    """
+
+    def __init__(self, picon_dir: Path, state_dir: Path, file_stats: FileStats = NO_FILE_STATS):
+        self.picon_dir = picon_dir
+        self.path = state_dir / "picon_cache.json"
+        self.files, self.fingerprint = scan_picon_dir(picon_dir, file_stats)
+        self.matches = {}
+        self.dirty = False
+        self._matcher = None
+
+        if self.files and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if data.get("fingerprint") == self.fingerprint and isinstance(data.get("matches"), dict):
+                    self.matches = data["matches"]
+            except Exception:
+                self.matches = {}
+        if not self.matches:
+            self.dirty = True
+
+    def __bool__(self):
+        return bool(self.files)
+
+    def find(self, channel_name: str):
+        if channel_name in self.matches:
+            rel = self.matches[channel_name]
+            return (self.picon_dir / rel) if rel else None
+
+        if self._matcher is None:
+            self._matcher = PiconMatcher(build_picon_index(self.picon_dir, self.files))
+        best = self._matcher.find(channel_name)
+        self.matches[channel_name] = best.relative_to(self.picon_dir).as_posix() if best is not None else None
+        self.dirty = True
+        return best
+
+    def save(self):
+        if not self.dirty or not self.files:
+            return
+        try:
+            self.path.write_text(
+                json.dumps({"fingerprint": self.fingerprint, "matches": self.matches}, ensure_ascii=False, indent=2),
+                encoding="utf-8",
+            )
+            self.dirty = False
+        except Exception:
+            pass
+
+
 # -------------------------
 # Delete helpers (delete -poster/-backdrop/-logo etc.)
 # -------------------------
 _STEM_SIDECARS = [".nfo", ".jpg", ".jpeg", ".png", ".webp", ".srt", ".ass", ".sub"]
 _FOLDER_ART = ["poster.png", "poster.jpg", "poster.jpeg", "folder.png", "folder.jpg", "folder.jpeg", "backdrop.png", "backdrop.jpg", "backdrop.jpeg"]
 
-def delete_related_files_for_strm(strm_path: Path, prune_sidecars: bool):
+_ART_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+
+def delete_strm_files(parent: Path, strm_paths, prune_sidecars: bool, file_stats: FileStats = NO_FILE_STATS):
     """
-    When a .strm is removed:
+    Deletes removed .strm files of ONE directory and their related files,
+    listing the directory only once (os.scandir):
     - if prune_sidecars: delete classic stem sidecars: <stem>.jpg, <stem>.nfo, ...
     - always delete Jellyfin-style artworks: <stem>-poster.jpg / -backdrop.jpg / -logo.png / -landscape.jpg ...
       (matching: "<stem>-*.{jpg,jpeg,png,webp}")
     - if folder has no other .strm after deletion: delete folder art (poster.png etc.)
+    Returns the number of deleted .strm files.
     """
     try:
-        parent = strm_path.parent
-        stem = strm_path.with_suffix("")
-        stem_str = str(stem)
+        with os.scandir(parent) as it:
+            listing = {de.name: de.is_file() for de in it}
+    except OSError:
+        return 0
+    file_stats.add(stat=len(listing))
+
+    deleted = []
+    for p in strm_paths:
+        if not listing.get(p.name):
+            continue
+        try:
+            os.unlink(parent / p.name)
+        except Exception:
+            continue
+        file_stats.add(deleted=1)
+        del listing[p.name]
+        deleted.append(p)
+    if not deleted:
+        return 0
+
+    def unlink(name: str):
+        try:
+            os.unlink(parent / name)
+            file_stats.add(deleted=1)
+            del listing[name]
+        except Exception:
+            pass
 
+    for p in deleted:
+        stem = p.stem
         if prune_sidecars:
             for ext in _STEM_SIDECARS:
-                side = Path(stem_str + ext)
-                if side.exists() and side.is_file():
-                    try:
-                        side.unlink()
-                    except Exception:
-                        pass
+                if listing.get(stem + ext):
+                    unlink(stem + ext)
 
-        for p in parent.iterdir():
-            if not p.is_file():
-                continue
-            suf = p.suffix.lower()
-            if suf not in (".jpg", ".jpeg", ".png", ".webp"):
-                continue
-            if p.name.startswith(stem.name + "-"):
-                try:
-                    p.unlink()
-                except Exception:
-                    pass
+        prefix = stem + "-"
+        for name in [n for n, is_file in listing.items() if is_file and n.startswith(prefix)]:
+            if os.path.splitext(name)[1].lower() in _ART_EXTS:
+                unlink(name)
 
-        try:
-            remaining = list(parent.glob("*.strm"))
-        except Exception:
-            remaining = []
-        if len(remaining) == 0:
-            for fn in _FOLDER_ART:
-                q = parent / fn
-                if q.exists() and q.is_file():
-                    try:
-                        q.unlink()
-                    except Exception:
-                        pass
+    if not any(n.endswith(".strm") for n in listing):
+        for fn in _FOLDER_ART:
+            if listing.get(fn):
+                unlink(fn)
 
-    except Exception:
-        pass
+    return len(deleted)
 
 
 # -------------------------
@@ -302,9 +589,93 @@ def _m3u_escape_attr(s: str) -> str:
     return s
 
 
+# -------------------------
+# Parallel writer
+# -------------------------
+class WritePool:
+    """
+    Runs write/compare jobs on `workers` threads. All jobs for one directory go to
+    the same worker (one writer per directory, FIFO), so workers never race on a
+    folder. At most `max_pending` jobs are queued at a time; workers <= 1 runs jobs inline.
+    The first exception raised by a job is re-raised by close().
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int = 0):
+        self.workers = max(1, int(workers or 1))
+        self._executors = []
+        self._error = None
+        if self.workers > 1:
+            self._executors = [ThreadPoolExecutor(max_workers=1) for _ in range(self.workers)]
+            self._slots = threading.BoundedSemaphore(max_pending or self.workers * 64)
+
+    def submit(self, directory: Path, fn, on_done=None):
+        if not self._executors:
+            res = fn()
+            if on_done is not None:
+                on_done(res)
+            return
+        if self._error is not None:
+            raise self._error
+
+        self._slots.acquire()
+
+        def run():
+            try:
+                if self._error is not None:
+                    return
+                res = fn()
+                if on_done is not None:
+                    on_done(res)
+            except BaseException as ex:
+                if self._error is None:
+                    self._error = ex
+            finally:
+                self._slots.release()
+
+        self._executors[hash(str(directory)) % self.workers].submit(run)
+
+    def close(self):
+        for ex in self._executors:
+            ex.shutdown(wait=True)
+        self._executors = []
+        if self._error is not None:
+            raise self._error
+
+
+# -------------------------
+# Target paths (shared by run_sync and plan_sync)
+# -------------------------
+def series_target(out_dir: Path, show: str, season, epn) -> Path:
+    show_dir = safe_name(show)
+    season_dir = f"Season {int(season):02d}"
+    base = f"{show} - S{int(season):02d}E{int(epn):02d}"
+    return out_dir / "Series" / show_dir / season_dir / (safe_name(base) + ".strm")
+
+
+def movie_target(out_dir: Path, group: str, tvg_name: str) -> Path:
+    genre_dir = safe_name(group.replace("/", "_"))
+    return out_dir / "Movies" / genre_dir / (safe_name(clean_lang_tags(tvg_name)) + ".strm")
+
+
+def livetv_target(out_dir: Path, group: str, tvg_name: str) -> Path:
+    # Cleaned visible name (no DE:/AT| etc.)
+    disp_name = clean_livetv_display_name(tvg_name) or tvg_name
+    cat_dir = safe_name(group)
+    channel_folder = safe_name(channel_folder_from_name(tvg_name))
+    channel_dir = out_dir / "LiveTV" / cat_dir / channel_folder
+    return channel_dir / (safe_name(disp_name) + ".strm")
+
+
 # -------------------------
 # Sync
 # -------------------------
+# journal checkpoint: every N queued writes or every N seconds, whatever comes first
+JOURNAL_CHECKPOINT_OPS = 2000
+JOURNAL_CHECKPOINT_SECS = 10
+# progress events (RunTimer.advance) every N processed entries per pipeline
+PROGRESS_EVERY = 1000
+
+
 def run_sync(
     m3u_text: str,
     out_dir: Path,
@@ -312,311 +683,635 @@ def run_sync(
     sync_delete: bool = True,
     prune_sidecars: bool = False,
     livetv_export: str = "strm",  # "strm" or "m3u"
-	path_jelly_pincon: Path = Path("/data/IPTV_STRM")
+	path_jelly_pincon: Path = Path("/data/IPTV_STRM"),
+    entries=None,  # pre-parsed playlist (m3u_core.parse_playlist) -> m3u_text is not parsed again
+    trust_manifest: bool = False,  # skip reading .strm files whose path+url match the previous manifest
+    verify: bool = False,  # force the read-compare of every .strm (also resets the verify timer)
+    verify_interval_hours: float = 168,  # trust_manifest: fall back to a verify run after this long (0 = never)
+    artwork_mode: str = "copy",  # see ARTWORK_MODES
+    write_workers: int = 1,  # parallel writer threads (1 = write inline)
+    incremental: bool = False,  # delta sync: carry unchanged manifest items over without re-processing them
+    parallel: bool = True,  # run the LiveTV / Movies / Series pipelines concurrently
+    timer: RunTimer = None,  # records the phases into this timer (e.g. the one of do_sync_run)
 ):
-    out_dir = out_dir.resolve()
-    state_dir = out_dir / ".xtream_state"
-    state_dir.mkdir(parents=True, exist_ok=True)
-    manifest_path = state_dir / "manifest.json"
-
-    old_manifest = {}
-    if manifest_path.exists():
-        try:
-            old_manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
-        except Exception:
-            old_manifest = {}
+    """
+    incremental=True diffs the playlist against the manifest of the last run (keyed by the
+    sha256 of the url): items whose kind/group/name/show/season/episode are unchanged are
+    carried over as they are (no allow check, no path building, no file access); only new or
+    changed items are processed and vanished ones deleted. Falls back to a full rebuild when
+    the allow-list, the LiveTV export/artwork options or the picon set changed, on verify runs
+    and when the verify interval is due.
+
+    Crash safety: .strm writes are journaled in state.db, the intent before the write and the
+    completion afterwards (checkpointed every JOURNAL_CHECKPOINT_OPS writes /
+    JOURNAL_CHECKPOINT_SECS seconds). After an interrupted run the next one resumes from the
+    journal: journaled files are not read again, and files the interrupted run created are
+    deleted if they are no longer wanted.
+
+    parallel=True runs LiveTV, Movies and Series as separate pipelines in threads (disjoint
+    output subtrees, one state.db connection each); manifest rows and counts are merged in
+    playlist order afterwards, so the result is the same as sequential processing.
+
+    Phases (prepare, pipelines, merge, livetv_m3u, delete, commit) are timed with `timer`;
+    without one the result carries its own "phases" list.
+    """
+    own_timer = timer is None
+    if own_timer:
+        timer = RunTimer()
+    file_stats = timer.files
 
-    old_paths = set()
-    if isinstance(old_manifest, dict):
-        items = old_manifest.get("items", {})
-        if isinstance(items, dict):
-            for v in items.values():
-                p = v.get("path")
-                if p:
-                    old_paths.add(p)
+    if entries is None:
+        with timer.phase("parse") as ph:
+            entries = parse_playlist(m3u_text or "")
+            ph["items"] = len(entries)
 
-    desired_paths = set()
-    new_manifest = {"generated_at": int(time.time()), "items": {}}
+    ph = timer.begin("prepare")
 
-    created = 0
-    updated = 0
-    skipped = 0
+    allow = AllowMatcher(allow_cfg)
 
-    # picon support: /output/picons (inside out_dir)
-    picon_dir = out_dir / "picons"
-    picon_index = build_picon_index(picon_dir)
+    out_dir = out_dir.resolve()
+    state_dir = out_dir / ".xtream_state"
+    state_dir.mkdir(parents=True, exist_ok=True)
 
-    # DEDUPE ONLY FOR MOVIES
-    seen_movie_keys = set()
+    # manifest of the previous run (SQLite); migrates a legacy manifest.json once
+    store = StateStore.open(state_dir)
+    try:
+        store.import_manifest_json(state_dir / "manifest.json")
 
-    # collect LiveTV entries for M3U export
-    livetv_m3u_entries = []
+        now = int(time.time())
+        try:
+            verified_at = int(store.get_meta("verified_at") or 0)
+        except Exception:
+            verified_at = 0
+        # journal left behind by an interrupted run: .strm files it already wrote/compared
+        journaled = store.journal_entries()
+
+        has_manifest = store.manifest_count() > 0
+        # verified_at 0: never verified or reset by /api/cleanup -> due even with the interval off
+        verify_due = not verified_at or (
+            bool(verify_interval_hours) and now - verified_at >= verify_interval_hours * 3600
+        )
+        trusted = bool(trust_manifest) and not verify and has_manifest and not verify_due
+
+        # picon support: /output/picons (inside out_dir)
+        picon_dir = out_dir / "picons"
+        picons = PiconCache(picon_dir, state_dir, file_stats)
+
+        # everything besides the entry itself that decides its target/artwork
+        delta_fp = sha256(json.dumps(
+            {
+                "allow": allow_cfg or {},
+                "livetv_export": (livetv_export or "strm").lower(),
+                "artwork_mode": artwork_mode,
+                "picons": picons.fingerprint,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        ))
+        delta = (
+            bool(incremental)
+            and not verify
+            and not verify_due
+            and has_manifest
+            and store.get_meta("delta_fingerprint") == delta_fp
+        )
+        previous = store.manifest_signatures() if delta else {}
+        if previous:
+            # the same url in several groups means several files, but the manifest keeps one row
+            # per key -> such keys are processed like in a full run instead of carried over
+            seen_keys = set()
+            for e in entries:
+                if e.key in seen_keys:
+                    previous.pop(e.key, None)
+                seen_keys.add(e.key)
+        track_written = trusted or bool(journaled)
+        timer.end(ph)
+
+        counts_lock = threading.Lock()
+        counts = {"created": 0, "updated": 0}
+        pool = WritePool(write_workers)
+
+        def pipeline(items):
+            """
+            Processes the entries of ONE kind (LiveTV, Movies or Series; they write to disjoint
+            subtrees) with its own state.db connection and journal. Returns the manifest rows
+            to stage as (playlist index, key, row), with row None for carried-over keys.
+            """
+            t_start = time.perf_counter()
+            pstore = StateStore.open(state_dir)
+
+            # delta: paths (re)written by processed items of this run or by an interrupted one
+            written_paths = set(journaled) if delta else set()
+            # trusted mode / resume: path -> url written during this run (last writer wins, like on disk)
+            written_urls = {}
+
+            # write-ahead journal: a write is only started after its intent row (path, None) is in
+            # state.db; its completion row (path, url) follows with the next checkpoint
+            journal_lock = threading.Lock()
+            journal_buf = []  # completion rows (filled by the writer threads)
+            pending = []  # (target, job, done, writes_strm) waiting for their intent row
+            last_checkpoint = time.monotonic()
+
+            def checkpoint():
+                nonlocal last_checkpoint
+                with journal_lock:
+                    rows = journal_buf[:]
+                    journal_buf.clear()
+                rows += [(str(target), None) for target, _, _, w in pending if w]
+                pstore.append_journal(rows)
+                jobs = pending[:]
+                pending.clear()
+                for target, job, done, _ in jobs:
+                    pool.submit(target.parent, job, done)
+                last_checkpoint = time.monotonic()
+
+            def queue_write(target: Path, url: str, artwork: Path = None):
+                """Queues the .strm (+ LiveTV poster/backdrop) of one item on the writer pool."""
+                t = str(target)
+                if delta:
+                    written_paths.add(t)
+                existed, old_url = pstore.manifest_lookup(t)
+                write = True
+                if t in written_urls:
+                    write = written_urls[t] != url
+                elif t in journaled:
+                    # written (or compared) by the interrupted run -> no need to read it again
+                    write = journaled[t] is None or journaled[t] != url
+                elif trusted:
+                    write = old_url != url
+                if track_written:
+                    # the queued write makes this the on-disk content
+                    written_urls[t] = url
+                if not write and artwork is None:
+                    return
+
+                def job():
+                    changed = write_strm(target, url, file_stats) if write else False
+                    # copy best picon to poster.png AND backdrop.png in the same channel folder
+                    if artwork is not None:
+                        try:
+                            place_artwork(target.parent / "poster.png", artwork, artwork_mode, file_stats)
+                            place_artwork(target.parent / "backdrop.png", artwork, artwork_mode, file_stats)
+                        except Exception:
+                            pass
+                    return changed
+
+                def done(changed):
+                    if changed:
+                        with counts_lock:
+                            counts["updated" if existed else "created"] += 1
+                    if write:
+                        with journal_lock:
+                            journal_buf.append((t, url))
+
+                pending.append((target, job, done, write))
+
+            staged = []
+            res = {"staged": staged, "skipped": 0, "carried": 0, "livetv_m3u_entries": [], "items": len(items)}
+
+            # DEDUPE ONLY FOR MOVIES
+            seen_movie_keys = set()
+
+            try:
+                for n, (idx, e) in enumerate(items, 1):
+                    if len(pending) >= JOURNAL_CHECKPOINT_OPS or time.monotonic() - last_checkpoint >= JOURNAL_CHECKPOINT_SECS:
+                        checkpoint()
+                    if n % PROGRESS_EVERY == 0:
+                        timer.advance(PROGRESS_EVERY)
+
+                    url = e.url
+                    group = e.group
+                    tvg_name = e.tvg_name
+                    kind = e.kind
+
+                    show = e.show
+                    season = e.season
+                    epn = e.episode
+
+                    prev = previous.get(e.key) if delta else None
+                    if prev is not None and prev[0] == (kind, group, tvg_name, show, season, epn) and prev[1] not in written_paths:
+                        # unchanged since the last run (and its file not overwritten by an earlier item of this run)
+                        # -> file/manifest row stay as they are
+                        if kind == "movie":
+                            mkey = movie_dedupe_key(tvg_name)
+                            if mkey and mkey in seen_movie_keys:
+                                continue
+                            if mkey:
+                                seen_movie_keys.add(mkey)
+                        staged.append((idx, e.key, None))
+                        res["carried"] += 1
+                        continue
 
-    for it in parse_m3u(m3u_text):
-        attrs = it["attrs"]
-        url = it["url"]
-        title = it["title"]
-        group = attrs.get("group-title") or "Ungrouped"
-        tvg_name = attrs.get("tvg-name") or title
+                    if kind == "series":
+                        if not allow.allows("series", group, tvg_name, show):
+                            res["skipped"] += 1
+                            continue
+
+                        target = series_target(out_dir, show, season, epn)
+
+                        queue_write(target, url)
+
+                        staged.append((idx, e.key, {
+                            "kind": kind,
+                            "group": group,
+                            "tvg_name": tvg_name,
+                            "path": str(target),
+                            "url": url,
+                            "show": show,
+                            "season": season,
+                            "episode": epn,
+                        }))
+
+                    elif kind == "movie":
+                        if not allow.allows("movie", group, tvg_name, None):
+                            res["skipped"] += 1
+                            continue
+
+                        mkey = movie_dedupe_key(tvg_name)
+                        if mkey and mkey in seen_movie_keys:
+                            continue
+                        if mkey:
+                            seen_movie_keys.add(mkey)
+
+                        target = movie_target(out_dir, group, tvg_name)
+
+                        queue_write(target, url)
+
+                        staged.append((idx, e.key, {
+                            "kind": kind,
+                            "group": group,
+                            "tvg_name": tvg_name,
+                            "path": str(target),
+                            "url": url,
+                            "show": show,
+                            "season": season,
+                            "episode": epn,
+                        }))
+
+                    else:
+                        # -------- LiveTV --------
+                        if not allow.allows("livetv", group, tvg_name, None):
+                            res["skipped"] += 1
+                            continue
+
+                        # Cleaned visible name (no DE:/AT| etc.)
+                        disp_name = clean_livetv_display_name(tvg_name) or tvg_name
+
+                        # Find picon once
+                        logo_rel = None
+                        best = None
+                        if picons:
+                            best = picons.find(tvg_name)
+                            if best is not None:
+                                # store relative path for manifest / m3u usage
+                                try:
+                                    logo_rel = str(best.relative_to(out_dir)).replace("\\", "/")
+                                except Exception:
+                                    # if picons are somewhere else, fallback to just filename in picons/
+                                    logo_rel = f"picons/{best.name}"
+
+                        if (livetv_export or "strm").lower() == "m3u":
+                            # collect entry for m3u output
+                            res["livetv_m3u_entries"].append({
+                                "group": group,
+                                "tvg_name": tvg_name,
+                                "display_name": disp_name,
+                                "url": url,
+                                "logo_rel": logo_rel,
+                            })
+                            # still put something into manifest so old LiveTV STRM files get removed if switching export mode
+                            # (we won't create any new LiveTV .strm paths)
+                            continue
+
+                        # default: create STRM + poster/backdrop in folder
+                        target = livetv_target(out_dir, group, tvg_name)
+
+                        queue_write(target, url, artwork=best)
+
+                        staged.append((idx, e.key, {
+                            "kind": "livetv",
+                            "group": group,
+                            "tvg_name": tvg_name,
+                            "path": str(target),
+                            "url": url,
+                            "show": None,
+                            "season": None,
+                            "episode": None,
+                        }))
+
+                timer.advance(len(items) % PROGRESS_EVERY)
+                # submit the rest; completion rows of writes still running are flushed by finish()
+                checkpoint()
+            except BaseException:
+                pstore.close()
+                raise
+
+            def finish():
+                """After pool.close(): journal the last completions, release the connection."""
+                try:
+                    checkpoint()
+                finally:
+                    pstore.close()
+
+            res["finish"] = finish
+            res["seconds"] = round(time.perf_counter() - t_start, 4)
+            return res
+
+        ph = timer.begin("pipelines", len(entries))
+        # split by kind (playlist order kept inside each pipeline)
+        by_kind = {"livetv": [], "movie": [], "series": []}
+        for idx, e in enumerate(entries):
+            by_kind.get(e.kind, by_kind["livetv"]).append((idx, e))
+
+        results = []
+        error = None
+        if parallel:
+            with ThreadPoolExecutor(max_workers=len(by_kind)) as ex:
+                futures = [ex.submit(pipeline, items) for items in by_kind.values()]
+            for f in futures:
+                try:
+                    results.append(f.result())
+                except BaseException as exc:
+                    error = error or exc
+        else:
+            for items in by_kind.values():
+                try:
+                    results.append(pipeline(items))
+                except BaseException as exc:
+                    error = exc
+                    break
 
-        kind = classify_item(url, group, tvg_name, title)
+        # all queued .strm/artwork writes must be done before counting and deleting
+        try:
+            pool.close()
+        finally:
+            for r in results:
+                r["finish"]()
+        if error is not None:
+            raise error
+        # per-kind processing time (pipelines overlap; writes still queued at the end are not included)
+        ph["kinds"] = {k: {"items": r["items"], "seconds": r["seconds"]} for k, r in zip(by_kind, results)}
+        timer.end(ph)
+
+        # merge: stage the manifest rows in playlist order (same key twice -> last one wins, like before)
+        ph = timer.begin("merge")
+        store.begin_manifest_run()
+        skipped = 0
+        carried = 0
+        livetv_m3u_entries = []
+        for r in results:
+            skipped += r["skipped"]
+            carried += r["carried"]
+            livetv_m3u_entries.extend(r["livetv_m3u_entries"])
+        for _, key, row in heapq.merge(*(r["staged"] for r in results), key=lambda x: x[0]):
+            if row is None:
+                store.keep_manifest_item(key)
+            else:
+                store.stage_manifest_item(key, row)
+        ph["items"] = sum(len(r["staged"]) for r in results)
+        timer.end(ph)
+
+        # --- LiveTV M3U output (rewrite each run) ---
+        if (livetv_export or "strm").lower() == "m3u":
+            ph = timer.begin("livetv_m3u", len(livetv_m3u_entries))
+            m3u_path = out_dir / "LiveTV.m3u"
+        
 
-        show = None
-        season = None
-        epn = None
+            livetv_m3u_entries.sort(key=lambda x: (
+                (x.get("group") or "").lower(),
+                (x.get("display_name") or "").lower()
+            ))
 
-        if kind == "series":
-            show, season, epn, _ = extract_show_season_episode(tvg_name)
-            if not show:
-                show = clean_lang_tags(tvg_name)
-                season, epn = 0, 0
+            lines = ["#EXTM3U"]
+            chno = 1001  # start
 
-            if not allow_item("series", group, tvg_name, show, allow_cfg):
-                skipped += 1
-                continue
+            for e in livetv_m3u_entries:
+                grp_raw = e.get("group") or "Ungrouped"
+                tvg_raw = e.get("tvg_name") or e.get("display_name") or ""
+                url = (e.get("url") or "").strip()
+                if not url:
+                    continue
 
-            show_dir = safe_name(show)
-            season_dir = f"Season {int(season):02d}"
-            base = f"{show} - S{int(season):02d}E{int(epn):02d}"
-            target = out_dir / "Series" / show_dir / season_dir / (safe_name(base) + ".strm")
+                # cleaned display + tvg-name
+                disp = clean_livetv_display_name(tvg_raw) or tvg_raw.strip()
+                tvg = disp
 
-            desired_paths.add(str(target))
-            key = sha256(url)
+                grp = _m3u_escape_attr(grp_raw)
+                tvg = _m3u_escape_attr(tvg)
 
-            changed = write_strm(target, url)
-            if changed:
-                if str(target) in old_paths:
-                    updated += 1
+                logo_abs = None
+            
+                if e.get("logo_rel"):
+                    logo_abs = (path_jelly_pincon / e["logo_rel"]).as_posix()
+
+                if logo_abs:
+                    logo_abs = _m3u_escape_attr(logo_abs)
+                    extinf = (
+                        f'#EXTINF:-1 tvg-name="{tvg}" tvg-chno="{chno}" '
+                        f'tvg-logo="{logo_abs}" group-title="{grp}",{disp}'
+                    )
                 else:
-                    created += 1
-
-            new_manifest["items"][key] = {
-                "kind": kind,
-                "group": group,
-                "tvg_name": tvg_name,
-                "path": str(target),
-                "url": url,
-                "show": show,
-                "season": season,
-                "episode": epn,
-            }
+                    extinf = (
+                        f'#EXTINF:-1 tvg-name="{tvg}" tvg-chno="{chno}" '
+                        f'group-title="{grp}",{disp}'
+                    )
 
-        elif kind == "movie":
-            if not allow_item("movie", group, tvg_name, None, allow_cfg):
-                skipped += 1
-                continue
-
-            mkey = movie_dedupe_key(tvg_name)
-            if mkey and mkey in seen_movie_keys:
-                continue
-            if mkey:
-                seen_movie_keys.add(mkey)
+                lines.append(extinf)
+                lines.append(url)
 
-            genre_dir = safe_name(group.replace("/", "_"))
-            target = out_dir / "Movies" / genre_dir / (safe_name(clean_lang_tags(tvg_name)) + ".strm")
+                chno += 1
 
-            desired_paths.add(str(target))
-            key = sha256(url)
+            changed = write_text_if_changed(m3u_path, "\n".join(lines) + "\n", file_stats)
 
-            changed = write_strm(target, url)
             if changed:
-                if str(target) in old_paths:
-                    updated += 1
+                if store.manifest_lookup(str(m3u_path))[0]:
+                    counts["updated"] += 1
                 else:
-                    created += 1
-
-            new_manifest["items"][key] = {
-                "kind": kind,
-                "group": group,
-                "tvg_name": tvg_name,
-                "path": str(target),
-                "url": url,
-                "show": show,
-                "season": season,
-                "episode": epn,
-            }
-
-        else:
-            # -------- LiveTV --------
-            if not allow_item("livetv", group, tvg_name, None, allow_cfg):
-                skipped += 1
-                continue
-
-            # Cleaned visible name (no DE:/AT| etc.)
-            disp_name = clean_livetv_display_name(tvg_name) or tvg_name
+                    counts["created"] += 1
+
+            store.stage_manifest_item(sha256("livetv_m3u_export"), {
+                "kind": "livetv_m3u",
+                "group": None,
+                "tvg_name": None,
+                "path": str(m3u_path),
+                "url": None,
+                "show": None,
+                "season": None,
+                "episode": None,
+            })
+            timer.end(ph)
+
+        # --- deletion (remove files that are no longer desired) ---
+        deleted = 0
+        sidecars_deleted = 0
+
+        ph = timer.begin("delete")
+        if sync_delete:
+            removed = store.removed_paths()
+            ph["items"] = len(removed)
+            # write-ahead: if the run dies while deleting, these paths are not trusted on resume
+            store.append_journal([(p, None) for p in removed])
+
+            # group removed .strm by directory -> every directory is listed/cleaned once
+            strm_by_dir = {}
+            for p_str in sorted(removed):
+                p = Path(p_str)
+                if p.suffix.lower() == ".strm":
+                    strm_by_dir.setdefault(p.parent, []).append(p)
 
-            # Find picon once
-            logo_rel = None
-            best = None
-            if picon_index:
-                best = find_best_picon(picon_index, tvg_name)
-                if best is not None:
-                    # store relative path for manifest / m3u usage
+                # also remove old LiveTV.m3u if switching away / disappeared
+                elif p.name.lower() == "livetv.m3u" and p.is_file():
                     try:
-                        logo_rel = str(best.relative_to(out_dir)).replace("\\", "/")
+                        p.unlink()
+                        file_stats.add(deleted=1)
+                        deleted += 1
                     except Exception:
-                        # if picons are somewhere else, fallback to just filename in picons/
-                        logo_rel = f"picons/{best.name}"
-
-            if (livetv_export or "strm").lower() == "m3u":
-                # collect entry for m3u output
-                livetv_m3u_entries.append({
-                    "group": group,
-                    "tvg_name": tvg_name,
-                    "display_name": disp_name,
-                    "url": url,
-                    "logo_rel": logo_rel,
-                })
-                # still put something into manifest so old LiveTV STRM files get removed if switching export mode
-                # (we won't create any new LiveTV .strm paths)
-                continue
+                        pass
 
-            # default: create STRM + poster/backdrop in folder
-            cat_dir = safe_name(group)
-            channel_folder = safe_name(channel_folder_from_name(tvg_name))
-            channel_dir = out_dir / "LiveTV" / cat_dir / channel_folder
-            target = channel_dir / (safe_name(disp_name) + ".strm")
+            for parent in sorted(strm_by_dir, key=lambda d: (-len(d.parts), str(d))):
+                timer.advance(len(strm_by_dir[parent]))
+                n = delete_strm_files(parent, strm_by_dir[parent], prune_sidecars=prune_sidecars, file_stats=file_stats)
+                if n:
+                    deleted += n
+                    sidecars_deleted += n
+                    remove_if_empty_dirs(parent, out_dir)
+        timer.end(ph)
+
+        ph = timer.begin("commit")
+        store.commit_manifest_run({
+            "generated_at": now,
+            "verified_at": verified_at if (trusted or delta) else now,
+            "delta_fingerprint": delta_fp,
+        })
+        picons.save()
+        timer.end(ph)
+    finally:
+        store.close()
+
+    res = {
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "skipped_not_allowed": skipped,
+        "deleted": deleted,
+        "sidecars_deleted": sidecars_deleted,
+        "livetv_export": (livetv_export or "strm"),
+        "trusted_manifest": trusted,
+        "incremental": delta,
+        "carried_over": carried,
+        "resumed": len(journaled),
+    }
+    if own_timer:
+        res["phases"] = timer.phases
+    return res
 
-            desired_paths.add(str(target))
-            key = sha256(url)
 
-            changed = write_strm(target, url)
-            if changed:
-                if str(target) in old_paths:
-                    updated += 1
-                else:
-                    created += 1
+# -------------------------
+# Plan (dry run)
+# -------------------------
+def plan_sync(
+    out_dir: Path,
+    allow_cfg: dict,
+    entries,
+    sync_delete: bool = True,
+    livetv_export: str = "strm",
+):
+    """
+    What run_sync would do, computed only from the parsed playlist, the allow config and
+    the stored manifest: no file is written, read or stat'ed in the output tree.
+    An existing target counts as "update" only if the manifest has a different url for it,
+    LiveTV.m3u (content unknown without rendering it) always as "update" when it exists.
+    Counts are per target file: items that collide on one path (last writer wins) count
+    once, while run_sync counts every write, so its created/updated can be higher.
+    Returns {"counts": {...}, "ops": [{"op", "kind", "path", "url"}]} (paths relative to out_dir).
+    """
+    allow = AllowMatcher(allow_cfg)
+    out_dir = Path(out_dir).resolve()
+    m3u_mode = (livetv_export or "strm").lower() == "m3u"
 
-            # copy best picon to poster.png AND backdrop.png in the same channel folder
-            if best is not None:
-                try:
-                    poster = target.parent / "poster.png"
-                    backdrop = target.parent / "backdrop.png"
-                    write_binary_if_changed(poster, best)
-                    write_binary_if_changed(backdrop, best)
-                except Exception:
-                    pass
-
-            new_manifest["items"][key] = {
-                "kind": "livetv",
-                "group": group,
-                "tvg_name": tvg_name,
-                "path": str(target),
-                "url": url,
-                "show": None,
-                "season": None,
-                "episode": None,
-            }
+    state_dir = out_dir / ".xtream_state"
+    manifest = {}
+    store = StateStore.open_readonly(state_dir)
+    if store is not None:
+        try:
+            manifest = store.manifest_paths()
+        finally:
+            store.close()
+    elif (state_dir / "manifest.json").exists():
+        # not migrated yet (run_sync does that on its first run)
+        try:
+            items = json.loads((state_dir / "manifest.json").read_text(encoding="utf-8")).get("items", {})
+            for v in items.values():
+                if isinstance(v, dict) and v.get("path"):
+                    manifest[v["path"]] = (v.get("kind"), v.get("url"))
+        except Exception:
+            manifest = {}
 
-    # --- LiveTV M3U output (rewrite each run) ---
-    if (livetv_export or "strm").lower() == "m3u":
-        m3u_path = out_dir / "LiveTV.m3u"
-        
+    def rel(p: str) -> str:
+        try:
+            return Path(p).relative_to(out_dir).as_posix()
+        except ValueError:
+            return p
 
-        livetv_m3u_entries.sort(key=lambda x: (
-            (x.get("group") or "").lower(),
-            (x.get("display_name") or "").lower()
-        ))
+    skipped = 0
+    seen_movie_keys = set()
+    planned = {}  # path -> (kind, url), last writer wins like on disk
 
-        lines = ["#EXTM3U"]
-        chno = 1001  # start
+    for e in entries:
+        kind = e.kind
+        group = e.group
+        tvg_name = e.tvg_name
 
-        for e in livetv_m3u_entries:
-            grp_raw = e.get("group") or "Ungrouped"
-            tvg_raw = e.get("tvg_name") or e.get("display_name") or ""
-            url = (e.get("url") or "").strip()
-            if not url:
+        if kind == "series":
+            if not allow.allows("series", group, tvg_name, e.show):
+                skipped += 1
                 continue
+            target = series_target(out_dir, e.show, e.season, e.episode)
+        elif kind == "movie":
+            if not allow.allows("movie", group, tvg_name, None):
+                skipped += 1
+                continue
+            mkey = movie_dedupe_key(tvg_name)
+            if mkey and mkey in seen_movie_keys:
+                continue
+            if mkey:
+                seen_movie_keys.add(mkey)
+            target = movie_target(out_dir, group, tvg_name)
+        else:
+            if not allow.allows("livetv", group, tvg_name, None):
+                skipped += 1
+                continue
+            if m3u_mode:
+                planned[str(out_dir / "LiveTV.m3u")] = ("livetv_m3u", None)
+                continue
+            target = livetv_target(out_dir, group, tvg_name)
 
-            # cleaned display + tvg-name
-            disp = clean_livetv_display_name(tvg_raw) or tvg_raw.strip()
-            tvg = disp
-
-            grp = _m3u_escape_attr(grp_raw)
-            tvg = _m3u_escape_attr(tvg)
-
-            logo_abs = None
-            
-            if e.get("logo_rel"):
-                logo_abs = (path_jelly_pincon / e["logo_rel"]).as_posix()
-
-            if logo_abs:
-                logo_abs = _m3u_escape_attr(logo_abs)
-                extinf = (
-                    f'#EXTINF:-1 tvg-name="{tvg}" tvg-chno="{chno}" '
-                    f'tvg-logo="{logo_abs}" group-title="{grp}",{disp}'
-                )
-            else:
-                extinf = (
-                    f'#EXTINF:-1 tvg-name="{tvg}" tvg-chno="{chno}" '
-                    f'group-title="{grp}",{disp}'
-                )
-
-            lines.append(extinf)
-            lines.append(url)
-
-            chno += 1
+        planned[str(target)] = (kind, e.url)
 
-        changed = write_text_if_changed(m3u_path, "\n".join(lines) + "\n")
-        desired_paths.add(str(m3u_path))
+    if m3u_mode:
+        # rewritten every run, even without allowed channels
+        planned.setdefault(str(out_dir / "LiveTV.m3u"), ("livetv_m3u", None))
 
-        if changed:
-            if str(m3u_path) in old_paths:
-                updated += 1
-            else:
-                created += 1
-
-        new_manifest["items"][sha256("livetv_m3u_export")] = {
-            "kind": "livetv_m3u",
-            "group": None,
-            "tvg_name": None,
-            "path": str(m3u_path),
-            "url": None,
-            "show": None,
-            "season": None,
-            "episode": None,
-        }
-
-    # --- deletion (remove files that are no longer desired) ---
-    deleted = 0
-    sidecars_deleted = 0
+    ops = []
+    counts = {"create": 0, "update": 0, "delete": 0, "unchanged": 0, "skipped_not_allowed": skipped}
+    for path, (kind, url) in planned.items():
+        if path not in manifest:
+            op = "create"
+        elif kind == "livetv_m3u" or manifest[path][1] != url:
+            op = "update"
+        else:
+            counts["unchanged"] += 1
+            continue
+        counts[op] += 1
+        ops.append({"op": op, "kind": kind, "path": rel(path), "url": url})
 
     if sync_delete:
-        removed = old_paths - desired_paths
-        for p_str in sorted(removed):
-            p = Path(p_str)
-            if p.exists() and p.is_file():
-                # remove .strm + related images
-                if p.suffix.lower() == ".strm":
-                    try:
-                        p.unlink()
-                        deleted += 1
-                    except Exception:
-                        continue
-
-                    try:
-                        delete_related_files_for_strm(p, prune_sidecars=prune_sidecars)
-                        sidecars_deleted += 1
-                    except Exception:
-                        pass
-
-                    remove_if_empty_dirs(p.parent, out_dir)
-
-                # also remove old LiveTV.m3u if switching away / disappeared
-                elif p.name.lower() == "livetv.m3u":
-                    try:
-                        p.unlink()
-                        deleted += 1
-                    except Exception:
-                        pass
-
-    manifest_path.write_text(json.dumps(new_manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        for path in sorted(manifest):
+            if path in planned:
+                continue
+            kind = manifest[path][0]
+            if not (path.lower().endswith(".strm") or kind == "livetv_m3u"):
+                continue
+            counts["delete"] += 1
+            ops.append({"op": "delete", "kind": kind, "path": rel(path), "url": manifest[path][1]})
 
-    return {
-        "created": created,
-        "updated": updated,
-        "skipped_not_allowed": skipped,
-        "deleted": deleted,
-        "sidecars_deleted": sidecars_deleted,
-        "livetv_export": (livetv_export or "strm"),
-    }
\ No newline at end of file
+    return {"counts": counts, "ops": ops}
@@ -0,0 +1 @@
+# Benchmarks on synthetic Xtream playlists (python -m bench.run)
@@ -0,0 +1,174 @@
+# bench/generate.py - synthetic Xtream m3u_plus playlists + picon directory for benchmarks
+import random
+import re
+import sys
+from pathlib import Path
+
+HOST = "http://xtream.example:8080"
+USER = "bench"
+PASS = "secret"
+
+COUNTRIES = ["DE", "AT", "CH", "UK", "US", "FR", "IT", "PL", "NL", "TR"]
+
+LIVE_GROUPS = [
+    "{c} | Sport", "{c} | Nachrichten", "{c} | Unterhaltung", "{c} | Kinder", "{c} | Dokumentation",
+    "{c} | Musik", "{c} | Regional", "{c} | HEVC", "{c} | Sky", "{c} | 4K UHD",
+]
+LIVE_CHANNELS = [
+    "RTL", "ZDF", "ARD Das Erste", "ProSieben", "Sat.1", "Kabel Eins", "VOX", "RTL Zwei", "Super RTL",
+    "Sky Sport 1", "Sky Sport 2", "Sky Sport Bundesliga", "Sky Cinema Premieren", "Sky Atlantic", "DAZN 1",
+    "DAZN 2", "Eurosport 1", "Eurosport 2", "Sport1", "n-tv", "WELT", "Phoenix", "3sat", "arte", "KiKA",
+    "Nickelodeon", "Disney Channel", "Cartoon Network", "Comedy Central", "MTV", "DMAX", "Tele 5",
+    "ORF 1", "ORF 2", "ORF III", "ServusTV", "SRF 1", "SRF zwei", "BBC One", "BBC Two", "ITV", "Channel 4",
+    "CNN", "Discovery Channel", "National Geographic", "History", "Animal Planet", "TLC", "Sixx", "ProSieben Maxx",
+]
+LIVE_SUFFIXES = ["", " HD", " FHD", " UHD", " 4K", " HEVC", " (DE)", " HD+", " RAW", " SD"]
+
+MOVIE_GROUPS = [
+    "{c} | Action", "{c} | Komödie", "{c} | Drama", "{c} | Horror", "{c} | Thriller", "{c} | Kinder & Familie",
+    "{c} | Science Fiction", "{c} | Dokumentarfilm", "{c} | Neu im Kino", "{c} | 4K Filme",
+]
+SERIES_GROUPS = [
+    "{c} | Netflix Serien", "{c} | Amazon Serien", "{c} | Disney+ Serien", "{c} | Sky Serien",
+    "{c} | Anime Serien", "{c} | Doku Serien", "{c} | Sitcom Serien", "{c} | Krimi Serien",
+]
+WORDS = [
+    "Night", "Dark", "Last", "Lost", "Red", "Silent", "Black", "Iron", "Golden", "Wild", "Secret", "Broken",
+    "City", "River", "Storm", "Shadow", "Empire", "Kingdom", "Legacy", "Mission", "Island", "Winter",
+    "Summer", "Hunter", "Protocol", "Code", "Station", "Frontier", "Signal", "Horizon", "Echo", "Blood",
+    "Stone", "Fire", "Ice", "Sky", "Sea", "Ghost", "Machine", "Garden", "House", "Road", "Line", "Zero",
+]
+LANG_TAGS = ["", "", "", " (DE)", " (EN)", " (GER)"]
+EPISODE_FORMATS = ["{show} S{s:02d} E{e:02d}", "{show} S{s:02d}E{e:02d}", "{show} - S{s:02d}E{e:02d} - {title}", "{show} {s}x{e:02d}"]
+
+# default mix of a typical provider list
+MIX = {"livetv": 0.10, "movie": 0.35, "series": 0.55}
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def parse_size(s) -> int:
+    """'10k' / '100k' / '1m' / '250000' -> number of entries."""
+    t = str(s).strip().lower()
+    if t in SIZES:
+        return SIZES[t]
+    m = re.fullmatch(r"(\d+)\s*([km]?)", t)
+    if not m:
+        raise ValueError(f"bad size: {s}")
+    return int(m.group(1)) * {"": 1, "k": 1000, "m": 1_000_000}[m.group(2)]
+
+
+def _title(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def live_channel_names(count: int, seed: int = 1):
+    """The distinct LiveTV channel base names used by a playlist (shared with generate_picons)."""
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        base = LIVE_CHANNELS[i % len(LIVE_CHANNELS)]
+        n = i // len(LIVE_CHANNELS)
+        names.append(base if n == 0 else f"{base} {n + 1}" if rng.random() < 0.7 else f"{base} {_title(rng, 1)}")
+    return names
+
+
+def iter_playlist_lines(n: int, seed: int = 1, mix: dict = None):
+    """Yields the lines of an m3u_plus playlist with `n` entries (live / VOD .mp4/.mkv / series)."""
+    rng = random.Random(seed)
+    mix = mix or MIX
+    p_live = mix.get("livetv", 0)
+    p_movie = p_live + mix.get("movie", 0)
+
+    channels = live_channel_names(max(50, min(5000, n // 40)), seed)
+    shows = [_title(rng, rng.randint(1, 3)) + rng.choice(LANG_TAGS) for _ in range(max(20, n // 200))]
+
+    yield "#EXTM3U"
+    for i in range(n):
+        stream_id = 100000 + i
+        r = rng.random()
+        c = rng.choice(COUNTRIES[:4]) if rng.random() < 0.8 else rng.choice(COUNTRIES)
+
+        if r < p_live:
+            name = f"{c}: {rng.choice(channels)}{rng.choice(LIVE_SUFFIXES)}"
+            group = rng.choice(LIVE_GROUPS).format(c=c)
+            logo = f"{HOST}/images/{stream_id}.png" if rng.random() < 0.6 else ""
+            url = f"{HOST}/live/{USER}/{PASS}/{stream_id}.ts"
+            yield (
+                f'#EXTINF:-1 tvg-id="{name.lower().replace(" ", ".")}" tvg-name="{name}" '
+                f'tvg-logo="{logo}" group-title="{group}",{name}'
+            )
+        elif r < p_movie:
+            name = f"{c} - {_title(rng, rng.randint(1, 4))} ({rng.randint(1960, 2025)}){rng.choice(LANG_TAGS)}"
+            group = rng.choice(MOVIE_GROUPS).format(c=c)
+            ext = "mp4" if rng.random() < 0.55 else "mkv"
+            url = f"{HOST}/movie/{USER}/{PASS}/{stream_id}.{ext}"
+            yield f'#EXTINF:-1 tvg-id="" tvg-name="{name}" tvg-logo="{HOST}/posters/{stream_id}.jpg" group-title="{group}",{name}'
+        else:
+            show = rng.choice(shows)
+            name = f"{c} - " + rng.choice(EPISODE_FORMATS).format(
+                show=show, s=rng.randint(1, 12), e=rng.randint(1, 24), title=_title(rng, 2)
+            )
+            group = rng.choice(SERIES_GROUPS).format(c=c)
+            url = f"{HOST}/series/{USER}/{PASS}/{stream_id}.mkv"
+            yield f'#EXTINF:-1 tvg-id="" tvg-name="{name}" tvg-logo="{HOST}/covers/{stream_id}.jpg" group-title="{group}",{name}'
+
+        if rng.random() < 0.02:
+            yield "#EXTVLCOPT:http-user-agent=Mozilla/5.0"
+        yield url
+
+
+def generate_playlist(path: Path, n: int, seed: int = 1, mix: dict = None) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for ln in iter_playlist_lines(n, seed, mix):
+            f.write(ln)
+            f.write("\n")
+    return path
+
+
+# smallest valid PNG (1x1) - contents do not matter for matching, only names/sizes
+_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+def generate_picons(picon_dir: Path, count: int = 300, seed: int = 1) -> Path:
+    """
+    Picon directory in the usual naming styles ("rtlhd.png", "sky-sport-1.png",
+    "ZDF_HD.png", ...) for the channel names of the generated playlists.
+    """
+    picon_dir = Path(picon_dir)
+    picon_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    for name in live_channel_names(count, seed):
+        style = rng.randrange(4)
+        if style == 0:
+            fn = re.sub(r"[^a-z0-9]", "", name.lower()) + "hd.png"
+        elif style == 1:
+            fn = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") + ".png"
+        elif style == 2:
+            fn = re.sub(r"\W+", "_", name).strip("_") + "_HD.png"
+        else:
+            fn = name + ".png"
+        (picon_dir / fn).write_bytes(_PNG)
+    return picon_dir
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if len(argv) < 2:
+        print("usage: python -m bench.generate <size: 10k|100k|1m|N> <out.m3u> [picon_dir]")
+        return 2
+    n = parse_size(argv[0])
+    generate_playlist(Path(argv[1]), n)
+    if len(argv) > 2:
+        generate_picons(Path(argv[2]))
+    print(f"{n} entries -> {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
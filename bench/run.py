@@ -0,0 +1,259 @@
+# bench/run.py - times the hot paths on synthetic playlists, JSON output for regression checks
+#
+#   python -m bench.run                          # 10k + 100k, table on stdout
+#   python -m bench.run --sizes 10k,100k,1m --json bench.json
+#   python -m bench.run --compare bench.json     # ratio against an earlier run, exit 1 on regression
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.metrics import current_rss_bytes, peak_rss_bytes
+
+from .generate import generate_playlist, generate_picons, parse_size
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# run_sync allow-list that selects everything of the generated playlists
+ALLOW_ALL = {
+    "livetv": {"categories": ["re:."], "titles": [], "full_categories": []},
+    "movies": {"categories": ["re:."], "titles": [], "full_categories": []},
+    "series": {"shows": ["re:."], "titles": []},
+}
+
+
+class StagePeak:
+    """
+    Peak RSS of one stage, not of the process so far: VmHWM if the stage raised the
+    process high-water mark (exact), else the highest VmRSS sampled every `interval`
+    seconds while it ran. Without /proc (macOS) only the process peak is known.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        if rss is not None:
+            self.peak = max(self.peak or 0, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._hwm = peak_rss_bytes()
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        hwm = peak_rss_bytes()
+        if self.peak is None or hwm > self._hwm:
+            self.peak = hwm
+
+    def mb(self) -> float:
+        return round(self.peak / (1 << 20), 1)
+
+
+def git_rev() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip()
+    except Exception:
+        return ""
+
+
+def log(msg: str):
+    # progress goes to stderr so that --json - stays parseable
+    print(msg, file=sys.stderr, flush=True)
+
+
+def timed(results: list, size: str, stage: str, fn, items: int = None, repeat: int = 1):
+    """Runs fn `repeat` times, records the best wall time; returns the last result."""
+    best = None
+    res = None
+    peak = 0
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        with StagePeak() as mem:
+            t0 = time.perf_counter()
+            res = fn()
+            dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+        peak = max(peak, mem.mb())
+    n = items(res) if callable(items) else items
+    row = {
+        "size": size, "stage": stage, "seconds": round(best, 4), "items": n,
+        "peak_rss_mb": peak, "process_peak_rss_mb": round(peak_rss_bytes() / (1 << 20), 1),
+    }
+    if n:
+        row["items_per_s"] = round(n / best) if best > 0 else None
+    results.append(row)
+    log(f"  {stage:<24} {best:9.3f}s  {n or '':>9}  {row.get('items_per_s') or '':>10}/s  rss {row['peak_rss_mb']} MiB")
+    return res
+
+
+def bench_size(size: str, work: Path, args, results: list):
+    from app.m3u_core import parse_m3u, parse_playlist_file, build_catalog
+    from app.sync_core import run_sync, build_picon_index, find_best_picon, PiconMatcher
+
+    n = parse_size(size)
+    playlist = work / f"playlist_{size}.m3u"
+    out_dir = work / f"out_{size}"
+    picon_dir = out_dir / "picons"
+
+    t0 = time.perf_counter()
+    generate_playlist(playlist, n, seed=args.seed)
+    generate_picons(picon_dir, args.picons, seed=args.seed)
+    log(f"[{size}] {n} entries, {playlist.stat().st_size >> 20} MiB, generated in {time.perf_counter() - t0:.1f}s")
+
+    text = playlist.read_text(encoding="utf-8", errors="ignore")
+    timed(results, size, "parse_m3u", lambda: list(parse_m3u(text)), items=len, repeat=args.repeat)
+    del text
+
+    entries = timed(results, size, "parse_playlist_file", lambda: parse_playlist_file(playlist), items=len, repeat=args.repeat)
+    timed(results, size, "build_catalog", lambda: build_catalog(entries=entries), items=len(entries), repeat=args.repeat)
+
+    try:
+        from app.main import _build_playlist_snapshot
+    except Exception as e:
+        # app.main needs the web dependencies (requirements.txt)
+        log(f"  _build_playlist_snapshot skipped: {e}")
+        results.append({"size": size, "stage": "_build_playlist_snapshot", "skipped": str(e)})
+    else:
+        timed(results, size, "_build_playlist_snapshot", lambda: _build_playlist_snapshot(entries=entries), items=len(entries), repeat=args.repeat)
+
+    # picon matching: distinct LiveTV names, as run_sync sees them
+    names = list(dict.fromkeys(e.tvg_name for e in entries if e.kind == "livetv"))[: args.picon_sample]
+    index = timed(results, size, "build_picon_index", lambda: build_picon_index(picon_dir), items=len)
+    timed(results, size, "find_best_picon", lambda: [find_best_picon(index, nm) for nm in names], items=len(names), repeat=args.repeat)
+
+    def matcher_find():
+        m = PiconMatcher(index)
+        return [m.find(nm) for nm in names]
+
+    timed(results, size, "PiconMatcher.find", matcher_find, items=len(names), repeat=args.repeat)
+
+    if args.no_sync:
+        return
+
+    def sync(**kw):
+        return run_sync(
+            "", out_dir, ALLOW_ALL, entries=entries, path_jelly_pincon=picon_dir,
+            write_workers=args.write_workers, **kw,
+        )
+
+    # first run creates every file, the second one is the steady state (nothing changed)
+    timed(results, size, "run_sync", lambda: sync(), items=len(entries))
+    timed(results, size, "run_sync (unchanged)", lambda: sync(), items=len(entries))
+    timed(results, size, "run_sync (trusted)", lambda: sync(trust_manifest=True), items=len(entries))
+    timed(results, size, "run_sync (incremental)", lambda: sync(incremental=True), items=len(entries))
+
+    if not args.keep:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        playlist.unlink(missing_ok=True)
+
+
+def compare(results: list, baseline_path: Path, threshold: float) -> int:
+    """
+    Prints current/baseline per (size, stage); returns the number of regressions above
+    threshold (wall time, and the stage's own peak RSS).
+    """
+    base = json.loads(baseline_path.read_text(encoding="utf-8"))
+    old = {(r["size"], r["stage"]): r for r in base.get("results", []) if "seconds" in r}
+    bad = 0
+    log(f"\ncompare with {baseline_path} ({base.get('meta', {}).get('git', '?')}), threshold x{threshold}")
+    for r in results:
+        o = old.get((r["size"], r["stage"]))
+        if not o or "seconds" not in r or not o["seconds"]:
+            continue
+        ratio = r["seconds"] / o["seconds"]
+        flag = ""
+        # sub-10ms stages are mostly noise
+        if ratio > threshold and r["seconds"] - o["seconds"] > 0.01:
+            flag = "  REGRESSION"
+            bad += 1
+        mem = ""
+        if o.get("peak_rss_mb") and r.get("peak_rss_mb"):
+            mem_ratio = r["peak_rss_mb"] / o["peak_rss_mb"]
+            mem = f"  rss {o['peak_rss_mb']} -> {r['peak_rss_mb']} MiB"
+            # below 16 MiB the interpreter/allocator noise dominates
+            if mem_ratio > threshold and r["peak_rss_mb"] - o["peak_rss_mb"] > 16:
+                mem += "  MEMORY REGRESSION"
+                bad += 1
+        log(f"  {r['size']:>6} {r['stage']:<24} {o['seconds']:9.3f}s -> {r['seconds']:9.3f}s  x{ratio:.2f}{flag}{mem}")
+    return bad
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m bench.run", description="Benchmarks on synthetic Xtream playlists")
+    ap.add_argument("--sizes", default="10k,100k", help="comma separated: 10k,100k,1m or entry counts")
+    ap.add_argument("--picons", type=int, default=300, help="number of synthetic picon files")
+    ap.add_argument("--picon-sample", type=int, default=200, help="channel names matched in the picon stages")
+    ap.add_argument("--repeat", type=int, default=1, help="repetitions of the in-memory stages (best time counts)")
+    ap.add_argument("--write-workers", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--no-sync", action="store_true", help="skip the run_sync stages (no files written)")
+    ap.add_argument("--json", help="write the results as JSON to this file ('-' = stdout)")
+    ap.add_argument("--compare", help="earlier --json output to compare against")
+    ap.add_argument("--threshold", type=float, default=1.25, help="slowdown factor counted as regression")
+    ap.add_argument("--workdir", help="directory for playlists/output (default: temp dir)")
+    ap.add_argument("--keep", action="store_true", help="keep generated playlists and output")
+    args = ap.parse_args(argv)
+
+    work = Path(args.workdir or tempfile.mkdtemp(prefix="xtream-bench-")).resolve()
+    work.mkdir(parents=True, exist_ok=True)
+    # app.main resolves DATA_DIR/OUTPUT_DIR at import time -> never the real /data
+    os.environ.setdefault("DATA_DIR", str(work / "data"))
+    os.environ.setdefault("OUTPUT_DIR", str(work / "output"))
+    (work / "data").mkdir(exist_ok=True)
+
+    results = []
+    try:
+        for size in [s for s in args.sizes.split(",") if s.strip()]:
+            bench_size(size.strip(), work, args, results)
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(work, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "git": git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        log(f"\nresults -> {args.json}")
+
+    if args.compare:
+        return 1 if compare(results, Path(args.compare), args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+# Catalog summary: "selected" must count what run_sync would let through.
+import unittest
+
+from app.catalog_index import CatalogIndex
+from app.m3u_core import build_catalog, parse_playlist
+from app.sync_core import AllowMatcher
+from tests.util import ALLOW_SOME, generated_entries, playlist
+
+ALLOW_MIXED = {
+    "livetv": {"categories": ["glob:DE | *"], "titles": ["glob:*HD 1*"], "full_categories": ["re:^AT "]},
+    "movies": {"categories": [], "titles": ["re:(?i)^the "], "full_categories": ["re:Action"]},
+    "series": {"shows": ["re:^[A-C]"], "titles": ["glob:*S01*E02*"]},
+}
+
+
+class CatalogSummaryTest(unittest.TestCase):
+    def test_selected_matches_allow_rules(self):
+        entries = parse_playlist(playlist(generated_entries(3000, seed=4)))
+        index = CatalogIndex(build_catalog(entries=entries))
+        for allow in (ALLOW_SOME, ALLOW_MIXED):
+            matcher = AllowMatcher(allow)
+            expected = {"livetv": {}, "movies": {}, "series": {}}
+            for e in entries:
+                if e.kind == "series":
+                    key, sect = e.show, "series"
+                else:
+                    key, sect = e.group, "movies" if e.kind == "movie" else "livetv"
+                hit = matcher.allows(e.kind, e.group, e.tvg_name or e.title, e.show if e.kind == "series" else None)
+                expected[sect][key] = expected[sect].get(key, 0) + hit
+
+            summary = index.summary(allow)
+            got = {kind: {k: v["selected"] for k, v in summary[kind]["categories"].items()} for kind in ("livetv", "movies")}
+            got["series"] = {k: v["selected"] for k, v in summary["series"]["shows"].items()}
+            self.assertEqual(got, expected)
+            self.assertTrue(any(got["movies"].values()) and any(got["series"].values()))
+
+    def test_names_of_whole_kind(self):
+        index = CatalogIndex(build_catalog(entries=parse_playlist(playlist(generated_entries(500, seed=4)))))
+        for kind in ("livetv", "movies", "series"):
+            self.assertEqual(len(index.names(kind)), index.totals[kind])
+        self.assertIsNone(index.names("nope"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+# /api/cleanup removes output behind the manifest's back: the next run must bring it back.
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.sync_core import run_sync
+from tests.util import ALLOW_ALL, generated_entries, import_main, playlist, strm_tree
+
+
+class CleanupTest(unittest.TestCase):
+    def setUp(self):
+        self.main = import_main()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out_dir = Path(self.tmp.name).resolve() / "out"
+        cfg = self.main.load_config()
+        cfg["paths"]["out_dir"] = str(self.out_dir)
+        self.main.save_config(cfg)
+        self.client = TestClient(self.main.app)
+        self.text = playlist(generated_entries(1500, seed=8))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def cleanup(self, *targets):
+        r = self.client.post("/api/cleanup", json={"targets": list(targets)})
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.json()["deleted"])
+
+    def test_trusted_run_recreates_removed_output(self):
+        # verify_interval_hours=0: the interval alone would never force a verify run
+        kw = dict(trust_manifest=True, verify_interval_hours=0)
+        run_sync(self.text, self.out_dir, ALLOW_ALL, **kw)
+        self.assertTrue(run_sync(self.text, self.out_dir, ALLOW_ALL, **kw)["trusted_manifest"])
+        before = strm_tree(self.out_dir)
+        self.assertTrue(any(p.startswith("Movies/") for p in before))
+
+        self.cleanup("movies", "livetv")
+        self.assertFalse((self.out_dir / "Movies").exists())
+        r = run_sync(self.text, self.out_dir, ALLOW_ALL, **kw)
+        self.assertFalse(r["trusted_manifest"])
+        self.assertGreater(r["created"] + r["updated"], 0)
+        self.assertEqual(strm_tree(self.out_dir), before)
+        # verified again -> trusted from now on
+        self.assertTrue(run_sync(self.text, self.out_dir, ALLOW_ALL, **kw)["trusted_manifest"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+# Playlist download: gzip bodies are decoded completely or the cached playlist stays untouched.
+import gzip
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tests.util import generated_entries, import_main, playlist
+
+
+class _Handler(BaseHTTPRequestHandler):
+    body = b""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class GzipDownloadTest(unittest.TestCase):
+    def setUp(self):
+        self.main = import_main()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.cfg = self.main.load_config()
+        self.cfg["xtream"].update(base_url=f"http://127.0.0.1:{self.server.server_port}", username="u", password="p")
+        self.data = playlist(generated_entries(3000, seed=1)).encode("utf-8")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def download(self, body: bytes):
+        _Handler.body = body
+        return self.main.download_playlist(self.cfg)
+
+    def test_gunzip_members_and_chunking(self):
+        half = len(self.data) // 2
+        body = gzip.compress(self.data[:half]) + gzip.compress(self.data[half:])
+        for size in (1, 7, 4096, len(body)):
+            with self.subTest(chunk=size):
+                chunks = [body[i:i + size] for i in range(0, len(body), size)]
+                self.assertEqual(b"".join(self.main._gunzip(chunks)), self.data)
+
+    def test_multi_member_body(self):
+        half = len(self.data) // 2
+        res = self.download(gzip.compress(self.data[:half]) + gzip.compress(self.data[half:]))
+        self.assertEqual(res["size"], len(self.data))
+        self.assertEqual(self.main.PLAYLIST_PATH.read_bytes(), self.data)
+
+    def test_truncated_body_keeps_cached_playlist(self):
+        self.download(gzip.compress(self.data))
+        body = gzip.compress(b"#EXTM3U\n" + self.data[:1000])
+        for bad in (body[:-6], body[: len(body) // 2], body + b"garbage"):
+            with self.subTest(size=len(bad)):
+                with self.assertRaises(Exception):
+                    self.download(bad)
+                self.assertEqual(self.main.PLAYLIST_PATH.read_bytes(), self.data)
+                self.assertFalse(self.main.PLAYLIST_PATH.with_name("playlist.m3u.part").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
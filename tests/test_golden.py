@@ -0,0 +1,134 @@
+# Golden-output tests: the compiled classification engine against the original regex
+# implementation, and every sync mode against a plain sequential full run.
+import random
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.m3u_core import LANG_TAG_RE, classify_fields, is_series_group, parse_m3u, url_ext
+from app.sync_core import run_sync
+from bench.generate import generate_picons, iter_playlist_lines
+from tests.util import ALLOW_ALL, ALLOW_SOME, dict_diff, generated_entries, manifest_rows, mutate, playlist, strm_tree
+
+
+# -------------------------
+# Reference: classification as it was before the compiled engine
+# -------------------------
+def _ref_has_episode_pattern(s):
+    t = (s or "").lower()
+    return bool(re.search(r"(s\s*\d{1,2}\s*e\s*\d{1,2}|s\d{1,2}e\d{1,2}|\d{1,2}\s*x\s*\d{1,2})", t))
+
+
+def _ref_clean_lang_tags(s):
+    s = (s or "").strip()
+    s = re.sub(LANG_TAG_RE, "", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def _ref_extract_show_season_episode(raw_title):
+    title = (raw_title or "").strip()
+    for pattern in (
+        r"^(?P<show>.*?)[\s\-_:|.]*S\s*(?P<s>\d{1,2})\s*E\s*(?P<e>\d{1,2})[\s\-_:|.]*?(?P<ep>.*)$",
+        r"^(?P<show>.*?)[\s\-_:|.]*S(?P<s>\d{1,2})E(?P<e>\d{1,2})[\s\-_:|.]*?(?P<ep>.*)$",
+        r"^(?P<show>.*?)[\s\-_:|.]*?(?P<s>\d{1,2})\s*x\s*(?P<e>\d{1,2})[\s\-_:|.]*?(?P<ep>.*)$",
+    ):
+        m = re.search(pattern, title, flags=re.IGNORECASE)
+        if m:
+            show = _ref_clean_lang_tags(m.group("show").strip(" -_:|."))
+            ep_title = m.group("ep").strip(" -_:|.") or None
+            return show, int(m.group("s")), int(m.group("e")), ep_title
+    return None, None, None, None
+
+
+def _ref_classify(url, group, tvg_name, title):
+    if is_series_group(group) or _ref_has_episode_pattern(tvg_name) or _ref_has_episode_pattern(title):
+        show, season, epn, ep_title = _ref_extract_show_season_episode(tvg_name)
+        if not show:
+            return "series", _ref_clean_lang_tags(tvg_name), 0, 0, ep_title
+        return "series", show, int(season), int(epn), ep_title
+    return ("movie" if url_ext(url) in ("mkv", "mp4") else "livetv"), None, None, None, None
+
+
+TRICKY_NAMES = [
+    "Show S01E02", "Show s1e2 Title", "Show - S 01 E 02 - Pilot", "Show 1x02", "Show 12 x 3",
+    "S01E01", "1x1", "Show (DE) S02E03 (EN)", "Der Film 2x2 Kinder", "Show_S01.E02", "ſhow s01e02",
+    "Show S1 E", "Show SE01", "DE: Sky Sport 1 HD", "", "   ", "Title | S03E04 | Ep",
+]
+
+
+class ClassificationGoldenTest(unittest.TestCase):
+    def test_generated_playlist(self):
+        text = "\n".join(iter_playlist_lines(30000, seed=11))
+        n = 0
+        for it in parse_m3u(text):
+            attrs, title, url = it["attrs"], it["title"], it["url"]
+            group = attrs.get("group-title") or "Ungrouped"
+            tvg_name = attrs.get("tvg-name") or title
+            self.assertEqual(classify_fields(url, group, tvg_name, title), _ref_classify(url, group, tvg_name, title), tvg_name)
+            n += 1
+        self.assertEqual(n, 30000)
+
+    def test_tricky_names(self):
+        rng = random.Random(5)
+        groups = ["DE | Sport", "Netflix Serien", "TV Shows", "Ungrouped"]
+        urls = ["http://h/1.ts", "http://h/2.mkv", "http://h/3.MP4", "http://h/4"]
+        for name in TRICKY_NAMES:
+            for title in (name, rng.choice(TRICKY_NAMES)):
+                for group in groups:
+                    for url in urls:
+                        self.assertEqual(
+                            classify_fields(url, group, name, title), _ref_classify(url, group, name, title), (name, title)
+                        )
+
+
+# -------------------------
+# Sync: every mode gives the output tree of a plain sequential full run
+# -------------------------
+SYNC_MODES = {
+    "parallel": dict(),
+    "write_workers": dict(write_workers=4),
+    "trusted": dict(trust_manifest=True),
+    "incremental": dict(incremental=True),
+    "incremental_trusted_workers": dict(incremental=True, trust_manifest=True, write_workers=4),
+}
+
+
+class SyncGoldenTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        rng = random.Random(2)
+        entries = generated_entries(4000, seed=9)
+        next_id = [10 ** 6]
+        # first run, changed playlist, unchanged playlist
+        self.versions = [playlist(entries)]
+        self.versions.append(playlist(mutate(entries, rng, next_id)))
+        self.versions.append(self.versions[-1])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sync_all(self, name, allow, **kw):
+        out_dir = self.root / name
+        generate_picons(out_dir / "picons", count=120)
+        results = []
+        for text in self.versions:
+            r = run_sync(text, out_dir, allow, **kw)
+            results.append({k: r[k] for k in ("created", "updated", "deleted", "skipped_not_allowed")})
+        return strm_tree(out_dir), manifest_rows(out_dir), results
+
+    def test_modes_match_sequential_full_run(self):
+        for allow_name, allow in (("all", ALLOW_ALL), ("some", ALLOW_SOME)):
+            golden = self.sync_all("golden_" + allow_name, allow, parallel=False)
+            self.assertTrue(any(p.endswith(".strm") for p in golden[0]))
+            for mode, kw in SYNC_MODES.items():
+                with self.subTest(allow=allow_name, mode=mode):
+                    tree, manifest, results = self.sync_all(mode + "_" + allow_name, allow, **kw)
+                    self.assertEqual(dict_diff(tree, golden[0]), [])
+                    self.assertEqual(dict_diff(manifest, golden[1]), [])
+                    self.assertEqual(results, golden[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# Streaming/sharded parsing must split lines exactly like str.splitlines() (parse_m3u).
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.m3u_core import _parse_shard, classify_entries, iter_byte_lines, parse_m3u, parse_m3u_file, shard_ranges
+
+BREAKS = ["\n", "\r\n", "\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029"]
+
+
+def odd_playlist() -> str:
+    parts = ["#EXTM3U"]
+    for i in range(60):
+        br = BREAKS[i % len(BREAKS)]
+        parts.append(f'#EXTINF:-1 tvg-name="Ch {i} ü" group-title="DE | G{i % 4}",Ch {i}{br}http://h/live/u/p/{i}.ts')
+        if i % 7 == 0:
+            parts.append("")  # blank line
+    return "\n".join(parts) + "\r\n"
+
+
+class IterByteLinesTest(unittest.TestCase):
+    def test_matches_splitlines(self):
+        texts = [odd_playlist(), "a\r\nb\rc\x0c\nd", "x\x1c\n\ny\u2029", "no newline at end\r", "\n\n", "é\u2028"]
+        for text in texts:
+            data = text.encode("utf-8")
+            for chunk_size in (1, 2, 3, 7, 64, 1 << 20):
+                with self.subTest(text=text[:20], chunk_size=chunk_size):
+                    self.assertEqual(list(iter_byte_lines(io.BytesIO(data), chunk_size)), text.splitlines())
+
+    def test_cr_only_keeps_partial_line_small(self):
+        text = odd_playlist().replace("\r\n", "\r").replace("\n", "\r")
+        data = text.encode("utf-8")
+        self.assertNotIn(b"\n", data)
+        ends = []
+        for line in text.splitlines(keepends=True):
+            ends.append((ends[-1] if ends else 0) + len(line.encode("utf-8")))
+        for chunk_size in (1, 7, 64):
+            with self.subTest(chunk_size=chunk_size):
+                fp = io.BytesIO(data)
+                lines = []
+                for line in iter_byte_lines(fp, chunk_size):
+                    # read ahead of the yielded line: one partial line + one chunk, not the file
+                    self.assertLess(fp.tell() - ends[len(lines)], 200 + chunk_size)
+                    lines.append(line)
+                self.assertEqual(lines, text.splitlines())
+
+    def test_file_and_shards_match_parse_m3u(self):
+        text = odd_playlist()
+        expected = list(parse_m3u(text))
+        self.assertEqual(len(expected), 60)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "playlist.m3u"
+            path.write_bytes(text.encode("utf-8"))
+            for use_mmap in (False, True):
+                self.assertEqual(list(parse_m3u_file(path, chunk_size=5, use_mmap=use_mmap)), expected)
+            entries = []
+            for start, end in shard_ranges(path, 8):
+                entries.extend(_parse_shard((str(path), start, end)))
+            self.assertEqual([e.url for e in entries], [e.url for e in classify_entries(expected)])
+
+
+if __name__ == "__main__":
+    unittest.main()
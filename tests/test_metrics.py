@@ -0,0 +1,39 @@
+# File I/O counters belong to one RunTimer: concurrent runs must not see each other's files.
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from app.metrics import RunTimer
+from app.sync_core import run_sync
+from tests.util import ALLOW_ALL, generated_entries, playlist
+
+
+class RunTimerFilesTest(unittest.TestCase):
+    def test_concurrent_runs_count_separately(self):
+        text = playlist(generated_entries(1500, seed=6))
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            solo = RunTimer()
+            run_sync(text, root / "solo", ALLOW_ALL, timer=solo)
+
+            timers = [RunTimer() for _ in range(3)]
+            threads = [
+                threading.Thread(target=run_sync, args=(text, root / f"run{i}", ALLOW_ALL), kwargs={"timer": t})
+                for i, t in enumerate(timers)
+            ]
+            for th in threads:
+                th.start()
+            for th in threads:
+                th.join()
+
+        self.assertGreater(solo.files.snapshot()["written"], 0)
+        for t in timers:
+            self.assertEqual(t.files.snapshot(), solo.files.snapshot())
+        pipelines = next(p for p in solo.phases if p["name"] == "pipelines")
+        self.assertEqual(pipelines["files_written"], solo.files.snapshot()["written"])
+        self.assertGreater(pipelines["peak_rss_bytes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# Delta sync (incremental=True) must leave the same output tree as a full run.
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.sync_core import run_sync
+from fastapi.testclient import TestClient
+
+from tests.util import ALLOW_ALL, ALLOW_SOME, dict_diff, extinf, generated_entries, import_main, mutate, playlist, strm_tree
+
+
+class DeltaSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_same_as_full(self, versions, allow, **kw):
+        inc_dir, full_dir = self.root / "inc", self.root / "full"
+        for n, text in enumerate(versions):
+            r_inc = run_sync(text, inc_dir, allow, incremental=True, **kw)
+            r_full = run_sync(text, full_dir, allow, **kw)
+            self.assertEqual(dict_diff(strm_tree(inc_dir), strm_tree(full_dir)), [], f"version {n}")
+            for k in ("created", "updated", "deleted", "skipped_not_allowed"):
+                self.assertEqual(r_inc[k], r_full[k], f"version {n}: {k}")
+
+    def test_duplicate_url_in_two_groups(self):
+        url = "http://h/live/u/p/1.ts"
+        v1 = [(extinf("Sport1", "DE | Sport"), url), (extinf("Sport1 Sky", "DE | Sky"), url)]
+        v2 = v1 + [(extinf("ZDF", "DE | Sport"), "http://h/live/u/p/2.ts")]
+        v3 = [v2[0], v2[2]]
+        self.assert_same_as_full([playlist(v) for v in (v1, v2, v3)], ALLOW_ALL)
+        self.assertNotIn("LiveTV/DE _ Sky/Sport1 Sky/Sport1 Sky.strm", strm_tree(self.root / "inc"))
+
+    def test_after_cleanup(self):
+        # /api/cleanup must not leave the removed subtree to be carried over as if it existed
+        main = import_main()
+        out_dir = (self.root / "inc").resolve()
+        cfg = main.load_config()
+        cfg["paths"]["out_dir"] = str(out_dir)
+        main.save_config(cfg)
+        text = playlist(generated_entries(1500, seed=12))
+        for _ in range(2):
+            run_sync(text, out_dir, ALLOW_ALL, incremental=True, verify_interval_hours=0)
+        before = strm_tree(out_dir)
+
+        r = TestClient(main.app).post("/api/cleanup", json={"targets": ["series"]})
+        self.assertTrue(r.json()["deleted"])
+        res = run_sync(text, out_dir, ALLOW_ALL, incremental=True, verify_interval_hours=0)
+        self.assertFalse(res["incremental"])
+        self.assertEqual(dict_diff(strm_tree(out_dir), before), [])
+        self.assertTrue(run_sync(text, out_dir, ALLOW_ALL, incremental=True, verify_interval_hours=0)["incremental"])
+
+    def test_random_mutations(self):
+        for allow in (ALLOW_ALL, ALLOW_SOME):
+            with self.subTest(allow=allow is ALLOW_ALL and "all" or "some"):
+                self.tearDown()
+                self.setUp()
+                rng = random.Random(7)
+                entries = generated_entries(1500, seed=3)
+                next_id = [10 ** 6]
+                versions = []
+                for _ in range(6):
+                    versions.append(playlist(entries))
+                    entries = mutate(entries, rng, next_id)
+                self.assert_same_as_full(versions, allow)
+
+
+if __name__ == "__main__":
+    unittest.main()
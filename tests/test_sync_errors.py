@@ -0,0 +1,75 @@
+# A failing run must release its state.db connections and leave the next run working.
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app.state_store import StateStore
+from app.sync_core import run_sync
+from tests.util import ALLOW_ALL, generated_entries, import_main, playlist, strm_tree
+
+
+def open_state_fds(out_dir: Path) -> list:
+    fd_dir = Path("/proc/self/fd")
+    out = []
+    for fd in os.listdir(fd_dir):
+        try:
+            target = os.readlink(fd_dir / fd)
+        except OSError:
+            continue
+        if target.startswith(str(out_dir / ".xtream_state" / "state.db")):
+            out.append(target)
+    return out
+
+
+@unittest.skipUnless(Path("/proc/self/fd").is_dir(), "needs /proc")
+class FailedRunTest(unittest.TestCase):
+    def test_failure_closes_state_db(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out_dir = Path(tmp).resolve() / "out"
+            text = playlist(generated_entries(300, seed=3))
+            for method in ("begin_manifest_run", "commit_manifest_run"):
+                with self.subTest(fails=method):
+                    with mock.patch.object(StateStore, method, side_effect=RuntimeError("boom")):
+                        with self.assertRaises(RuntimeError):
+                            run_sync(text, out_dir, ALLOW_ALL)
+                    self.assertEqual(open_state_fds(out_dir), [])
+
+            run_sync(text, out_dir, ALLOW_ALL)
+            self.assertTrue(any(p.endswith(".strm") for p in strm_tree(out_dir)))
+            with StateStore.open(out_dir / ".xtream_state") as store:
+                self.assertGreater(store.manifest_count(), 0)
+            self.assertEqual(open_state_fds(out_dir), [])
+
+
+class KilledRunTest(unittest.TestCase):
+    def test_pending_journal_defeats_unchanged_check(self):
+        main = import_main()
+        with tempfile.TemporaryDirectory() as tmp:
+            out_dir = Path(tmp).resolve() / "out"
+            cfg = main.load_config()
+            cfg["paths"]["out_dir"] = str(out_dir)
+            cfg["sync"]["auto_refresh_playlist"] = False
+            cfg["allow"] = ALLOW_ALL
+            main.save_config(cfg)
+            main.PLAYLIST_PATH.write_text(playlist(generated_entries(300, seed=3)), encoding="utf-8")
+
+            main._sync_run("manual")
+            self.assertTrue(main._sync_run("manual")["result"]["unchanged"])
+
+            # a killed run: journal rows left behind, last_run.json untouched
+            victim = next(p for p in out_dir.rglob("*.strm"))
+            victim.unlink()
+            with StateStore.open(out_dir / ".xtream_state") as store:
+                store.append_journal([(str(victim), None)])
+            res = main._sync_run("manual")["result"]
+            self.assertFalse(res.get("unchanged"))
+            self.assertTrue(victim.exists())
+            with StateStore.open(out_dir / ".xtream_state") as store:
+                self.assertEqual(store.journal_count(), 0)
+            self.assertTrue(main._sync_run("manual")["result"]["unchanged"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+# tests/util.py - synthetic playlists and output-tree snapshots shared by the sync tests
+import os
+import random
+import tempfile
+from pathlib import Path
+
+from app.state_store import StateStore
+from bench.generate import iter_playlist_lines
+
+ALLOW_ALL = {
+    "livetv": {"categories": ["re:."], "titles": [], "full_categories": []},
+    "movies": {"categories": ["re:."], "titles": [], "full_categories": []},
+    "series": {"shows": ["re:."], "titles": []},
+}
+# some categories only, to get skipped items too
+ALLOW_SOME = {
+    "livetv": {"categories": ["glob:DE | *", "re:^AT "], "titles": [], "full_categories": []},
+    "movies": {"categories": ["re:Action|Drama"], "titles": [], "full_categories": []},
+    "series": {"shows": ["re:^[A-M]"], "titles": []},
+}
+
+
+def strm_tree(out_dir: Path) -> dict:
+    """relative .strm path -> content (plus the names of the other files, e.g. artwork)."""
+    tree = {}
+    for p in sorted(out_dir.rglob("*")):
+        if not p.is_file() or ".xtream_state" in p.parts:
+            continue
+        rel = str(p.relative_to(out_dir))
+        tree[rel] = p.read_text(encoding="utf-8") if p.suffix == ".strm" else None
+    return tree
+
+
+def playlist(entries) -> str:
+    lines = ["#EXTM3U"]
+    for extinf, url in entries:
+        lines.append(extinf)
+        lines.append(url)
+    return "\n".join(lines) + "\n"
+
+
+def extinf(name: str, group: str) -> str:
+    return f'#EXTINF:-1 tvg-name="{name}" group-title="{group}",{name}'
+
+
+def generated_entries(n: int, seed: int):
+    """(extinf, url) pairs of a bench.generate playlist."""
+    out = []
+    pending = None
+    for ln in iter_playlist_lines(n, seed):
+        if ln.startswith("#EXTINF"):
+            pending = ln
+        elif not ln.startswith("#") and pending:
+            out.append((pending, ln))
+            pending = None
+    return out
+
+
+def mutate(entries, rng: random.Random, next_id: list):
+    """One playlist "update": drops, renames, regroups, duplicated urls, new items, reordering."""
+    out = []
+    for ext, url in entries:
+        r = rng.random()
+        if r < 0.05:
+            continue
+        if r < 0.08:
+            ext = ext.replace('tvg-name="', 'tvg-name="X ').replace(",", ", X ", 1) if "," in ext else ext
+        elif r < 0.11:
+            ext = ext.replace('group-title="DE', 'group-title="AT', 1).replace('group-title="UK', 'group-title="DE', 1)
+        out.append((ext, url))
+        if rng.random() < 0.03:
+            # same stream in another group (usual in Xtream lists)
+            out.append((ext.replace('group-title="', 'group-title="DE | Dup ', 1), url))
+    for _ in range(rng.randint(0, 20)):
+        next_id[0] += 1
+        ext, url = rng.choice(entries)
+        out.insert(rng.randrange(len(out) + 1), (ext.replace('tvg-name="', 'tvg-name="New ', 1), url.rsplit("/", 1)[0] + f"/{next_id[0]}.ts"))
+    if rng.random() < 0.3:
+        i, j = rng.randrange(len(out)), rng.randrange(len(out))
+        out[i], out[j] = out[j], out[i]
+    return out
+
+
+def manifest_rows(out_dir: Path) -> dict:
+    """key -> manifest row of the last run, paths relative to out_dir."""
+    prefix = str(out_dir.resolve()) + "/"
+    with StateStore.open(out_dir / ".xtream_state") as store:
+        return {
+            k: {f: (v[len(prefix):] if f == "path" and v else v) for f, v in row.items()}
+            for k, row in store.iter_manifest()
+        }
+
+
+def dict_diff(a: dict, b: dict, limit: int = 10) -> list:
+    """Keys whose values differ (missing on one side included); cheap to report, unlike assertEqual's diff."""
+    keys = sorted(k for k in set(a) | set(b) if a.get(k, "<missing>") != b.get(k, "<missing>"))
+    return [(k, a.get(k, "<missing>"), b.get(k, "<missing>")) for k in keys[:limit]]
+
+
+_MAIN_DIR = None
+
+
+def import_main():
+    """app.main with DATA_DIR / OUTPUT_DIR in a temp dir and no GUI auth (set before its first import)."""
+    global _MAIN_DIR
+    if _MAIN_DIR is None:
+        _MAIN_DIR = tempfile.TemporaryDirectory()
+        os.environ["DATA_DIR"] = str(Path(_MAIN_DIR.name) / "data")
+        os.environ["OUTPUT_DIR"] = str(Path(_MAIN_DIR.name) / "output")
+        os.environ["GUI_USER"] = ""
+        os.environ["GUI_PASS"] = ""
+    from app import main
+
+    return main